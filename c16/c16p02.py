@@ -1,3 +1,14 @@
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..","c17"))
+from c17p11 import words_from_text
+from array import array
+from collections import Counter
+from random import choices, randint
+from time import time
+import tempfile
+
 # c16p02
 
 # Word Frequencies: Design a method to find the frequency of occurrences of 
@@ -29,4 +40,368 @@
 # book is guaranteed not to change, then the first time we call the function
 # we build the dictionary and return the desired value in O(N) time. Then for 
 # all subsequent times we call it, we simply return a value from the 
-# dictionary in O(1) time.
\ No newline at end of file
+# dictionary in O(1) time.
+
+##############################################################################
+
+# For many books that are queried all day, FrequencyIndex keeps a Counter of 
+# words for each document, which it builds by streaming the words of a file
+# from words_from_text (see c17p11), and one combined Counter over all of 
+# them. Adding a document only counts that document and adds its counts to 
+# the combined Counter, so nothing is rebuilt. Every query is a dictionary 
+# lookup.
+
+# So that a long-lived process does not recount every book when it starts, 
+# the index can be saved to one binary file and loaded back. Words are given
+# int ids in the order they are first seen, which never change, so a 
+# document's counts are stored as (word id, count) pairs. Loading reads only
+# the vocabulary, the combined counts, and where each document's pairs start
+# in the file. A document's pairs are read, and turned into a Counter, when 
+# that document is first queried, so the cost of starting up does not grow 
+# with the number of documents, and a process that only asks about the 
+# combined counts never reads the pairs at all.
+
+# The file layout:
+#
+#   header:   MAGIC, VERSION, vocab_size, doc_count, vocab_bytes, 
+#             names_bytes, pair_count, as little-endian uint32
+#   vocab:    vocab_bytes of UTF-8 words, in id order, separated by NUL
+#   names:    names_bytes of UTF-8 document names, separated by NUL
+#   totals:   vocab_size combined counts, as little-endian uint64
+#   bounds:   doc_count+1 offsets into pairs, as little-endian uint32; 
+#             document i has pairs bounds[i] to bounds[i+1]
+#   pairs:    pair_count rows of (word id, count), as little-endian uint32
+#
+# Like the trie table in mmaptrie.py, the file is written to a temporary path
+# and then moved into place, so a crash never leaves a half-written index.
+
+# Every count, offset, and length in the file must fit in 32 bits except for
+# the combined counts, and save() checks this before writing anything. One 
+# document would need over four billion copies of a word to overflow.
+
+MAGIC = 0x58444946  # b"FIDX" when read as little-endian bytes.
+VERSION = 1
+HEADER_LEN = 7
+SEPARATOR = "\0"
+MAX_UINT32 = (1 << 32) - 1
+
+class FrequencyIndex:
+    """Word counts for many documents, and for all of them together.
+    
+    Attributes:
+        vocab: A list of the words seen, indexed by word id.
+        word_ids: A dictionary mapping words to word ids.
+        totals: A Counter of words over all documents.
+        docs: A dictionary mapping document names to Counters of words,
+          or to (start,stop) rows of the pairs in path for documents 
+          loaded but not yet queried.
+        path: A string path to the file the index was last loaded from
+          or saved to, or None.
+        pairs_base: An int. The byte offset of the pairs in path.
+    """
+    
+    def __init__(self):
+        """Inits an empty FrequencyIndex."""
+        self.vocab = []
+        self.word_ids = {}
+        self.totals = Counter()
+        self.docs = {}
+        self.path = None
+        self.pairs_base = 0
+        
+    def __len__(self):
+        return len(self.docs)
+        
+    def __contains__(self,name):
+        return name in self.docs
+        
+    def add_file(self,filepath,name=None):
+        """Counts the words of the file at filepath, as split by 
+        words_from_text, as the document name (filepath by default)."""
+        self.add(filepath if name is None else name,
+                 words_from_text(filepath))
+        
+    def add(self,name,words):
+        """Counts an iterable of words, or takes a mapping from words to
+        counts, as the document name, replacing any document already 
+        called name, in O(N) time (N: word count).
+        """
+        if name in self.docs:
+            self.remove(name)
+        counts = Counter(words)
+        for word in counts:
+            if word not in self.word_ids:
+                self.word_ids[word] = len(self.vocab)
+                self.vocab.append(word)
+        self.docs[name] = counts
+        self.totals.update(counts)
+        
+    def remove(self,name):
+        """Removes the document name from the index.
+        
+        Raises:
+            KeyError: No document is called name.
+        """
+        counts = self.document(name)
+        del self.docs[name]
+        self.totals.subtract(counts)
+        for word in counts:
+            if not self.totals[word]:
+                del self.totals[word]
+                
+    def frequency(self,word,name=None):
+        """Returns the number of occurrences of word in the document 
+        name, or in all documents if name is None.
+        
+        Raises:
+            KeyError: No document is called name.
+        """
+        if name is None:
+            return self.totals.get(word,0)
+        return self.document(name).get(word,0)
+        
+    def most_common(self,k,name=None):
+        """Returns a list of the k most common (word,count) pairs in the 
+        document name, or in all documents if name is None."""
+        counts = self.totals if name is None else self.document(name)
+        return counts.most_common(k)
+        
+    def document(self,name):
+        """Returns the Counter of words of the document name, building it
+        first if it was loaded from disk and has not been queried.
+        
+        Raises:
+            KeyError: No document is called name.
+        """
+        counts = self.docs[name]
+        if not isinstance(counts,Counter):
+            with open(self.path,"rb") as f:
+                rows = self._read_rows(f,*counts)
+            vocab = self.vocab
+            counts = Counter(dict(zip([vocab[i] for i in rows[::2]],
+                                      rows[1::2])))
+            self.docs[name] = counts
+        return counts
+        
+    def save(self,path):
+        """Writes the index to path in the format above, replacing any
+        file there only once the new one is complete.
+        
+        Raises:
+            ValueError: A word or document name contains a NUL character,
+              or a count, offset, or length does not fit in 32 bits.
+        """
+        names = list(self.docs)
+        vocab_blob = _join(self.vocab)
+        names_blob = _join(names)
+        totals = array("Q",(self.totals.get(word,0) for word in self.vocab))
+        bounds, pairs = array("I",[0]), array("I")
+        
+        source = None if self.path is None else open(self.path,"rb")
+        try:
+            for name in names:
+                counts = self.docs[name]
+                if isinstance(counts,Counter):
+                    if counts and max(counts.values()) > MAX_UINT32:
+                        raise ValueError(f"A count in {name!r} does not "
+                                         f"fit in 32 bits.")
+                    word_ids = self.word_ids
+                    for word,count in counts.items():
+                        pairs.append(word_ids[word])
+                        pairs.append(count)
+                else:
+                    pairs.extend(self._read_rows(source,*counts))
+                bounds.append(len(pairs)//2)
+        finally:
+            if source is not None:
+                source.close()
+                
+        fields = (MAGIC,VERSION,len(self.vocab),len(names),len(vocab_blob),
+                  len(names_blob),len(pairs)//2)
+        if max(fields) > MAX_UINT32:
+            raise ValueError("The index is too large for the file format.")
+        header = array("I",fields)
+        
+        tmp_path = path + ".tmp"
+        with open(tmp_path,"wb") as f:
+            f.write(_to_little(header))
+            f.write(vocab_blob)
+            f.write(names_blob)
+            for table in (totals,bounds):
+                f.write(_to_little(table))
+            pairs_base = f.tell()
+            f.write(_to_little(pairs))
+        os.replace(tmp_path,path)
+        
+        # Documents not yet queried now refer to rows of the new file.
+        
+        self.path, self.pairs_base = path, pairs_base
+        for i,name in enumerate(names):
+            if not isinstance(self.docs[name],Counter):
+                self.docs[name] = (bounds[i],bounds[i+1])
+        
+    @classmethod
+    def load(cls,path):
+        """Returns the FrequencyIndex saved at path. Per-document Counters
+        are built lazily (see document()), so the file must stay at path
+        until every document has been queried or the index is saved 
+        elsewhere.
+        
+        Raises:
+            ValueError: The file at path is not a saved FrequencyIndex,
+              or is not the length its header gives.
+        """
+        with open(path,"rb") as f:
+            file_bytes = os.fstat(f.fileno()).st_size
+            header = _from_little("I",f.read(4*HEADER_LEN))
+            if (len(header) < HEADER_LEN or header[0] != MAGIC or 
+                header[1] != VERSION):
+                raise ValueError(f"{path} is not a FrequencyIndex file.")
+            (_, _, vocab_size, doc_count, vocab_bytes, names_bytes, 
+             pair_count) = header
+            data_bytes = (vocab_bytes + names_bytes + 8*vocab_size + 
+                          4*(doc_count+1))
+            if file_bytes != 4*HEADER_LEN + data_bytes + 8*pair_count:
+                raise ValueError(f"{path} is truncated")
+            data = f.read(data_bytes)
+            
+        read = 0
+        vocab = _split(data[read:read+vocab_bytes],vocab_size)
+        read += vocab_bytes
+        names = _split(data[read:read+names_bytes],doc_count)
+        read += names_bytes
+        totals = _from_little("Q",data[read:read+8*vocab_size])
+        read += 8*vocab_size
+        bounds = _from_little("I",data[read:read+4*(doc_count+1)])
+        
+        index = cls()
+        index.vocab = vocab
+        index.word_ids = {word: i for i,word in enumerate(vocab)}
+        index.totals = Counter({word: count for word,count in 
+                                zip(vocab,totals) if count})
+        index.docs = {name: (bounds[i],bounds[i+1]) 
+                      for i,name in enumerate(names)}
+        index.path = path
+        index.pairs_base = 4*HEADER_LEN + len(data)
+        return index
+        
+    def _read_rows(self,f,start,stop):
+        """Returns an array of the flattened pairs in rows start to stop
+        of the open file f."""
+        f.seek(self.pairs_base + 8*start)
+        return _from_little("I",f.read(8*(stop-start)))
+        
+def _join(strings):
+    """Returns strings encoded as UTF-8 and separated by NUL."""
+    if any(SEPARATOR in string for string in strings):
+        raise ValueError("Words and names may not contain NUL.")
+    return SEPARATOR.join(strings).encode("utf-8")
+    
+def _split(blob,count):
+    """Returns the list of count strings that _join() encoded as blob."""
+    return blob.decode("utf-8").split(SEPARATOR) if count else []
+    
+def _to_little(table):
+    """Returns the bytes of an array, in little-endian order."""
+    if sys.byteorder == "big":
+        table = array(table.typecode,table)
+        table.byteswap()
+    return table.tobytes()
+    
+def _from_little(typecode,data):
+    """Returns an array of typecode read from little-endian bytes."""
+    table = array(typecode)
+    table.frombytes(data[:len(data)//table.itemsize*table.itemsize])
+    if sys.byteorder == "big":
+        table.byteswap()
+    return table
+    
+def test_index(docs=50,words=2000):
+    """Checks an index built incrementally and one saved and loaded 
+    against Counters of random documents."""
+    vocab = [f"w{i}" for i in range(500)]
+    texts = {f"doc{i}": choices(vocab,k=randint(0,words)) 
+             for i in range(docs)}
+    expected = {name: Counter(text) for name,text in texts.items()}
+    
+    index = FrequencyIndex()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory,"index.fidx")
+        for i,(name,text) in enumerate(texts.items()):
+            index.add(name,text)
+            if i % 10 == 0:  # Save, load, and keep adding to the copy.
+                index.save(path)
+                index = FrequencyIndex.load(path)
+        index.add("doc0",texts["doc0"])  # Replacing is a no-op here.
+        index.save(path)
+        loaded = FrequencyIndex.load(path)
+        
+        total = sum(expected.values(),Counter())
+        for copy in (index,loaded):
+            assert len(copy) == docs and copy.totals == total
+            for name,counts in expected.items():
+                assert copy.document(name) == counts
+                assert all(copy.frequency(word,name) == counts[word] 
+                           for word in vocab[:20])
+                           
+        loaded.remove("doc1")
+        assert loaded.totals == total - expected["doc1"]
+        assert "doc1" not in loaded and loaded.frequency("missing") == 0
+        
+        text_path = os.path.join(directory,"book.txt")
+        with open(text_path,"w") as f:
+            f.write("The cat\tsat on\n\n  the MAT, the end.\n")
+        index = FrequencyIndex()
+        index.add_file(text_path,"book")
+        assert index.document("book") == Counter(
+            {"the": 3, "cat": 1, "sat": 1, "on": 1, "mat,": 1, "end.": 1})
+            
+        index.add("huge",{"word": MAX_UINT32 + 1})
+        try:
+            index.save(path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Saved a count too large for the file.")
+            
+        with open(path,"rb") as f:
+            saved = f.read()
+        for length in (0,4*HEADER_LEN-1,4*HEADER_LEN,len(saved)-1):
+            with open(path,"wb") as f:
+                f.write(saved[:length])
+            try:
+                FrequencyIndex.load(path)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"Loaded {length} of {len(saved)} bytes.")
+    print("FrequencyIndex OK.")
+    
+def time_load(docs=2000,words=20000,vocab_size=200000):
+    """Saves an index of docs random documents and prints how long it 
+    takes to load, and then to answer a query about every document."""
+    vocab = [f"w{i}" for i in range(vocab_size)]
+    weights = [1/(rank+1) for rank in range(vocab_size)]
+    index = FrequencyIndex()
+    for i in range(docs):
+        index.add(f"doc{i}",choices(vocab,weights,k=words))
+        
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory,"index.fidx")
+        index.save(path)
+        size = os.path.getsize(path)
+        start = time()
+        loaded = FrequencyIndex.load(path)
+        loaded_time = time() - start
+        
+        start = time()
+        assert loaded.frequency("w0") == index.frequency("w0")
+        query_time = time() - start
+        start = time()
+        for name in index.docs:
+            assert loaded.frequency("w1",name) == index.frequency("w1",name)
+        all_docs_time = time() - start
+        
+    print(f"{docs} documents, {len(loaded.vocab)} words, {size:,} bytes: "
+          f"load {loaded_time:.3f}s, first query {query_time:.6f}s, "
+          f"first query of every document {all_docs_time:.3f}s")
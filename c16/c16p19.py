@@ -1,6 +1,6 @@
 import sys
 sys.path.append('..')
-from data_structs import DequeQueue
+from data_structs import RingQueue
 
 # c16p19
 
@@ -23,13 +23,11 @@ from data_structs import DequeQueue
 
 # Where R is the number of rows and C the number of columns, this approach 
 # operates in O(R*C) time, not touching any one space any more than a constant
-# number of times (This constant number is not perfectly minimized because
-# in the BFS implementation below, a neighbor space may be added to the queue, 
-# then added again by a different neighbor, and then visited once to be
-# processed, and then visited once more to be ignored. Still, it can be added 
-# no more than 8 times by its 8 neighbors. DFS would likely have fewer average
-# visits per space but depending on implementation could have its own costs 
-# with repeated recursive calls taking more time.)
+# number of times. (The BFS implementation below marks a space as visited when
+# it is added to the queue rather than when it is removed, so no space is ever
+# added twice, even though up to 8 neighbors may see it. DFS would likely have
+# similar visits per space but depending on implementation could have its own
+# costs with repeated recursive calls taking more time.)
 
 # O(R*C) space is required for memoization if we are not permitted to alter 
 # the input matrix. If we were, we could change values at visited spaces to
@@ -55,49 +53,55 @@ def f1(M):
     memo = set()  # Set of already-explored coordinate pairs.
     sizes = []
     
+    # Every space is added to the queue at most once, so one queue with a
+    # slot per space is enough for every pond's BFS.
+    
+    queue = RingQueue(rows*cols)
+    
     for i in range(rows):
         for j in range(cols):
             if (i,j) not in memo:
                 if M[i][j] == 0:
-                    sizes.append(get_pond_size(i,j,M,memo,rows,cols))
+                    sizes.append(get_pond_size(i,j,M,memo,rows,cols,queue))
                 else:
                     memo.add((i,j))
     
     return sizes
     
-def get_pond_size(i,j,M,memo,rows,cols):
+def get_pond_size(i,j,M,memo,rows,cols,queue):
     """Given coordinates for an unvisited space with water, calculates
     the size of the pond with this space in it using BFS.
     
     Args:
         i,j: Integer coordinates for the row and column of the space.
         M: A list of list of integers.
-        memo: A set of tuples representing visited spaces.
+        memo: A set of tuples representing visited or queued spaces.
         rows,cols: Integer numbers of rows and column in matrix used
           for boundary checking.
+        queue: An empty RingQueue instance, left empty on return.
         
     Returns:
         An integer.
     """
     size = 0
-    queue = DequeQueue()
+    memo.add((i,j))
     queue.add((i,j))
     
     while not queue.is_empty():
         x,y = queue.remove()
-        if (x,y) not in memo:
-            memo.add((x,y))
-            if M[x][y] == 0:  # Part of the pond we are interested in.
-                size += 1
-                add_surrounding_spaces(queue,x,y,rows,cols,memo)
+        if M[x][y] == 0:  # Part of the pond we are interested in.
+            size += 1
+            add_surrounding_spaces(queue,x,y,rows,cols,memo)
         
     return size    
 
 def add_surrounding_spaces(queue,x,y,rows,cols,memo):
-    """Adds to queue inbound, unexplored spaces surrounding (x,y).""" 
+    """Adds to queue inbound, unexplored spaces surrounding (x,y), and
+    marks them as explored.""" 
     for a in [x-1,x,x+1]:
         for b in [y-1,y,y+1]:
             if 0<=a and a<rows and 0<=b and b<cols and (a,b) not in memo:
+                memo.add((a,b))
                 queue.add((a,b))
 
 # Some test inputs below.
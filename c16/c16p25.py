@@ -1,6 +1,13 @@
 import sys
 sys.path.append('..')
-from data_structs import Doubly
+from c16p25_policies import LRUPolicy, LFUPolicy, TwoQPolicy, ARCPolicy
+from c16p25_policies import WTinyLFUPolicy, EvictionPolicy
+import asyncio
+from collections import namedtuple
+from functools import wraps
+from random import randint, random, choices
+from time import monotonic, time, sleep
+import threading
 
 # c16p25
 
@@ -25,62 +32,403 @@ from data_structs import Doubly
 # value, but also that this counts as a "use" just like retrieval and thus 
 # results in the item being placed at the head of the doubly-linked list.
 
+# The list is an ArrayDoubly, whose nodes are slots in preallocated arrays. 
+# Since the cache never holds more than maxsize items, a list with maxsize 
+# slots never grows, and an evicted item's slot is reused by the item that 
+# replaces it, so the cache does not allocate any nodes after it is created.
+
+# LRU is not the only way to pick which item to evict, so the list now lives
+# in an LRUPolicy object (see c16p25_policies.py), and MyCache takes the 
+# policy class as an argument. The cache keeps a dictionary from keys to 
+# values, and tells the policy about every hit, miss, and insertion. The 
+# policy tells the cache which keys to evict.
+
+# A cache can also be bounded by something other than its number of items, 
+# such as the bytes its values take up. Given a weigher, a function from a 
+# value to its weight, MyCache treats maxsize as a total weight, and asks the
+# policy to evict items until the total fits. Policies still keep at most 
+# maxsize keys, which is right as long as no item weighs less than 1. As a 
+# weight, maxsize may be far more keys than the cache ever holds, so no 
+# policy allocates or sizes its parts by maxsize alone (see the policies).
+# An item heavier than maxsize is never stored.
+
+# Items can also expire. With a ttl (time to live) in seconds, for the cache 
+# as a whole or for one insert(), an item is treated as missing once that 
+# much time has passed since it was inserted, and is removed when next looked
+# up. The cache counts its hits, misses, and evictions, and cache_info() 
+# reports them in the same form as functools.lru_cache.
+
+CacheInfo = namedtuple("CacheInfo",["hits","misses","evictions","maxsize",
+                                    "currsize"])
+
 class MyCache:
-    """A 'least recently used' cache.
+    """A cache that evicts items according to a policy, by default 
+    'least recently used'.
     
     Attributes:
         size: An integer. The current number of items in the cache.
-        maxsize: An integer. The capacity of the cache.
-        chain: A Doubly linked list instance.
-        lookup: A dictionary mapping keys to nodes in the linked list.
+        maxsize: An integer. The capacity of the cache, in items, or in
+          total weight if weigher is not None.
+        policy: An EvictionPolicy instance.
+        ttl: A number of seconds after which items expire, or None.
+        weigher: A function that returns the weight of a value, or None.
+        lookup: A dictionary mapping keys to values.
+        weights: A dictionary mapping keys to the weights of values.
+        weight: A number. The total weight of all values.
+        deadlines: A dictionary mapping keys of items that expire to 
+          the time.monotonic() time at which they do.
+        hits, misses, evictions: Integer counts of lookups that found a
+          live item, lookups that did not, and items evicted to make room.
     """
 
-    def __init__(self,maxsize):
-        """Inits empty MyCache instance. maxsize specified by user."""
-        self.size = 0
+    def __init__(self,maxsize,policy=LRUPolicy,ttl=None,weigher=None):
+        """Inits empty MyCache instance. maxsize specified by user, and
+        policy is an EvictionPolicy subclass."""
         self.maxsize = maxsize
-        self.chain = Doubly()
+        self.policy = policy(maxsize)
+        self.ttl = ttl
+        self.weigher = weigher
         self.lookup = {}
+        self.weights = {}
+        self.weight = 0
+        self.deadlines = {}
+        self.hits = self.misses = self.evictions = 0
         
-    def insert(self,key,value):
+    @property
+    def size(self):
+        """Returns the number of items in the cache."""
+        return len(self.lookup)
+        
+    def insert(self,key,value,ttl=None):
         """Inserts (key,value) pair into the cache.
         
         If key already matches an item in the cache, replaces the old
-        value with the new. If cache is at full capacity, evicts the 
-        least recently used item to make room for the new. Always 
-        returns with the item at the head of the linked list as the 
-        most recently used item.
+        value with the new, which counts as a use. Otherwise, the 
+        policy may evict items to make room for the new, or decline to
+        keep the new item. ttl overrides the cache's ttl for this item.
         """
-        
+        weight = 1 if self.weigher is None else self.weigher(value)
+        if weight > self.maxsize:
+            if key in self.lookup:
+                self._discard(key)
+            return
+            
         if key in self.lookup:
-            self.chain.move_to_head(self.lookup[key])
-            self.lookup[key].val[1] = value
-        
+            self._store(key,value,weight,ttl)
+            self.policy.access(key)
         else:
-        
-            if self.size == self.maxsize:
-                lru_pair = self.chain.remove_tail() # (key,value)
-                del self.lookup[lru_pair[0]]
-                self.size -= 1
-        
-            node = self.chain.insert_head([key,value])
-            self.lookup[key] = node
-            self.size += 1
+            self._store(key,value,weight,ttl)
+            for evicted_key in self.policy.add(key):
+                self._drop(evicted_key)
+                
+        while self.weight > self.maxsize:
+            self._drop(self.policy.evict())
     
     def retrieve(self,key):
         """If some key exists in the cache, returns the value. 
         Otherwise, returns None.
         """
+        return self.get(key)
+        
+    def get(self,key,default=None):
+        """If some key exists in the cache and has not expired, returns
+        the value. Otherwise, returns default."""
         if key in self.lookup:
-            self.chain.move_to_head(self.lookup[key])
-            return self.lookup[key].val[1]
+            deadline = self.deadlines.get(key)
+            if deadline is None or monotonic() < deadline:
+                self.hits += 1
+                self.policy.access(key)
+                return self.lookup[key]
+            self._discard(key)
+        self.misses += 1
+        self.policy.miss(key)
+        return default
+        
+    def cache_info(self):
+        """Returns a CacheInfo of the counters, maxsize, and current size
+        (the total weight if there is a weigher)."""
+        currsize = self.size if self.weigher is None else self.weight
+        return CacheInfo(self.hits,self.misses,self.evictions,self.maxsize,
+                         currsize)
+                         
+    def cache_clear(self):
+        """Removes every item and resets the counters."""
+        self.policy = type(self.policy)(self.maxsize)
+        self.lookup.clear()
+        self.weights.clear()
+        self.deadlines.clear()
+        self.weight = 0
+        self.hits = self.misses = self.evictions = 0
+        
+    def _store(self,key,value,weight,ttl):
+        """Stores value and its weight and deadline under key."""
+        self.lookup[key] = value
+        self.weight += weight - self.weights.get(key,0)
+        self.weights[key] = weight
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is not None:
+            self.deadlines[key] = monotonic() + ttl
+        elif key in self.deadlines:
+            del self.deadlines[key]
+            
+    def _drop(self,key):
+        """Forgets an item that the policy has evicted."""
+        del self.lookup[key]
+        self.weight -= self.weights.pop(key)
+        self.deadlines.pop(key,None)
+        self.evictions += 1
+        
+    def _discard(self,key):
+        """Removes an item that expired or can no longer fit. Does not 
+        count as an eviction."""
+        self.policy.remove(key)
+        del self.lookup[key]
+        self.weight -= self.weights.pop(key)
+        self.deadlines.pop(key,None)
         
     def display(self):
-        """Prints size information and displays the linked list."""
+        """Prints size information and displays the items in the order
+        the policy keeps them."""
         room_left = self.maxsize-self.size
         print(f"{self.size} slots filled. {room_left} under capacity")
-        self.chain.display()
+        if self.size == 0:
+            print("List is empty.")
+        else:
+            self.policy.display(self.lookup)
+        
+# MyCache cannot be shared between threads without a lock, and since even 
+# retrieve() reorders the list, readers need the lock as much as writers do.
+# With one lock around the whole cache, threads take turns on every call. 
+
+# ShardedLRUCache splits the cache into several MyCache shards, each with its
+# own lock and an equal share of maxsize, and sends each key to the shard 
+# picked by its hash. Threads working on keys in different shards never wait
+# for each other. The price is that eviction is only LRU within each shard, 
+# which is close to global LRU when keys hash evenly. get_many() and 
+# put_many() sort a batch of keys by shard first, so each shard's lock is 
+# taken once per batch rather than once per key.
+
+class ShardedLRUCache:
+    """A thread-safe 'least recently used' cache made of independently
+    locked MyCache shards.
+    
+    Attributes:
+        shards: A list of MyCache instances.
+        locks: A list of threading.Lock instances. locks[i] guards 
+          shards[i].
+    """
+    
+    def __init__(self,maxsize,shards=16):
+        """Inits an empty ShardedLRUCache with room for maxsize items in
+        total. Uses fewer shards than asked for if maxsize is smaller.
+        
+        Raises:
+            ValueError: maxsize or shards is less than 1.
+        """
+        if maxsize < 1 or shards < 1:
+            raise ValueError("maxsize and shards must both be at least 1.")
+        shards = min(shards,maxsize)
+        self.shards = [MyCache(maxsize//shards + (i < maxsize%shards))
+                       for i in range(shards)]
+        self.locks = [threading.Lock() for _ in range(shards)]
+        
+    def __len__(self):
+        return sum(shard.size for shard in self.shards)
+        
+    def insert(self,key,value):
+        """Inserts (key,value) pair into the key's shard. See MyCache."""
+        i = self._shard_index(key)
+        with self.locks[i]:
+            self.shards[i].insert(key,value)
+            
+    def retrieve(self,key):
+        """If some key exists in the cache, returns the value. 
+        Otherwise, returns None."""
+        i = self._shard_index(key)
+        with self.locks[i]:
+            return self.shards[i].retrieve(key)
+            
+    def get_many(self,keys):
+        """Returns a list of the values for keys, in the same order, with
+        None for keys not in the cache. Takes each shard's lock once."""
+        keys = list(keys)
+        output = [None] * len(keys)
+        for i,positions in self._group(keys).items():
+            with self.locks[i]:
+                shard = self.shards[i]
+                for position in positions:
+                    output[position] = shard.retrieve(keys[position])
+        return output
+        
+    def put_many(self,pairs):
+        """Inserts every (key,value) pair in pairs, in order within each
+        shard. Takes each shard's lock once."""
+        pairs = list(pairs)
+        for i,positions in self._group(key for key,_ in pairs).items():
+            with self.locks[i]:
+                shard = self.shards[i]
+                for position in positions:
+                    shard.insert(*pairs[position])
+                    
+    def _shard_index(self,key):
+        """Returns the index of the shard that holds key."""
+        return hash(key) % len(self.shards)
+        
+    def _group(self,keys):
+        """Returns a dictionary mapping shard indices to lists of the 
+        positions in keys of the keys in that shard."""
+        groups = {}
+        for position,key in enumerate(keys):
+            groups.setdefault(self._shard_index(key),[]).append(position)
+        return groups
+        
+# cached() turns a MyCache into a memoizing decorator, in the manner of 
+# functools.lru_cache but with a policy, ttl, and weigher. The key is the 
+# tuple of positional arguments followed by the sorted keyword arguments, so
+# all arguments must be hashable. The lock guards the cache but is not held
+# while the function runs, so two threads that miss on the same arguments at
+# once may both call it; the second result simply replaces the first.
+
+MISSING = object()
+KWARGS_MARK = object()
+
+def cached(maxsize=128,ttl=None,weigher=None,policy=LRUPolicy):
+    """Returns a decorator that memoizes a function in a MyCache with the
+    given maxsize, ttl, weigher, and policy. The decorated function has 
+    attributes cache, cache_info, and cache_clear."""
+    def decorator(function):
+        cache = MyCache(maxsize,policy,ttl,weigher)
+        lock = threading.Lock()
+        
+        @wraps(function)
+        def wrapper(*args,**kwargs):
+            key = _make_key(args,kwargs)
+            with lock:
+                value = cache.get(key,MISSING)
+            if value is MISSING:
+                value = function(*args,**kwargs)
+                with lock:
+                    cache.insert(key,value)
+            return value
+            
+        wrapper.cache = cache
+        wrapper.cache_info = cache.cache_info
+        wrapper.cache_clear = cache.cache_clear
+        return wrapper
+    return decorator
+    
+def _make_key(args,kwargs):
+    """Returns a hashable key for a call with args and kwargs."""
+    if not kwargs:
+        return args
+    return args + (KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+    
+# AsyncLRUCache puts a MyCache in front of a slow asynchronous loader, such 
+# as a database or a remote service. If many coroutines miss on the same key 
+# at once, only the first starts a load; the rest await the same task, so the
+# backend sees one request instead of a "thundering herd". Each load runs in 
+# its own task and the waiters await it through asyncio.shield(), so 
+# cancelling one waiter does not cancel the load for the others. If the load
+# fails, every waiter gets the exception and nothing is cached.
+
+# With a ttl, a value is fresh for ttl seconds after it was loaded. With a 
+# stale_ttl as well, for stale_ttl seconds after that the old value is still
+# returned at once, while a refresh runs in the background 
+# ("stale-while-revalidate"). The MyCache entries are (value, loaded_at) 
+# pairs with a ttl of ttl + stale_ttl, so entries past both windows expire 
+# on their own. No lock is needed, because coroutines on one event loop only
+# switch at an await, and there is none between checking the cache and 
+# registering a load.
+
+class AsyncLRUCache:
+    """A cache for coroutines on one asyncio event loop, which coalesces
+    concurrent loads of the same key.
+    
+    Attributes:
+        cache: A MyCache instance mapping keys to (value, loaded_at) 
+          pairs, loaded_at being a time.monotonic() time.
+        ttl: A number of seconds for which values are fresh, or None if 
+          they are always fresh.
+        stale_ttl: A number of seconds after ttl for which stale values 
+          may be returned while they are refreshed.
+        pending: A dictionary mapping keys to the asyncio.Task instances 
+          loading them.
+        loads: An integer count of the loads started.
+    """
+    
+    def __init__(self,maxsize,ttl=None,stale_ttl=0,policy=LRUPolicy):
+        """Inits an empty AsyncLRUCache.
+        
+        Raises:
+            ValueError: stale_ttl is given without ttl.
+        """
+        if ttl is None and stale_ttl:
+            raise ValueError("stale_ttl requires a ttl.")
+        expiry = None if ttl is None else ttl + stale_ttl
+        self.cache = MyCache(maxsize,policy,expiry)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.pending = {}
+        self.loads = 0
+        
+    def __len__(self):
+        return self.cache.size
+        
+    async def get_or_load(self,key,loader):
+        """Returns the value for key. On a miss, or if the value has 
+        expired, awaits loader(), a coroutine function of no arguments,
+        unless a load of key is already running, in which case awaits 
+        that one. If the value is stale, returns it and refreshes it in
+        the background.
+        
+        Raises:
+            Any exception raised by the load awaited.
+        """
+        entry = self.cache.get(key)
+        if entry is not None:
+            value, loaded_at = entry
+            if self.ttl is None or monotonic() - loaded_at < self.ttl:
+                return value
+            if key not in self.pending:
+                self._start_load(key,loader)
+            return value
+        task = self.pending.get(key)
+        if task is None:
+            task = self._start_load(key,loader)
+        return await asyncio.shield(task)
         
+    def invalidate(self,key):
+        """Removes key from the cache. A load already running for key 
+        still stores its value when it finishes."""
+        if key in self.cache.lookup:
+            self.cache._discard(key)
+            
+    def _start_load(self,key,loader):
+        """Starts a task that awaits loader() and caches its value under
+        key. Returns the task."""
+        task = asyncio.ensure_future(self._load(key,loader))
+        self.pending[key] = task
+        task.add_done_callback(self._retrieve_exception)
+        self.loads += 1
+        return task
+        
+    async def _load(self,key,loader):
+        """Awaits loader(), caches the value under key, and returns it."""
+        try:
+            value = await loader()
+            self.cache.insert(key,(value,monotonic()))
+            return value
+        finally:
+            del self.pending[key]
+            
+    @staticmethod
+    def _retrieve_exception(task):
+        """Marks a failed task's exception as retrieved, so that a 
+        background refresh that nobody awaits fails quietly. The stale
+        value stays until it expires."""
+        if not task.cancelled():
+            task.exception()
+            
 def test():
     """Tests a toy example."""
     test_cache = MyCache(3)
@@ -99,4 +447,193 @@ def test():
     test_cache.insert("TPA","Tampa")  # "PDX" is now evicted.
     print(test_cache.retrieve("PDX"))  # Should print None.
     
-    test_cache.display()
\ No newline at end of file
+    test_cache.display()
+
+def test_sharded(threads=8,ops=20000):
+    """Has several threads read and write overlapping keys in one 
+    ShardedLRUCache, checking that every value read is the one written
+    for that key and that no shard goes over its share of maxsize."""
+    MAXSIZE = 100
+    cache = ShardedLRUCache(MAXSIZE,shards=8)
+    errors = []
+    
+    def worker():
+        for _ in range(ops):
+            keys = [randint(0,3*MAXSIZE) for _ in range(randint(1,4))]
+            if randint(0,1):
+                cache.put_many((key,str(key)) for key in keys)
+            for key,value in zip(keys,cache.get_many(keys)):
+                if value is not None and value != str(key):
+                    errors.append((key,value))
+            
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+        
+    assert not errors
+    assert len(cache) <= MAXSIZE
+    for shard in cache.shards:
+        assert shard.size == len(shard.policy) <= shard.maxsize
+
+# Every policy must agree with the cache about which keys are kept, and must
+# never keep more than maxsize of them, whatever order calls arrive in.
+
+POLICIES = (LRUPolicy,LFUPolicy,TwoQPolicy,ARCPolicy,WTinyLFUPolicy)
+
+def test_policies(ops=20000):
+    """Runs random inserts and retrievals on a small MyCache with each
+    policy, checking after every call that the policy keeps exactly the
+    cache's keys, and that evict() raises IndexError once it is empty.
+    Also checks that the abstract EvictionPolicy cannot be created."""
+    try:
+        EvictionPolicy(1)
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("Created an abstract EvictionPolicy.")
+    for policy in POLICIES:
+        for maxsize in (1,2,5,50):
+            cache = MyCache(maxsize,policy)
+            for _ in range(ops//maxsize):
+                key = randint(0,3*maxsize)
+                if randint(0,1):
+                    cache.insert(key,str(key))
+                else:
+                    value = cache.retrieve(key)
+                    assert value is None or value == str(key)
+                assert cache.size == len(cache.policy) <= maxsize
+                assert set(cache.policy._keys()) == set(cache.lookup)
+            
+            # Evicting every key leaves a policy that refuses to evict.
+            
+            for _ in range(len(cache.policy)):
+                cache.policy.evict()
+            try:
+                cache.policy.evict()
+            except IndexError:
+                pass
+            else:
+                raise AssertionError("Evicted from an empty policy.")
+                
+# To compare the policies, I replay the same trace of keys against a cache 
+# with each one, retrieving every key and inserting it on a miss, as a cache
+# in front of a slow backend would. The trace draws most keys from a skewed 
+# ("Zipf-like") distribution over a hot set, where a few keys are far more 
+# popular than the rest, and every so often has a scan: a run of distinct 
+# cold keys that are never seen again. LRU loses its hot keys to every scan.
+
+def make_trace(n,hot_keys=5000,skew=1.0,scan_every=20000,scan_length=5000):
+    """Returns a list of n int keys as described above."""
+    weights = [1/(rank+1)**skew for rank in range(hot_keys)]
+    trace = choices(range(hot_keys),weights,k=n)
+    cold_key = hot_keys
+    for start in range(scan_every,n,scan_every):
+        stop = min(n,start+scan_length)
+        trace[start:stop] = range(cold_key,cold_key+stop-start)
+        cold_key += stop - start
+    return trace
+    
+def replay(trace,maxsize,policies=POLICIES):
+    """Prints the hit ratio and operations per second of a MyCache with
+    each policy over trace."""
+    print(f"{len(trace)} requests, maxsize {maxsize}:")
+    for policy in policies:
+        cache = MyCache(maxsize,policy)
+        hits = 0
+        start = time()
+        for key in trace:
+            if cache.retrieve(key) is None:
+                cache.insert(key,key)
+            else:
+                hits += 1
+        elapsed = time() - start
+        print(f"  {policy.__name__:<16}hit ratio {hits/len(trace):.3f}, "
+              f"{len(trace)/elapsed:,.0f} ops/sec")
+              
+def benchmark(n=300000,maxsize=500):
+    """Replays one trace with scans and one without."""
+    replay(make_trace(n),maxsize)
+    replay(make_trace(n,scan_every=n),maxsize)
+    
+def test_cached():
+    """Checks the counters, weighted eviction, and expiry of cached()."""
+    calls = []
+    
+    @cached(maxsize=10,weigher=len)
+    def repeat(s,times=1):
+        calls.append(s)
+        return s*times
+        
+    assert repeat("ab",times=2) == "abab" and repeat("ab",times=2) == "abab"
+    assert calls == ["ab"]
+    assert repeat.cache_info() == CacheInfo(1,1,0,10,4)
+    
+    repeat("cde",3)  # Weight 9, so "abab" must go.
+    assert repeat.cache_info().evictions == 1
+    assert repeat.cache_info().currsize == 9
+    repeat("x",11)  # Heavier than maxsize, so never stored.
+    repeat("x",11)
+    assert calls[-2:] == ["x","x"] and repeat.cache.weight == 9
+    
+    repeat.cache_clear()
+    assert repeat.cache_info() == CacheInfo(0,0,0,10,0)
+    
+    @cached(ttl=0.05)
+    def square(x):
+        calls.append(x)
+        return x*x
+        
+    calls.clear()
+    square(3), square(3)
+    sleep(0.1)
+    square(3)
+    assert calls == [3,3]
+    assert square.cache_info()[:3] == (1,2,0)
+    
+    cache = MyCache(2)
+    cache.insert("a",1,ttl=0)
+    cache.insert("b",2)
+    assert cache.get("a","gone") == "gone" and cache.size == 1
+    print("cached() OK.")
+    
+def test_async_cache():
+    """Checks that concurrent misses share one load, that failures reach
+    every waiter, and that stale values are refreshed in the background."""
+    async def run():
+        calls = []
+        
+        def make_loader(value,delay=0.01,fail=False):
+            async def loader():
+                calls.append(value)
+                await asyncio.sleep(delay)
+                if fail:
+                    raise KeyError(value)
+                return value
+            return loader
+            
+        cache = AsyncLRUCache(10)
+        values = await asyncio.gather(*(cache.get_or_load("k",make_loader(i))
+                                        for i in range(100)))
+        assert values == [0]*100 and calls == [0] and cache.loads == 1
+        assert await cache.get_or_load("k",make_loader(1)) == 0
+        
+        results = await asyncio.gather(
+            *(cache.get_or_load("bad",make_loader(i,fail=True)) 
+              for i in range(5)),return_exceptions=True)
+        assert all(isinstance(r,KeyError) for r in results)
+        assert len(cache) == 1 and not cache.pending
+        
+        cache = AsyncLRUCache(10,ttl=0.05,stale_ttl=10)
+        calls.clear()
+        await cache.get_or_load("k",make_loader("old"))
+        await asyncio.sleep(0.1)
+        assert await cache.get_or_load("k",make_loader("new")) == "old"
+        assert await cache.get_or_load("k",make_loader("newer")) == "old"
+        await asyncio.sleep(0.05)
+        assert await cache.get_or_load("k",make_loader("newest")) == "new"
+        assert calls == ["old","new"]
+        
+    asyncio.run(run())
+    print("AsyncLRUCache OK.")
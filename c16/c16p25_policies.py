@@ -0,0 +1,589 @@
+import sys
+sys.path.append('..')
+from data_structs import ArrayDoubly
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+
+# The eviction policies below decide which keys the cache in c16p25.py keeps.
+# The cache stores the values itself and tells its policy about every hit, 
+# miss, and insertion through the methods of EvictionPolicy, and the policy 
+# answers with the keys to evict. Every policy holds at most maxsize keys, 
+# and add() evicts any extras before it returns. evict() lets a cache free
+# room for other reasons, such as a total weight over its limit. Every method
+# takes O(1) time, with the exceptions noted below.
+
+# Strict LRU has a weakness: one pass over many keys that are each used only
+# once (a "scan") pushes every other key out, however often those were used.
+# LFU remembers how often each key was used instead, but then keys that were
+# popular long ago can linger. 2Q, ARC, and W-TinyLFU each protect the keys
+# that have been used more than once while still adapting to change.
+
+class EvictionPolicy(ABC):
+    """The interface shared by all eviction policies. Subclasses must 
+    implement __len__, access, add, remove, _evict, and _keys, and may
+    implement miss.
+
+    Attributes:
+        maxsize: An int. The most keys the policy keeps.
+    """
+
+    def __init__(self,maxsize):
+        """Inits an empty policy."""
+        self.maxsize = maxsize
+
+    @abstractmethod
+    def __len__(self):
+        """Returns the number of keys the policy keeps."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def access(self,key):
+        """Records a use of key, which the policy keeps, and which was 
+        just read or overwritten."""
+        raise NotImplementedError
+
+    def miss(self,key):
+        """Records a lookup of key, which the policy does not keep. Does
+        nothing unless a policy learns from misses."""
+        pass
+
+    @abstractmethod
+    def add(self,key):
+        """Starts keeping key, which was just added to the cache. 
+        
+        Returns:
+            A list of the keys the cache must evict so that the policy 
+            keeps at most maxsize keys. May include key itself if the 
+            policy declines to keep it.
+        """
+        raise NotImplementedError
+
+    def evict(self):
+        """Stops keeping the key the policy would evict next, and returns
+        it.
+        
+        Raises:
+            IndexError: The policy keeps no keys.
+        """
+        if len(self) == 0:
+            raise IndexError("Cannot evict from an empty policy.")
+        return self._evict()
+
+    @abstractmethod
+    def remove(self,key):
+        """Stops keeping key, which the cache removed for its own 
+        reasons, such as expiry. Assumes that the policy keeps key."""
+        raise NotImplementedError
+
+    def display(self,lookup):
+        """Prints the (key,value) pairs in the order the policy keeps
+        them, given the cache's dictionary from keys to values."""
+        for key in self._keys():
+            print([key,lookup[key]],'<->',end=' ')
+        print('|| ({0} items)'.format(len(self)))
+
+    @abstractmethod
+    def _evict(self):
+        """Stops keeping the key the policy would evict next, and returns
+        it. Assumes that the policy keeps at least one key."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _keys(self):
+        """Returns an iterable of the kept keys, most valued first."""
+        raise NotImplementedError
+
+# LRU keeps the keys in a linked list with the most recently used at the head,
+# exactly as MyCache did on its own. The list is an ArrayDoubly with maxsize
+# slots, so it never allocates after it is created. When maxsize is a total 
+# weight rather than a count of items it may be far larger than the number 
+# of keys ever kept, so at most PREALLOCATE slots are made up front, and the 
+# list grows past that only if it needs to.
+
+PREALLOCATE = 1 << 16
+
+class LRUPolicy(EvictionPolicy):
+    """Evicts the least recently used key.
+
+    Attributes:
+        maxsize: An int. The most keys the policy keeps.
+        chain: An ArrayDoubly instance of keys, most recent at head.
+        slots: A dictionary mapping keys to their slots in chain.
+    """
+
+    def __init__(self,maxsize):
+        """Inits an empty LRUPolicy."""
+        super(LRUPolicy,self).__init__(maxsize)
+        self.chain = ArrayDoubly(capacity=min(maxsize,PREALLOCATE))
+        self.slots = {}
+
+    def __len__(self):
+        """Returns the number of keys in chain."""
+        return self.chain.size
+
+    def access(self,key):
+        """Moves key to the head of chain."""
+        self.chain.move_to_head(self.slots[key])
+
+    def add(self,key):
+        """Inserts key at the head of chain, first evicting the tail if
+        chain is full."""
+        evicted = []
+        if len(self) >= self.maxsize:
+            evicted.append(self.evict())
+        self.slots[key] = self.chain.insert_head(key)
+        return evicted
+
+    def _evict(self):
+        """Removes and returns the key at the tail of chain."""
+        key = self.chain.remove_tail()
+        del self.slots[key]
+        return key
+
+    def remove(self,key):
+        """Removes key from chain."""
+        self.chain.remove(self.slots.pop(key))
+
+    def _keys(self):
+        """Yields keys from the head of chain to the tail."""
+        slot = self.chain.head
+        for _ in range(self.chain.size):
+            yield self.chain.vals[slot]
+            slot = self.chain.next[slot]
+
+# LFU groups keys into "buckets" by how many times they have been used, and
+# evicts from the lowest bucket, oldest key first. Each bucket is a dictionary
+# used as an ordered set, and the policy tracks the lowest count in use, so
+# moving a key up one bucket and finding a victim both take O(1) time. The
+# lowest count only has to be searched for when evict() or remove() empties
+# the lowest bucket outside of add(), which takes O(F) time for F distinct
+# counts.
+
+class LFUPolicy(EvictionPolicy):
+    """Evicts the least frequently used key, and of those, the least
+    recently added to its bucket.
+
+    Attributes:
+        maxsize: An int. The most keys the policy keeps.
+        counts: A dictionary mapping keys to use counts.
+        buckets: A dictionary mapping use counts to dictionaries whose
+          keys are the keys with that count, oldest first.
+        min_count: An int. The lowest count with a bucket, or 0.
+    """
+
+    def __init__(self,maxsize):
+        """Inits an empty LFUPolicy."""
+        super(LFUPolicy,self).__init__(maxsize)
+        self.counts = {}
+        self.buckets = {}
+        self.min_count = 0
+
+    def __len__(self):
+        """Returns the number of keys with a count."""
+        return len(self.counts)
+
+    def access(self,key):
+        """Moves key from its bucket to the bucket one count higher."""
+        count = self.counts[key]
+        self._take_from_bucket(key,count)
+        if count == self.min_count and count not in self.buckets:
+            self.min_count = count + 1
+        self.counts[key] = count + 1
+        self.buckets.setdefault(count+1,{})[key] = None
+
+    def add(self,key):
+        """Puts key in the bucket for count 1, first evicting a key if 
+        the policy is full."""
+        evicted = []
+        if len(self) >= self.maxsize:
+            evicted.append(self.evict())
+        self.counts[key] = 1
+        self.buckets.setdefault(1,{})[key] = None
+        self.min_count = 1
+        return evicted
+
+    def _evict(self):
+        """Removes and returns the oldest key in the lowest bucket."""
+        key = next(iter(self.buckets[self.min_count]))
+        self.remove(key)
+        return key
+
+    def remove(self,key):
+        """Removes key from its bucket and forgets its count."""
+        count = self.counts.pop(key)
+        self._take_from_bucket(key,count)
+        if count == self.min_count and count not in self.buckets:
+            self.min_count = min(self.buckets) if self.buckets else 0
+
+    def _take_from_bucket(self,key,count):
+        """Removes key from the bucket for count, and the bucket itself
+        if it is left empty."""
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+
+    def _keys(self):
+        """Yields keys from the highest bucket to the lowest, newest 
+        first within each bucket."""
+        for count in sorted(self.buckets,reverse=True):
+            yield from reversed(self.buckets[count])
+
+# 2Q (Johnson and Shasha, 1994) puts a new key in a small FIFO queue, A1in. A
+# key that is only used while it sits in A1in is evicted from there without
+# disturbing anything else, so a scan only churns A1in. When a key leaves
+# A1in, it is remembered (without its value) in a "ghost" FIFO queue, A1out.
+# If it is added again while still remembered, it has shown that it is used
+# more than once, and goes to the main LRU list, Am. I use the sizes that the
+# paper recommends: 1/4 of the cache for A1in, and ghosts for 1/2 of it. They
+# are fractions of the keys held when a key is evicted, which is maxsize when
+# the policy is full, rather than of maxsize itself, which may be a weight.
+
+class TwoQPolicy(EvictionPolicy):
+    """Evicts with the full 2Q algorithm.
+
+    Attributes:
+        maxsize: An int. The most keys the policy keeps.
+        a1in: An OrderedDict of new keys, oldest first.
+        a1out: An OrderedDict of ghost keys recently evicted from a1in,
+          oldest first.
+        am: An OrderedDict of keys used more than once, least recent
+          first.
+    """
+
+    def __init__(self,maxsize):
+        """Inits an empty TwoQPolicy."""
+        super(TwoQPolicy,self).__init__(maxsize)
+        self.a1in = OrderedDict()
+        self.a1out = OrderedDict()
+        self.am = OrderedDict()
+
+    def __len__(self):
+        """Returns the number of keys in a1in and am."""
+        return len(self.a1in) + len(self.am)
+
+    def access(self,key):
+        """Moves key to the most recent end of am if it is there."""
+
+        # A hit in a1in does not count as a second use, as it may be
+        # part of the same burst of uses as the first.
+
+        if key in self.am:
+            self.am.move_to_end(key)
+
+    def add(self,key):
+        """Puts key in am if it is a ghost in a1out, and otherwise in 
+        a1in, first evicting a key if the policy is full."""
+        evicted = []
+        if len(self) >= self.maxsize:
+            evicted.append(self.evict())
+        if key in self.a1out:
+            del self.a1out[key]
+            self.am[key] = None
+        else:
+            self.a1in[key] = None
+        return evicted
+
+    def _evict(self):
+        """Removes and returns the oldest key of a1in, remembering it in
+        a1out, if a1in is over its target size or am is empty. Otherwise
+        removes and returns the least recent key of am."""
+        kin, kout = max(1,len(self)//4), max(1,len(self)//2)
+        if len(self.a1in) > kin or not self.am:
+            key, _ = self.a1in.popitem(last=False)
+            self.a1out[key] = None
+            while len(self.a1out) > kout:
+                self.a1out.popitem(last=False)
+        else:
+            key, _ = self.am.popitem(last=False)
+        return key
+
+    def remove(self,key):
+        """Removes key from am or a1in, without remembering it."""
+        if key in self.am:
+            del self.am[key]
+        else:
+            del self.a1in[key]
+
+    def _keys(self):
+        """Yields the keys of am, then a1in, most recent first."""
+        yield from reversed(self.am)
+        yield from reversed(self.a1in)
+
+# ARC (Megiddo and Modha, 2003) keeps two LRU lists: T1 for keys used once
+# recently, and T2 for keys used at least twice. Each has a ghost list, B1
+# and B2, of keys recently evicted from it. The split of the cache between T1
+# and T2 adapts: a miss on a key in B1 means T1 was too small, so the target
+# size p of T1 grows, and a miss on a key in B2 shrinks it. Evictions then
+# come from T1 when it is bigger than p, and from T2 otherwise. The two ghost
+# lists together never remember more than maxsize keys, and when a key is
+# evicted for some other reason, such as weight, no more than the keys held.
+
+class ARCPolicy(EvictionPolicy):
+    """Evicts with the Adaptive Replacement Cache algorithm.
+
+    Attributes:
+        maxsize: An int. The most keys the policy keeps.
+        t1, t2: OrderedDicts of kept keys, least recent first.
+        b1, b2: OrderedDicts of ghost keys, least recent first.
+        p: A float. The target size of t1.
+    """
+
+    def __init__(self,maxsize):
+        """Inits an empty ARCPolicy."""
+        super(ARCPolicy,self).__init__(maxsize)
+        self.t1, self.t2 = OrderedDict(), OrderedDict()
+        self.b1, self.b2 = OrderedDict(), OrderedDict()
+        self.p = 0
+
+    def __len__(self):
+        """Returns the number of keys in t1 and t2."""
+        return len(self.t1) + len(self.t2)
+
+    def access(self,key):
+        """Moves key to the most recent end of t2."""
+        if key in self.t1:
+            del self.t1[key]
+            self.t2[key] = None
+        else:
+            self.t2.move_to_end(key)
+
+    def add(self,key):
+        """Puts key in t2 if it is a ghost in b1 or b2, adapting p, and 
+        otherwise in t1, first making room as ARC prescribes."""
+        evicted = []
+        c = self.maxsize
+        if key in self.b1:
+            self.p = min(c,self.p+max(len(self.b2)/len(self.b1),1))
+            del self.b1[key]
+            if len(self) >= c:
+                evicted.append(self._replace(False))
+            self.t2[key] = None
+        elif key in self.b2:
+            self.p = max(0,self.p-max(len(self.b1)/len(self.b2),1))
+            del self.b2[key]
+            if len(self) >= c:
+                evicted.append(self._replace(True))
+            self.t2[key] = None
+        else:
+            if len(self.t1) + len(self.b1) >= c:
+                if len(self.t1) < c:
+                    self.b1.popitem(last=False)
+                    if len(self) >= c:
+                        evicted.append(self._replace(False))
+                else:
+                    evicted.append(self.t1.popitem(last=False)[0])
+            else:
+                ghosts = len(self.b1) + len(self.b2)
+                if len(self) + ghosts >= 2*c and self.b2:
+                    self.b2.popitem(last=False)
+                if len(self) >= c:
+                    evicted.append(self._replace(False))
+            self.t1[key] = None
+        return evicted
+
+    def _evict(self):
+        """Removes and returns a key as _replace() picks it, forgetting
+        the oldest ghosts while there are more than kept keys."""
+        key = self._replace(False)
+        while len(self.b1) + len(self.b2) > max(1,len(self)):
+            ghosts = self.b1 if len(self.b1) >= len(self.b2) else self.b2
+            ghosts.popitem(last=False)
+        return key
+
+    def remove(self,key):
+        """Removes key from t1 or t2, without remembering it."""
+        if key in self.t1:
+            del self.t1[key]
+        else:
+            del self.t2[key]
+
+    def _replace(self,in_b2):
+        """Moves the least recent key of t1 or t2 to its ghost list,
+        and returns the key. in_b2 is True iff the key being added was
+        found in b2."""
+        if self.t1 and (len(self.t1) > self.p or
+                        (in_b2 and len(self.t1) == self.p) or not self.t2):
+            key, _ = self.t1.popitem(last=False)
+            self.b1[key] = None
+        else:
+            key, _ = self.t2.popitem(last=False)
+            self.b2[key] = None
+        return key
+
+    def _keys(self):
+        """Yields the keys of t2, then t1, most recent first."""
+        yield from reversed(self.t2)
+        yield from reversed(self.t1)
+
+# W-TinyLFU (Einziger, Friedman, and Manes, 2017) adds an admission filter in
+# front of the cache. New keys enter a small LRU "window" (1% of the cache).
+# When a key leaves the window, it only takes a place in the main cache if it
+# has been used more often than the key that the main cache would evict for
+# it; otherwise it is the one evicted. Use counts come from a count-min sketch
+# (below), which estimates counts for far more keys than the cache holds in a
+# few bytes per key, and halves every count periodically so that old
+# popularity fades. The main cache is a "segmented" LRU: keys arrive in a
+# probation segment, and move to a protected segment (80% of the main cache)
+# when they are used again there. Counts are recorded on every hit and every
+# add, so a key that keeps being requested and rejected will get in. The 
+# parts are sized as fractions of maxsize, so when maxsize is a weight they
+# are never filled, every key is admitted, and the cache's evictions for
+# weight come from probation: W-TinyLFU then acts as a segmented LRU.
+
+# A count-min sketch keeps DEPTH rows of WIDTH small counters. Each row hashes
+# a key to one of its counters, and adding to a key increments its counter in
+# every row. Other keys may share a counter, which can only inflate it, so the
+# smallest of a key's counters is the best estimate of its count. Counters
+# stop at 15, which is plenty to compare popularity, so each fits in a byte.
+# The sketch wants about one counter per row for each key the cache holds. As
+# with LRU, at most PREALLOCATE are made up front, and the width doubles (with
+# all counts reset) whenever the policy holds more keys than that.
+# Rather than hashing the key once per row, I hash it once and multiply the
+# hash by a different large odd constant for each row, keeping the high bits
+# of the 64-bit product. This scatters even consecutive int keys, whose hashes
+# are the ints themselves.
+
+class CountMinSketch:
+    """Estimates how many times each key has been added, with counts
+    that decay.
+
+    Attributes:
+        width: An int. The number of counters per row.
+        table: An array of DEPTH*width byte counters.
+        additions: An int. Additions since the counts were last halved.
+        sample_size: An int. The number of additions between halvings.
+    """
+
+    DEPTH = 4
+    MAX_COUNT = 15
+    MULTIPLIERS = (0x9E3779B97F4A7C15,0xC2B2AE3D27D4EB4F,
+                   0x165667B19E3779F9,0xD6E8FEB86659FD93)
+    MASK = (1 << 64) - 1
+
+    def __init__(self,width):
+        """Inits a CountMinSketch with all counts at 0."""
+        self.resize(width)
+
+    def resize(self,width):
+        """Sets the number of counters per row to width, and all counts
+        to 0. Counts are halved every 10*width additions."""
+        self.width = width
+        self.table = array("B",bytes(self.DEPTH*width))
+        self.additions = 0
+        self.sample_size = 10*width
+
+    def add(self,key):
+        """Increments the count of key, halving all counts every
+        sample_size additions."""
+        for i in self._indices(key):
+            if self.table[i] < self.MAX_COUNT:
+                self.table[i] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.table = array("B",(count >> 1 for count in self.table))
+            self.additions = 0
+
+    def estimate(self,key):
+        """Returns an estimate of the count of key as an int."""
+        return min(self.table[i] for i in self._indices(key))
+
+    def _indices(self,key):
+        """Returns the index of key's counter in each row."""
+        h = hash(key) & self.MASK
+        return [row*self.width + ((h*m & self.MASK) >> 32) % self.width
+                for row,m in enumerate(self.MULTIPLIERS)]
+
+class WTinyLFUPolicy(EvictionPolicy):
+    """Evicts with the W-TinyLFU admission policy.
+
+    Attributes:
+        maxsize: An int. The most keys the policy keeps.
+        window: An OrderedDict of new keys, least recent first.
+        probation, protected: OrderedDicts of the main cache's keys,
+          least recent first.
+        window_size, main_size, protected_size: Ints. The most keys
+          each part holds.
+        sketch: A CountMinSketch instance.
+    """
+
+    def __init__(self,maxsize):
+        """Inits an empty WTinyLFUPolicy."""
+        super(WTinyLFUPolicy,self).__init__(maxsize)
+        self.window = OrderedDict()
+        self.probation = OrderedDict()
+        self.protected = OrderedDict()
+        self.window_size = max(1,maxsize//100)
+        self.main_size = maxsize - self.window_size
+        self.protected_size = self.main_size * 4 // 5
+        self.sketch = CountMinSketch(max(16,min(maxsize,PREALLOCATE)))
+
+    def __len__(self):
+        """Returns the number of keys in the window and main cache."""
+        return len(self.window) + len(self.probation) + len(self.protected)
+
+    def access(self,key):
+        """Counts a use of key, and moves it to the most recent end of 
+        its segment, promoting it from probation to protected."""
+        self.sketch.add(key)
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.probation:
+            del self.probation[key]
+            self.protected[key] = None
+            if len(self.protected) > self.protected_size:
+                demoted, _ = self.protected.popitem(last=False)
+                self.probation[demoted] = None
+        else:
+            self.protected.move_to_end(key)
+
+    def add(self,key):
+        """Counts a use of key and puts it in the window. If the window 
+        overflows, its oldest key is admitted to the main cache or 
+        evicted, as described above."""
+        if len(self) >= self.sketch.width and self.sketch.width < self.maxsize:
+            self.sketch.resize(min(2*self.sketch.width,self.maxsize))
+        self.sketch.add(key)
+        self.window[key] = None
+        if len(self.window) <= self.window_size:
+            return []
+
+        # The window's oldest key is a candidate for the main cache,
+        # and must beat the main cache's victim if there is no room.
+
+        candidate, _ = self.window.popitem(last=False)
+        main = len(self.probation) + len(self.protected)
+        if main < self.main_size:
+            self.probation[candidate] = None
+            return []
+        if main == 0:
+            return [candidate]
+        victims = self.probation if self.probation else self.protected
+        victim = next(iter(victims))
+        if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+            del victims[victim]
+            self.probation[candidate] = None
+            return [victim]
+        return [candidate]
+
+    def _evict(self):
+        """Removes and returns the least recent key of probation, or of
+        protected, or of the window, whichever is first not empty."""
+        for part in (self.probation,self.protected,self.window):
+            if part:
+                return part.popitem(last=False)[0]
+
+    def remove(self,key):
+        """Removes key from whichever part holds it."""
+        for part in (self.window,self.probation,self.protected):
+            if key in part:
+                del part[key]
+                return
+
+    def _keys(self):
+        """Yields the keys of protected, probation, and the window, most
+        recent first."""
+        yield from reversed(self.protected)
+        yield from reversed(self.probation)
+        yield from reversed(self.window)
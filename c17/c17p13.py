@@ -119,9 +119,8 @@ def f1(doc,dictionary):
         A string.
     """
     trie = Trie()
-    for word in dictionary:
-        if len(word) > 0 and len(word) <= len(doc):
-            trie.insert(word.lower())
+    trie.insert_many(word.lower() for word in dictionary
+                     if len(word) > 0 and len(word) <= len(doc))
 
     # Both an empty string and a string of length one cannot be 
     # unconcatenated, so return a copy of that string.
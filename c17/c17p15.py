@@ -145,9 +145,7 @@ def f1(lst):
 def trie_from_list(lst):
     """Inserts words from a list into a trie and returns the trie."""
     trie = Trie()
-    for word in lst:
-        if len(word) > 0:
-            trie.insert(word.lower())
+    trie.insert_many(word.lower() for word in lst if len(word) > 0)
     return trie
  
 def word_made_of_others(word,trie):
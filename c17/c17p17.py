@@ -1,6 +1,14 @@
 import sys
 sys.path.append('..')
 from data_structs import Trie, DequeQueue
+from array import array
+from random import choice, randint
+from io import BytesIO
+import mmap
+import multiprocessing as mp
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
 
 # c17p17
 
@@ -129,9 +137,530 @@ def f1(b,T):
    
     return output
         
+# The O(B*L) bound above comes from advancing up to L trackers for every 
+# character of b. When T holds thousands of strings and b is a multi-gigabyte
+# log file, that factor of L hurts. The Aho-Corasick algorithm removes it by
+# keeping only ONE tracker, at the cost of some preprocessing on the trie.
+
+# The idea is that when the tracker cannot follow the next character of b, 
+# instead of giving up on it, we move it to the node for the LONGEST proper
+# suffix of its current path that is also a path in the trie, and try again 
+# from there. That node is the "failure link" of the current node. For 
+# example, with T = ["abcd","bce"] and b = "abce", the tracker at "abc" fails
+# on "e", falls back to "bc" (the longest suffix of "abc" in the trie), and 
+# then follows "e" to complete "bce". Every tracker that f1 would have kept
+# alive corresponds to some suffix of the single tracker's path, so nothing 
+# is missed.
+
+# A hit is reported whenever the tracker's node, or any node reachable from it
+# by failure links, marks the end of a word. To avoid walking the full chain 
+# of failure links at every step, each node also stores an "output link" to 
+# the nearest node along that chain that ends a word.
+
+# Failure and output links are computed once with a BFS over the trie, since 
+# the failure link of a node at depth d always points to a node at a lower 
+# depth. The links are kept in dictionaries keyed by TrieNode rather than as
+# new TrieNode attributes, so the trie class itself is unchanged. 
+
+# Following failure links never moves the tracker deeper than it was, and
+# each character of b moves it at most one level deeper, so the total number
+# of failure steps is at most B. The search therefore runs in O(B + H) time,
+# where H is the number of hits, after O(c(T)*A) preprocessing for an
+# alphabet of size A.
+
+# Because all of the search state is a single node, the search can also be 
+# paused after any character and resumed later, which allows a large input 
+# to be fed to the matcher in chunks without ever holding all of it. 
+
+class AhoCorasick:
+    """An Aho-Corasick automaton over a trie of search strings.
+    
+    Attributes:
+        trie: A Trie instance holding the non-empty strings to find.
+        fail: A dictionary mapping each TrieNode to its failure link.
+        out: A dictionary mapping each TrieNode to the nearest TrieNode
+          along its failure links that ends a word, or None.
+    """
+    
+    def __init__(self,T):
+        """Builds the automaton for a list of strings T in O(c(T)*A)
+        time. Empty strings in T are ignored."""
+        self.trie = Trie()
+        self.trie.insert_many(word for word in T if len(word) > 0)
+        
+        root = self.trie.root
+        self.fail = {root: root}
+        self.out = {root: None}
+        
+        queue = DequeQueue([root])
+        while not queue.is_empty():
+            node = queue.remove()
+            for char,child in node.children.items():
+            
+                # The failure link of child extends the failure link of
+                # its parent by char, if possible. Otherwise, keep 
+                # falling back until it can be extended or we hit root.
+            
+                if node is root:
+                    link = root
+                else:
+                    link = self.fail[node]
+                    while char not in link.children and link is not root:
+                        link = self.fail[link]
+                    link = link.children.get(char,root)
+                    
+                self.fail[child] = link
+                self.out[child] = link if link.is_end_of_word() \
+                                  else self.out[link]
+                queue.add(child)
+                
+    @property
+    def root(self):
+        """Returns the starting state, the root of the trie."""
+        return self.trie.root
+            
+    def step(self,node,char):
+        """Returns the state reached from node on reading char."""
+        while char not in node.children and node is not self.trie.root:
+            node = self.fail[node]
+        return node.children.get(char,self.trie.root)
+        
+    def lengths_at(self,node):
+        """Yields the lengths of all strings in T that end at the state
+        node, longest first."""
+        if node.is_end_of_word():
+            yield node.depth
+        node = self.out[node]
+        while node is not None:
+            yield node.depth
+            node = self.out[node]
+            
+    def search(self,b):
+        """Returns a list of (i1,i2) tuples as in f1 in O(B+H) time."""
+        output = []
+        node = self.trie.root
+        for i in range(len(b)):
+            node = self.step(node,b[i])
+            for length in self.lengths_at(node):
+                output.append((i-length+1,i))
+        return output
+        
+def f2(b,T):
+    """Aho-Corasick version of f1. Same arguments and return value."""
+    if len(T) == 0:
+        return []
+    return AhoCorasick(T).search(b)
+    
+class StreamMatcher:
+    """Searches text that arrives in chunks for the strings in T. Hits 
+    that straddle two chunks are found, and hit indices are relative to
+    the start of the first chunk. If the strings in T are bytes, chunks
+    must be bytes-like and are searched with a ByteAutomaton.
+    
+    Attributes:
+        automaton: An AhoCorasick or ByteAutomaton instance.
+        node: The automaton's current state.
+        offset: An int. The number of characters consumed so far.
+    """
+    
+    def __init__(self,T):
+        """Inits a StreamMatcher that has consumed no characters."""
+        self.automaton = build_automaton(T)
+        self.node = self.automaton.root
+        self.offset = 0
+        
+    def feed(self,chunk):
+        """Consumes a chunk and returns a list of (i1,i2) tuples for 
+        every hit that ends within the chunk."""
+        if isinstance(self.automaton,ByteAutomaton):
+            output, self.node = self.automaton.scan(chunk,self.node,
+                                                    self.offset)
+            self.offset += memoryview(chunk).nbytes
+            return output
+            
+        output = []
+        automaton, node, offset = self.automaton, self.node, self.offset
+        for char in chunk:
+            node = automaton.step(node,char)
+            for length in automaton.lengths_at(node):
+                output.append((offset-length+1,offset))
+            offset += 1
+        self.node, self.offset = node, offset
+        return output
+    
+# StreamMatcher still expects the caller to slice the input and to hand it 
+# chunks of the same type as the strings in T. The generator below accepts any
+# iterable of chunks, such as the output of read_chunks() over a file or an
+# mmap object, or recv_chunks() over a socket, and yields hits as it goes, so
+# memory use depends on the size of T and of one chunk, not on the input.
+
+# Data read from disk or from a socket arrives as bytes. Rather than decoding 
+# it (and having to handle multi-byte characters split across two chunks), 
+# search_stream() encodes the strings in T as UTF-8 and matches them byte by
+# byte. This works because a Trie accepts any sequence of hashable items, and
+# iterating over bytes yields ints. Hit indices are then byte offsets into the
+# input rather than character offsets. For ASCII input, the two are the same.
+
+CHUNK_SIZE = 1 << 16
+
+def read_chunks(f,size=CHUNK_SIZE):
+    """Generator. Yields successive reads of up to size characters or 
+    bytes from f, which may be a file (text or binary), an mmap object,
+    or a socket's makefile(), until it is exhausted."""
+    while True:
+        chunk = f.read(size)
+        if len(chunk) == 0:
+            return
+        yield chunk
+        
+def recv_chunks(sock,size=CHUNK_SIZE):
+    """Generator. Yields bytes received from a socket until the other 
+    side closes the connection."""
+    while True:
+        chunk = sock.recv(size)
+        if len(chunk) == 0:
+            return
+        yield chunk
+
+def search_stream(chunks,T):
+    """Searches a stream for every string in T.
+    
+    Args:
+        chunks: An iterable of strings, or of bytes-like objects. The 
+          type of the first chunk determines the type of the rest.
+        T: A list of strings (or of bytes). Empty strings are ignored.
+        
+    Yields:
+        Tuples (i1,i2) as in f1, with indices relative to the start of
+        the first chunk. Indices count characters for string chunks and
+        bytes for bytes-like chunks.
+        
+    Raises:
+        TypeError: The stream mixes strings and bytes-like chunks.
+    """
+    matcher = None
+    for chunk in chunks:
+        text_chunk = isinstance(chunk,str)
+        if matcher is None:
+            text_mode = text_chunk
+            matcher = StreamMatcher([as_text(word) if text_mode else
+                                     as_bytes(word) for word in T])
+        elif text_chunk != text_mode:
+            raise TypeError("Cannot mix strings and bytes in one stream.")
+        yield from matcher.feed(chunk)
+        
+def as_text(word):
+    """Returns word as a string, decoding it from UTF-8 if needed."""
+    return word if isinstance(word,str) else bytes(word).decode()
+    
+def as_bytes(word):
+    """Returns word as bytes, encoding it as UTF-8 if needed."""
+    return word.encode() if isinstance(word,str) else bytes(word)
+    
+# Matching bytes through an AhoCorasick instance still costs a dictionary 
+# lookup per byte, plus a loop over failure links whenever a lookup misses.
+# With an alphabet of only 256 symbols, we can instead precompute the state
+# reached from EVERY state on EVERY byte, folding the failure links into the
+# table. The automaton becomes a DFA stored as one flat array with 256 
+# entries per state, and the inner loop is a single array index per byte:
+#
+#     state = delta[state*256 + byte]
+#
+# The row for a state is a copy of the row for its failure link, with the 
+# entries for its own children overwritten. Failure links always point to 
+# shallower states, so filling rows in BFS order means every row is copied 
+# from one that is already complete, and building the table takes O(S*256) 
+# time and space for S states. Entries are stored as 2-byte ints when there
+# are at most 2^16 states, so a pattern set with 10,000 states needs about 
+# 5 MB.
+
+# The input is read through a memoryview, which works the same way for 
+# bytes, bytearrays, and mmap objects, so a memory-mapped file is searched 
+# in place without being copied or decoded.
+
+class ByteAutomaton:
+    """An Aho-Corasick automaton over bytes, compiled into a dense table
+    of transitions.
+    
+    Attributes:
+        delta: An array of ints. delta[s*256+c] is the state reached 
+          from state s on byte c. State 0 is the start state.
+        lengths: A list that holds, for each state, a tuple of the 
+          lengths of the patterns that end there (longest first), or 
+          None if there are none.
+    """
+    
+    def __init__(self,T):
+        """Compiles the automaton for a list of bytes (or strings, to be
+        encoded as UTF-8). Empty patterns are ignored."""
+        automaton = AhoCorasick([as_bytes(word) for word in T])
+        root = automaton.root
+        
+        order, index = [root], {root: 0}
+        queue = DequeQueue([root])
+        while not queue.is_empty():
+            for child in queue.remove().children.values():
+                index[child] = len(order)
+                order.append(child)
+                queue.add(child)
+                
+        typecode = "H" if len(order) <= 1 << 16 else "I"
+        self.delta = array(typecode,[0]) * (len(order) << 8)
+        for state,node in enumerate(order):
+            row = state << 8
+            if node is not root:
+                fail_row = index[automaton.fail[node]] << 8
+                self.delta[row:row+256] = self.delta[fail_row:fail_row+256]
+            for byte,child in node.children.items():
+                self.delta[row|byte] = index[child]
+                
+        self.lengths = [tuple(automaton.lengths_at(node)) or None 
+                        for node in order]
+                        
+    @property
+    def root(self):
+        """Returns the start state."""
+        return 0
+        
+    def scan(self,data,state=0,offset=0):
+        """Scans a bytes-like object, such as bytes or an mmap object.
+        
+        Args:
+            data: A bytes-like object.
+            state: An int. The state to start from.
+            offset: An int. The index of the first byte of data within
+              the whole input, added to every hit.
+        
+        Returns:
+            A list of (i1,i2) tuples as in f1, and the final state.
+        """
+        delta, lengths = self.delta, self.lengths
+        output = []
+        with memoryview(data) as view:
+            i = offset
+            for byte in view.cast("B"):
+                state = delta[(state << 8) | byte]
+                if lengths[state] is not None:
+                    for length in lengths[state]:
+                        output.append((i-length+1,i))
+                i += 1
+        return output, state
+        
+    def search(self,data):
+        """Returns a list of (i1,i2) tuples as in f1."""
+        return self.scan(data)[0]
+        
+def build_automaton(T):
+    """Returns a ByteAutomaton if any string in T is bytes-like, and an
+    AhoCorasick instance otherwise."""
+    if any(not isinstance(word,str) for word in T):
+        return ByteAutomaton(T)
+    return AhoCorasick(T)
+    
+# A single search uses one core no matter how large b is. To spread the work
+# over a pool of processes, b is cut into shards, one per worker. A hit that 
+# starts near the end of one shard may end in the next, so each worker also 
+# scans the first L-1 characters of the following shard, where L is the 
+# length of the longest string in T. A worker keeps only the hits that START 
+# within its own shard, so every hit is reported by exactly one worker, and
+# the merged output needs no de-duplication beyond that rule.
+
+# Building the automaton takes O(c(T)*A) time, which is wasted if every 
+# worker repeats it. Where the "fork" start method is available (Linux, and 
+# macOS on request), the parent builds the automaton and keeps it, along with
+# an in-memory b, in module globals before starting the pool. Forked workers
+# inherit both copy-on-write, so neither is pickled or rebuilt. Elsewhere,
+# each worker builds its own automaton once in an initializer. 
+
+# Input given as a path to a file is searched as bytes, as in search_stream().
+# Each worker memory-maps the file and reads only its own shard plus overlap,
+# so the parent never reads the file at all.
+
+_shared_automaton = None
+_shared_haystack = None
+
+def parallel_search(b_or_path,T,workers=None):
+    """Searches b, or the file at a path, for every string in T using a
+    pool of worker processes.
+    
+    Args:
+        b_or_path: A string or bytes-like object to search, or an 
+          os.PathLike (such as a pathlib.Path) to a file to search as
+          bytes. Plain strings are always treated as text to search.
+        T: A list of strings. Empty strings are ignored.
+        workers: An int number of processes. os.cpu_count() if None.
+        
+    Returns:
+        A list of tuples (i1,i2) ordered as in f1. Indices count bytes 
+        when searching a file or bytes-like object.
+    """
+    global _shared_automaton, _shared_haystack
+    
+    path = b_or_path if isinstance(b_or_path,os.PathLike) else None
+    text_mode = isinstance(b_or_path,str)
+    patterns = [as_text(word) if text_mode else as_bytes(word) 
+                for word in T if len(word) > 0]
+    if len(patterns) == 0:
+        return []
+        
+    n = os.path.getsize(path) if path else len(b_or_path)
+    if n == 0:
+        return []
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        if path is None:
+            return build_automaton(patterns).search(b_or_path)
+        return _search_file(ByteAutomaton(patterns),path,0,n)
+        
+    overlap = max(len(word) for word in patterns) - 1
+    shard = -(-n // workers)  # Ceiling division.
+    tasks = []
+    for start in range(0,n,shard):
+        end = min(n,start+shard)
+        tasks.append((start,end,min(n,end+overlap),path))
+        
+    if "fork" in mp.get_all_start_methods():
+        context = mp.get_context("fork")
+        _shared_automaton = build_automaton(patterns)
+        _shared_haystack = b_or_path if path is None else None
+        pool_args = {}
+    else:
+        context = mp.get_context()
+        pool_args = {"initializer": _init_worker, "initargs": (patterns,)}
+        if path is None:
+            tasks = [task + (_shard_text(b_or_path,task[0],task[2]),) 
+                     for task in tasks]
+        
+    try:
+        with context.Pool(workers,**pool_args) as pool:
+            shard_hits = pool.map(_search_shard,tasks)
+    finally:
+        _shared_automaton, _shared_haystack = None, None
+        
+    output = [hit for hits in shard_hits for hit in hits]
+    output.sort(key=lambda hit: (hit[1],hit[0]))
+    return output
+    
+def _shard_text(b,start,scan_end):
+    """Returns b[start:scan_end] as a str or bytes, which can be pickled
+    even when b is a memoryview or an mmap object."""
+    if isinstance(b,str):
+        return b[start:scan_end]
+    return bytes(b[start:scan_end])
+    
+def _init_worker(patterns):
+    """Pool initializer. Builds the automaton once per worker."""
+    global _shared_automaton
+    _shared_automaton = build_automaton(patterns)
+    
+def _search_shard(task):
+    """Searches one shard, plus overlap, of the input. Returns hits that
+    start within the shard, with indices relative to the whole input.
+    
+    Args:
+        task: A tuple (start,end,scan_end,path), where start and end 
+          bound the shard and scan_end bounds the overlap, optionally
+          followed by the text to scan when it could not be inherited.
+    """
+    start, end, scan_end, path = task[:4]
+    if len(task) > 4:
+        hits = _shared_automaton.search(task[4])
+    elif path is not None:
+        hits = _search_file(_shared_automaton,path,start,scan_end)
+    elif isinstance(_shared_haystack,str):
+        hits = _shared_automaton.search(_shared_haystack[start:scan_end])
+    else:
+        with memoryview(_shared_haystack) as view:
+            hits = _shared_automaton.search(view[start:scan_end])
+        
+    return [(i1+start,i2+start) for i1,i2 in hits if i1+start < end]
+    
+def _search_file(automaton,path,start,stop):
+    """Memory-maps the file at path and returns automaton's hits in bytes
+    start to stop, relative to start. mmap cannot map an empty file, so 
+    one that is empty, perhaps since its size was read, has no hits."""
+    with open(path,"rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return automaton.search(view[start:stop])
+    
+def brute(b,T):
+    """O(B*c(T)) brute-force search for testing, ordered like f1."""
+    output = []
+    lengths = sorted(set(len(word) for word in T if len(word) > 0),
+                     reverse=True)
+    words = set(T)
+    for i in range(len(b)):
+        for length in lengths:
+            if length <= i+1 and b[i-length+1:i+1] in words:
+                output.append((i-length+1,i))
+    return output
+    
+def test_random(trials):
+    """Tests f1, f2, and a StreamMatcher fed random chunk sizes against
+    brute() on random inputs over a small alphabet.
+    
+    Raises:
+        AssertionError: Some output differs from brute().
+    """
+    for _ in range(trials):
+        b = "".join(choice("abc") for _ in range(randint(0,60)))
+        T = ["".join(choice("abc") for _ in range(randint(0,5))) 
+             for _ in range(randint(0,8))]
+        expected = brute(b,T)
+        assert f1(b,T) == expected
+        assert f2(b,T) == expected
+        
+        matcher, streamed, i = StreamMatcher(T), [], 0
+        while i < len(b):
+            size = randint(1,7)
+            streamed.extend(matcher.feed(b[i:i+size]))
+            i += size
+        assert streamed == expected
+        
+        # The same input as a stream of bytes-like chunks, where byte
+        # offsets match character offsets as the input is ASCII.
+        
+        data, chunks, i = b.encode(), [], 0
+        while i < len(data):
+            size = randint(1,7)
+            chunks.append(memoryview(data)[i:i+size])
+            i += size
+        assert list(search_stream(chunks,T)) == expected
+        assert list(search_stream(read_chunks(BytesIO(data),5),T)) == \
+               expected
+        
+def test_parallel(trials):
+    """Tests parallel_search() against brute() on random strings, and 
+    on the same strings written to a temporary file.
+    
+    Raises:
+        AssertionError: Some output differs from brute().
+    """
+    with TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir,"haystack.txt")
+        for _ in range(trials):
+            b = "".join(choice("abc") for _ in range(randint(0,400)))
+            T = ["".join(choice("abc") for _ in range(randint(0,9))) 
+                 for _ in range(randint(0,8))]
+            workers = randint(1,5)
+            expected = brute(b,T)
+            
+            assert parallel_search(b,T,workers) == expected
+            path.write_text(b)
+            assert parallel_search(path,T,workers) == expected
+            
+        path.write_bytes(b"")
+        for workers in (1,3):
+            assert parallel_search(path,["ab"],workers) == []
+            assert parallel_search("",["ab"],workers) == []
+            assert parallel_search(memoryview(b""),["ab"],workers) == []
+    
 def test():
-    """Tests some sample inputs. Could also write a brute-force search
-    to check correctness more rigorously."""
+    """Tests some sample inputs. See test_random() for a more rigorous
+    check against a brute-force search."""
     bT_pairs = [("abcde",["a","ab","abc","abcd","abcde"]),
                 
                 ("abcde",["abcde","bcde","cde","de","e"]),
@@ -140,4 +669,5 @@ def test():
                 ["llama","llamas","type","animal","im"])]
                 
     for b,T in bT_pairs:
-        print(f1(b,T))
\ No newline at end of file
+        print(f1(b,T))
+        print(f2(b,T))
\ No newline at end of file
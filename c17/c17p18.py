@@ -1,6 +1,6 @@
 import sys
 sys.path.append('..')
-from data_structs import MinDictHeap
+from data_structs import MinIndexedDictHeap
 from random import shuffle, randint
 
 # c17p18
@@ -95,6 +95,10 @@ from random import shuffle, randint
 # while maintaining the heap property in O(logM) time. So total runtime is 
 # O(NlogM+M), with O(M) space needed for the dictheap. 
 
+# Since the dictheap here sees one replace_heap_key call per element of the 
+# longer list, I use the indexed version of the dictheap, which updates heap
+# keys in place without allocating a new object on every call.
+
 # When there are multiple shortest supersequences in the input, I assume that
 # returning only one is acceptable.
         
@@ -129,7 +133,7 @@ def f1(shorter,longer):
     # one ends, and the SHORTEST that ends there starts at the least 
     # recent of the most recent occurrences of elements in shorter.
     
-    bestsub = (recent_heap.peek().heap_key,start_i)
+    bestsub = (recent_heap.peek_heap_key(),start_i)
     
     for i in range(start_i+1,len(longer)):    
     
@@ -139,7 +143,7 @@ def f1(shorter,longer):
         # Store the least recent element in shorter before updating
         # the dictheap, which might change this value. 
         
-        least_recent_element = recent_heap.peek().element
+        least_recent_element = recent_heap.peek_element()
         recent_heap.replace_heap_key(longer[i],i)
         
         # New supersequence ending at i has a chance of being an
@@ -148,7 +152,7 @@ def f1(shorter,longer):
         
         if longer[i] == least_recent_element:  
             
-            least_recent_index = recent_heap.peek().heap_key
+            least_recent_index = recent_heap.peek_heap_key()
             if (i-least_recent_index) < (bestsub[1]-bestsub[0]):
                 bestsub = (least_recent_index,i) 
                 
@@ -168,7 +172,7 @@ def preprocess(shorter,longer):
         shorter, longer: Lists of objects that support equality tests.
         
     Returns:
-        An int, and a MinDictHeap instance.
+        An int, and a MinIndexedDictHeap instance.
     """
     
     # Update the indices for each element in shorter using a dictionary 
@@ -188,7 +192,10 @@ def preprocess(shorter,longer):
     
         i += 1
         
-    recent_heap = MinDictHeap()
+    # Every update moves an index to the bottom of the heap, so sifts are
+    # all the way down. A 4-ary heap halves the number of levels.
+    
+    recent_heap = MinIndexedDictHeap(4)
     for element,index in most_recent.items():
         recent_heap.push(element,index)
 
@@ -1,7 +1,14 @@
 import sys
 sys.path.append('..')
 from data_structs import MinHeap, MaxHeap
-from random import randint
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import count
+import json
+from math import ceil, floor
+from random import randint, random, lognormvariate
+from time import time
+import tracemalloc
 
 # c17p20
 
@@ -139,6 +146,62 @@ class MedianKeeper:
             takes_x.push(x)
             takes_m.push(self.mid)
             self.mid = None
+            
+    def insert_many(self,values):
+        """Inserts every number in values, a NumPy array or any sequence
+        of numbers, with vectorized operations. Takes O(M) time for the 
+        batch of M values plus O(NlogN) time in the worst case for the 
+        heaps, but only a few heap operations per batch when values are 
+        spread evenly around the median."""
+        import numpy as np
+        
+        # Fold mid into the batch so that the two heaps are the same size
+        # to begin with, and work out how big lower must end up. When 
+        # the total is odd, lower takes one extra value, which becomes mid.
+        
+        batch = np.asarray(values).ravel()
+        if self.mid is not None:
+            batch = np.append(batch,self.mid)
+            self.mid = None
+        if batch.size == 0:
+            return
+        total = 2*len(self.lower) + batch.size
+        target = (total+1) // 2
+        
+        # Split the batch at the current median.
+        
+        if self.lower.is_empty():
+            left, right = batch, batch[:0]
+        else:
+            goes_lower = batch <= self.median
+            left, right = batch[goes_lower], batch[~goes_lower]
+        
+        # One side now has more values than it should. The values that
+        # must cross over are the extreme ones on that side, which can 
+        # only be among the side's share of the batch and the same number
+        # of values popped from its heap. np.partition finds them in 
+        # O(M) time without sorting.
+        
+        excess = len(self.lower) + left.size - target
+        if excess > 0:
+            num_popped = min(excess,len(self.lower))
+            popped = [self.lower.pop() for _ in range(num_popped)]
+            pool = np.concatenate((left,popped)) if popped else left
+            split = pool.size - excess
+            pool = np.partition(pool,split)
+            left, right = pool[:split], np.concatenate((right,pool[split:]))
+        elif excess < 0:
+            num_popped = min(-excess,len(self.upper))
+            popped = [self.upper.pop() for _ in range(num_popped)]
+            pool = np.concatenate((right,popped)) if popped else right
+            split = -excess
+            pool = np.partition(pool,split-1)
+            left, right = np.concatenate((left,pool[:split])), pool[split:]
+        
+        self.lower.push_many(left.tolist())
+        self.upper.push_many(right.tolist())
+        if total % 2 == 1:
+            self.mid = self.lower.pop()
     
 # I test for correctness using an even more straightforward (and slow) 
 # solution than even the naive solution offered above: maintain a list of
@@ -173,6 +236,317 @@ class SlowMedianKeeper:
         self.array.append(x)
         self.array.sort()
         
+# The keepers above never forget a value, but rolling metrics such as the 
+# latency percentiles of the last W requests need the oldest value to drop out
+# of the window as each new one arrives. A heap cannot remove an arbitrary 
+# value cheaply, so the sliding keeper below uses "lazy deletion": an evicted
+# value is only marked as deleted, and is actually popped once it reaches the
+# top of its heap. Each heap's live count is tracked separately from its 
+# length so that the halves can be balanced on live values alone.
+
+# Values are stored as (value, seq) pairs, where seq is the order of arrival.
+# This makes every pair distinct, so an evicted pair belongs to the lower heap
+# iff it is no greater than the lower heap's (live) top. A deque of pairs in 
+# arrival order tells us which pair to evict next.
+
+# The same two heaps can track any quantile q, not just the median. With n 
+# values sorted as x[0..n-1], I use the linear interpolation that numpy uses
+# by default: for h = (n-1)*q, the quantile is x[floor(h)] plus the fraction 
+# h-floor(h) of the gap to x[floor(h)+1]. So the lower heap holds the lowest 
+# floor(h)+1 values, and the answer only depends on the two heap tops. For
+# q = 0.5 this is the same median as above.
+
+# Stale pairs can pile up below the tops of the heaps, so when the heaps hold
+# more than twice as many pairs as the window, they are rebuilt from the deque.
+# That happens at most once per W evictions, so every insert and eviction 
+# still takes amortized O(logW) time.
+
+class SlidingQuantileKeeper:
+    """Class that maintains the q-quantile of the most recent values 
+    inserted into it, up to a window size W. Insertion and eviction take
+    amortized O(logW) time, and returning the quantile takes amortized 
+    O(1) time. Requires O(W) space.
+    
+    Attributes:
+        window: An int. The maximum number of values kept.
+        q: A float between 0 and 1.
+        lower: A MaxHeap instance of (value,seq) pairs. Stores the 
+          lowest floor((n-1)*q)+1 live values.
+        upper: A MinHeap instance of (value,seq) pairs. Stores the rest.
+        lower_live, upper_live: Ints. The live pairs in each heap.
+        deleted: A set of the seqs of evicted pairs still in a heap.
+        recent: A deque of the live (value,seq) pairs, oldest first.
+        counter: An iterator of ints used for seqs.
+        quantile: A float when the keeper is non-empty, None otherwise.
+    """
+    
+    def __init__(self,window,q):
+        """Inits an empty SlidingQuantileKeeper.
+        
+        Raises:
+            ValueError: window is less than 1, or q is not in [0,1].
+        """
+        if window < 1:
+            raise ValueError(f"Window must be at least 1, not {window}.")
+        if not 0 <= q <= 1:
+            raise ValueError(f"Quantile must be between 0 and 1, not {q}.")
+        self.window = window
+        self.q = q
+        self.lower = MaxHeap()
+        self.upper = MinHeap()
+        self.lower_live = self.upper_live = 0
+        self.deleted = set()
+        self.recent = deque()
+        self.counter = count()
+        
+    def __len__(self):
+        return len(self.recent)
+        
+    @property
+    def quantile(self):
+        """Returns the q-quantile of the values in the window."""
+        if len(self) == 0:
+            return None
+        h = (len(self)-1) * self.q
+        frac = h - floor(h)
+        low = self.lower.peek()[0]
+        if frac == 0:
+            return float(low)
+        return low + frac*(self.upper.peek()[0]-low)
+        
+    def insert(self,x):
+        """Inserts x in amortized O(logW) time, first evicting the oldest
+        value if the window is full."""
+        if len(self) == self.window:
+            self.evict_oldest()
+        pair = (x,next(self.counter))
+        self.recent.append(pair)
+        if self.lower_live > 0 and pair < self.lower.peek():
+            self.lower.push(pair)
+            self.lower_live += 1
+        else:
+            self.upper.push(pair)
+            self.upper_live += 1
+        self._rebalance()
+        
+    def evict_oldest(self):
+        """Removes and returns the oldest value in amortized O(logW) time.
+        
+        Raises:
+            IndexError: keeper is empty.
+        """
+        if len(self) == 0:
+            raise IndexError("Cannot evict from empty keeper.")
+        pair = self.recent.popleft()
+        if pair <= self.lower.peek():
+            self.lower_live -= 1
+        else:
+            self.upper_live -= 1
+        self.deleted.add(pair[1])
+        self._prune(self.lower)
+        self._prune(self.upper)
+        self._rebalance()
+        if len(self.lower) + len(self.upper) > 2*self.window:
+            self._rebuild()
+        return pair[0]
+        
+    def _prune(self,heap):
+        """Pops deleted pairs off the top of heap."""
+        while not heap.is_empty() and heap.peek()[1] in self.deleted:
+            self.deleted.remove(heap.pop()[1])
+            
+    def _rebalance(self):
+        """Moves pairs between the heaps until the lower heap holds 
+        exactly the lowest floor((n-1)*q)+1 live values. Assumes that
+        neither heap has a deleted pair on top."""
+        target = floor((len(self)-1)*self.q) + 1 if len(self) > 0 else 0
+        while self.lower_live > target:
+            self.upper.push(self.lower.pop())
+            self.lower_live -= 1
+            self.upper_live += 1
+            self._prune(self.lower)
+        while self.lower_live < target:
+            self.lower.push(self.upper.pop())
+            self.lower_live += 1
+            self.upper_live -= 1
+            self._prune(self.upper)
+            
+    def _rebuild(self):
+        """Rebuilds both heaps from the live pairs in O(WlogW) time."""
+        self.lower, self.upper = MaxHeap(), MinHeap()
+        self.lower_live, self.upper_live = 0, len(self)
+        self.deleted.clear()
+        for pair in self.recent:
+            self.upper.push(pair)
+        self._rebalance()
+        
+class SlidingMedianKeeper(SlidingQuantileKeeper):
+    """A SlidingQuantileKeeper for the median. See base class for 
+    details.
+    
+    Attributes:
+        median: A float when the keeper is non-empty, None otherwise.
+    """
+    
+    def __init__(self,window):
+        """Inits an empty SlidingMedianKeeper."""
+        super(SlidingMedianKeeper,self).__init__(window,0.5)
+        
+    @property
+    def median(self):
+        """Returns the median of the values in the window."""
+        return self.quantile
+        
+# Both keepers above store every value, and for an unbounded stream, such as 
+# latency samples from a long-running server, O(N) memory is too much. If an
+# answer that is close to the median (by rank) is good enough, a "sketch" can
+# keep a bounded sample of the values instead. The keeper below is a KLL 
+# sketch (Karnin, Lang, and Liberty, 2016).
+
+# The sketch is a stack of "compactors", which are plain lists. Every value 
+# stored in the list at level h stands in for 2^h inserted values. New values
+# go to level 0. When a level fills up to its capacity, it is sorted and then
+# every other value (starting at a randomly chosen first or second value) is
+# moved up a level, where it stands in for twice as many values, while the 
+# rest are dropped. Pairs of neighbours in sorted order have nearly the same 
+# rank, so this loses little rank information, and the random start means the
+# errors cancel out on average. The top level has capacity k, and each level
+# below has 2/3 the capacity of the one above it, so the sketch never holds 
+# much more than 3k values no matter how many are inserted.
+
+# A sketch with capacity k answers quantile queries to within a rank error of
+# about 2.3/k of N, with high probability. I use the empirical fit to this 
+# error from the Apache DataSketches KLL implementation to pick k from the 
+# error target. Two sketches are merged by concatenating their levels and then
+# compacting as needed, so per-thread or per-process sketches can be combined.
+
+class KLLMedianKeeper:
+    """Class that maintains an approximate median of the numbers added 
+    to it in bounded memory. Each insertion takes amortized O(logk) 
+    time and returning the median takes O(klogk) time, where k grows 
+    with 1/error. Requires O(k) space.
+    
+    Attributes:
+        k: An int. The capacity of the top compactor.
+        compactors: A list of lists. compactors[h] holds values that 
+          each stand in for 2^h inserted values.
+        n: An int. The number of values inserted.
+        retained: An int. The number of values in all compactors.
+        median: A float when the keeper is non-empty, None otherwise.
+    """
+    
+    SHRINK = 2/3
+    MIN_CAPACITY = 2
+    
+    def __init__(self,error=0.01):
+        """Inits an empty KLLMedianKeeper with a target normalized rank
+        error between 0 and 1.
+        
+        Raises:
+            ValueError: error is not between 0 and 1.
+        """
+        if not 0 < error < 1:
+            raise ValueError(f"Error must be between 0 and 1, not {error}.")
+        self.k = max(8,ceil((2.296/error)**(1/0.9723)))
+        self.compactors = [[]]
+        self.n = 0
+        self.retained = 0
+        
+    def __len__(self):
+        return self.n
+        
+    @property
+    def median(self):
+        """Returns an approximate median of the inserted values."""
+        return self.quantile(0.5)
+        
+    def quantile(self,q):
+        """Returns the inserted value that is approximately at rank 
+        q*N as a float, or None if empty."""
+        if self.n == 0:
+            return None
+        weighted = sorted((x,1<<level) for level,compactor 
+                          in enumerate(self.compactors) for x in compactor)
+        target = q * self.n
+        rank = 0
+        for x,weight in weighted:
+            rank += weight
+            if rank >= target:
+                return float(x)
+        return float(weighted[-1][0])
+        
+    def insert(self,x):
+        """Inserts x in amortized O(logk) time."""
+        self.compactors[0].append(x)
+        self.n += 1
+        self.retained += 1
+        if self.retained >= self._max_retained():
+            self._compress()
+            
+    def merge(self,other):
+        """Adds all values summarized by another KLLMedianKeeper to this
+        one. other is left unchanged."""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level,compactor in enumerate(other.compactors):
+            self.compactors[level].extend(compactor)
+        self.n += other.n
+        self.retained += other.retained
+        while self.retained >= self._max_retained():
+            self._compress()
+            
+    def dumps(self):
+        """Returns the sketch as a JSON string. Values must be numbers."""
+        return json.dumps({"k": self.k, "n": self.n, 
+                           "compactors": self.compactors})
+        
+    @classmethod
+    def loads(cls,string):
+        """Returns a KLLMedianKeeper from a string made by dumps().
+        
+        Raises:
+            ValueError: string is not a serialized sketch.
+        """
+        try:
+            data = json.loads(string)
+            keeper = cls()
+            keeper.k = int(data["k"])
+            keeper.n = int(data["n"])
+            keeper.compactors = [list(compactor) for compactor 
+                                 in data["compactors"]] or [[]]
+        except (KeyError,TypeError) as e:
+            raise ValueError(f"Not a serialized sketch: {e!r}")
+        keeper.retained = sum(len(c) for c in keeper.compactors)
+        return keeper
+        
+    def _capacity(self,level):
+        """Returns the number of values the compactor at level may hold
+        before it is compacted."""
+        depth = len(self.compactors) - level - 1
+        return max(self.MIN_CAPACITY,ceil(self.k*self.SHRINK**depth))
+        
+    def _max_retained(self):
+        """Returns the total capacity of all compactors."""
+        return sum(self._capacity(h) for h in range(len(self.compactors)))
+        
+    def _compress(self):
+        """Compacts the lowest compactor that is full, adding a new top
+        level if needed. Assumes that some compactor is full."""
+        for level,compactor in enumerate(self.compactors):
+            if len(compactor) >= self._capacity(level):
+                if level+1 == len(self.compactors):
+                    self.compactors.append([])
+                    
+                # With an odd count, the lowest value stays behind.
+                
+                compactor.sort()
+                offset = len(compactor)%2 + randint(0,1)
+                promoted = compactor[offset::2]
+                self.compactors[level+1].extend(promoted)
+                del compactor[len(compactor)%2:]
+                self.retained -= len(promoted)
+                return
+                
 def test(n):
     """Inserts n random integers into both a MedianKeeper and a 
     SlowMedianKeeper instance, verifying at each insertion that both 
@@ -186,4 +560,127 @@ def test(n):
         val = randint(MIN_VAL,MAX_VAL)     
         slow_keeper.insert(val)
         fast_keeper.insert(val)
-        assert slow_keeper.median == fast_keeper.median
\ No newline at end of file
+        assert slow_keeper.median == fast_keeper.median
+
+def test_sliding(n,window,q):
+    """Inserts n random integers into a SlidingQuantileKeeper, sometimes
+    evicting early, and verifies the quantile against a sorted copy of 
+    the window at every step."""
+    MIN_VAL = 1
+    MAX_VAL = 1000
+    
+    keeper = SlidingQuantileKeeper(window,q)
+    values = deque()
+    
+    for _ in range(n):
+        if len(values) > 0 and random() < 0.2:
+            assert keeper.evict_oldest() == values.popleft()
+        else:
+            val = randint(MIN_VAL,MAX_VAL)
+            keeper.insert(val)
+            values.append(val)
+            if len(values) > window:
+                values.popleft()
+        
+        ordered = sorted(values)
+        h = (len(ordered)-1) * q
+        low = floor(h)
+        if len(ordered) == 0:
+            expected = None
+        elif h == low:
+            expected = float(ordered[low])
+        else:
+            expected = ordered[low] + (h-low)*(ordered[low+1]-ordered[low])
+        assert keeper.quantile == expected
+
+# The KLL keeper is approximate, so rather than asserting equality, I compare
+# it against the exact MedianKeeper on a stream of skewed, latency-like values
+# and report how far its median is from the true median in rank, and how much 
+# memory each keeper holds. The same stream is also split into parts whose 
+# sketches are merged, and one sketch is sent through dumps() and loads().
+
+def compare_sketch(n,error=0.01,parts=4):
+    """Prints the rank error and memory of KLLMedianKeeper against 
+    MedianKeeper over n random latency-like values."""
+    values = [lognormvariate(0,1) for _ in range(n)]
+    ordered = sorted(values)
+    
+    def rank_error(median):
+        """Returns the distance in normalized rank from the median."""
+        low = bisect_left(ordered,median)
+        high = bisect_right(ordered,median)
+        return max(0,low-n/2,n/2-high) / n
+        
+    def build(keeper_class,chunk):
+        """Returns a keeper holding chunk, and its traced memory."""
+        tracemalloc.start()
+        keeper = keeper_class()
+        for val in chunk:
+            keeper.insert(val)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return keeper, size
+    
+    exact, exact_size = build(MedianKeeper,values)
+    sketch, sketch_size = build(lambda: KLLMedianKeeper(error),values)
+    
+    merged = KLLMedianKeeper(error)
+    for i in range(parts):
+        merged.merge(build(lambda: KLLMedianKeeper(error),
+                           values[i*n//parts:(i+1)*n//parts])[0])
+    loaded = KLLMedianKeeper.loads(sketch.dumps())
+    assert loaded.median == sketch.median and len(merged) == n
+    
+    print(f"n={n}, error target={error}, k={sketch.k}")
+    print(f"  exact:  median {exact.median:.4f}, {exact_size} bytes, "
+          f"{n} values")
+    print(f"  sketch: median {sketch.median:.4f}, {sketch_size} bytes, "
+          f"{sketch.retained} values, rank error "
+          f"{rank_error(sketch.median):.4f}")
+    print(f"  merged: median {merged.median:.4f}, {merged.retained} values, "
+          f"rank error {rank_error(merged.median):.4f}")
+
+# insert_many() is checked the same way as insert(), with batches of random
+# sizes (including empty ones) that are sometimes all on one side of the 
+# current median, and timed against one insert() call per value.
+
+def test_many(n,max_batch):
+    """Inserts n random integers into both a MedianKeeper, in random 
+    batches through insert_many(), and a SlowMedianKeeper, verifying 
+    after each batch that both return the same value as median."""
+    import numpy as np
+    MIN_VAL = 1
+    MAX_VAL = 1000
+    
+    slow_keeper, fast_keeper = SlowMedianKeeper(), MedianKeeper()
+    
+    inserted = 0
+    while inserted < n:
+        size = randint(0,max_batch)
+        low, high = sorted(randint(MIN_VAL,MAX_VAL) for _ in range(2))
+        batch = np.random.randint(low,high+1,size=size)
+        fast_keeper.insert_many(batch)
+        for val in batch.tolist():
+            slow_keeper.insert(val)
+        inserted += size
+        assert slow_keeper.median == fast_keeper.median
+        
+def time_many(n=10**6):
+    """Prints the time to insert a batch of n random floats into a
+    MedianKeeper one at a time and with insert_many()."""
+    import numpy as np
+    batch = np.random.random(n)
+    
+    keeper = MedianKeeper()
+    start = time()
+    for val in batch.tolist():
+        keeper.insert(val)
+    one_at_a_time = time() - start
+    
+    batch_keeper = MedianKeeper()
+    start = time()
+    batch_keeper.insert_many(batch)
+    batched = time() - start
+    
+    assert keeper.median == batch_keeper.median
+    print(f"insert: {one_at_a_time:.3f}s, insert_many: {batched:.3f}s")
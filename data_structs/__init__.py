@@ -1,18 +1,34 @@
 from .singly import Singly
+from .singly import ArraySingly
 from .doubly import Doubly
+from .doubly import ArrayDoubly
+from .constants import NO_NODE
 
 from .stack import Stack
 from .queue import LinkedListQueue
 from .queue import DequeQueue
+from .queue import RingQueue
+from .queue import ConcurrentQueue
+from .queue import AsyncQueue
 
 from .heap import MinHeap
 from .heap import MaxHeap
 from .heap import MyMinHeap
 from .heap import MyMaxHeap
 
+from .pairingheap import MinPairingHeap
+from .pairingheap import MaxPairingHeap
+
 from .dictheap import MinDictHeap
 from .dictheap import MaxDictHeap
+from .dictheap import MinIndexedDictHeap
+from .dictheap import MaxIndexedDictHeap
 
 from .graph import Graph
 
-from .trie import Trie
\ No newline at end of file
+from .trie import Trie
+from .trie import CompactTrie
+
+from .dawg import DAWG
+
+from .mmaptrie import MappedTrie
\ No newline at end of file
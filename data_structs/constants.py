@@ -0,0 +1,10 @@
+# The structures that store their nodes in arrays (ArraySingly, ArrayDoubly,
+# CompactTrie, and MappedTrie) refer to nodes by int index, and use NO_NODE 
+# wherever an object-based structure would use None.
+
+NO_NODE = -1
+
+# CompactTrie and MappedTrie keep a byte (or int) of flags per node, and set
+# EOW_FLAG in it iff the path from the root to the node spells a word.
+
+EOW_FLAG = 1
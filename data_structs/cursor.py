@@ -0,0 +1,85 @@
+from collections.abc import Mapping
+from .constants import NO_NODE
+
+# CompactTrie and MappedTrie store their nodes as rows of arrays rather than
+# as objects, so code written against the Trie (c17p13, c17p15, c17p17...)
+# walks them through small cursor objects that support the same children /
+# is_end_of_word() / depth protocol as a TrieNode. Cursors are created on
+# demand and are not stored in the trie.
+
+# A cursor only needs three things from the trie it points into, so both
+# tries share the classes below by providing:
+#
+#   _find_child(node,code):  the row of node's child labeled with code point
+#                            code, or NO_NODE
+#   _is_end_of_word(node):   a Boolean
+#   _labels(node):           an iterable of the code points of node's children
+
+class TrieCursor:
+    """A cursor to one node of a CompactTrie or MappedTrie. Supports the
+    same walking protocol as a TrieNode.
+
+    Attributes:
+        trie: The trie instance that the cursor points into.
+        index: An int. The node's row in the trie.
+        depth: An int. The root has depth 0.
+    """
+
+    __slots__ = ("trie","index","depth")
+
+    def __init__(self,trie,index,depth):
+        """Inits a cursor to the node at index."""
+        self.trie = trie
+        self.index = index
+        self.depth = depth
+
+    def __eq__(self,other):
+        return (isinstance(other,TrieCursor) and
+                self.trie is other.trie and self.index == other.index)
+
+    def __hash__(self):
+        return hash((id(self.trie),self.index))
+
+    @property
+    def children(self):
+        """Returns a read-only mapping from characters to cursors."""
+        return CursorChildren(self)
+
+    def is_end_of_word(self):
+        """Returns a Boolean."""
+        return self.trie._is_end_of_word(self.index)
+
+class CursorChildren(Mapping):
+    """A read-only view of the children of the node under a cursor, so
+    that "char in node.children" and "node.children[char]" work as for
+    a TrieNode.
+
+    Attributes:
+        node: A TrieCursor instance.
+    """
+
+    __slots__ = ("node",)
+
+    def __init__(self,node):
+        """Inits a view over the children of node."""
+        self.node = node
+
+    def __contains__(self,char):
+        if not isinstance(char,str) or len(char) != 1:
+            return False
+        return self.node.trie._find_child(self.node.index,ord(char)) != NO_NODE
+
+    def __getitem__(self,char):
+        if not isinstance(char,str) or len(char) != 1:
+            raise KeyError(char)
+        child = self.node.trie._find_child(self.node.index,ord(char))
+        if child == NO_NODE:
+            raise KeyError(char)
+        return TrieCursor(self.node.trie,child,self.node.depth+1)
+
+    def __iter__(self):
+        for code in self.node.trie._labels(self.node.index):
+            yield chr(code)
+
+    def __len__(self):
+        return sum(1 for _ in self.node.trie._labels(self.node.index))
@@ -0,0 +1,159 @@
+from .mmaptrie import write_node_table
+
+# A DAWG ("directed acyclic word graph", also called a minimal acyclic finite
+# state automaton) stores the same set of words as a trie, but merges any two
+# nodes whose subtrees are identical. A trie already shares common PREFIXES
+# between words, and a DAWG also shares common SUFFIXES. In a trie built from
+# English words, every word ending in "-ing" or "-ness" has its own copy of
+# those final nodes, while in a DAWG all of them point to the same few nodes.
+
+# The catch is that a DAWG cannot be updated cheaply: inserting a word might
+# require "un-merging" nodes that it shares with other words. So the DAWG
+# below is read-only once built. Its nodes support the same walking protocol
+# as a TrieNode (a children dictionary and is_end_of_word()), so the search
+# code in c17p13 and c17p15 works on a DAWG without changes. A node does NOT
+# have a depth or parent, as it may be reached along many paths of different
+# lengths.
+
+# I build the DAWG with the incremental algorithm from Daciuk et al. (2000),
+# which requires the words to arrive in sorted order. Once a word has been
+# added, every node on the path of the PREVIOUS word that is not shared with
+# the current word can never gain another child, so that part of the path can
+# be minimized immediately by looking each node up in a "register" of nodes
+# already known to be unique. A node is equivalent to a registered node iff
+# both have the same end-of-word flag and the same children, and because
+# nodes are minimized bottom-up, "same children" can be checked by identity.
+# The whole build runs in O(c(W)) time, where c(W) is the total number of
+# characters in the words, and never holds more than one unminimized path.
+
+class DAWGNode:
+    """The individual node class for the DAWG. Nodes may be shared by
+    many paths, so should never be modified after the DAWG is built.
+
+    Attributes:
+        children: A dictionary that maps characters to DAWGNode
+          instances.
+        EOW: A Boolean. True iff any path from the DAWG's root to the
+          current DAWGNode represents a valid word.
+    """
+
+    __slots__ = ("children","EOW")
+
+    def __init__(self):
+        """Inits DAWGNode with no children."""
+        self.children = {}
+        self.EOW = False
+
+    def is_end_of_word(self):
+        """Returns a Boolean."""
+        return self.EOW
+
+    def signature(self):
+        """Returns a hashable value that is equal for two nodes iff
+        they are equivalent, assuming that all children are already
+        minimized."""
+        return (self.EOW,
+                tuple((char,id(child)) for char,child
+                      in sorted(self.children.items())))
+
+class DAWG:
+    """A read-only, minimized word graph that supports word lookup.
+    Treats as distinct all Unicode characters and thus is caps
+    sensitive.
+
+    Attributes:
+        root: A DAWGNode instance.
+        size: An int. The number of words stored in the DAWG.
+    """
+
+    def __init__(self):
+        """Inits an empty DAWG instance. Use from_sorted() to build a
+        DAWG that holds words."""
+        self.root = DAWGNode()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @classmethod
+    def from_sorted(cls,words):
+        """Builds and returns a DAWG from an iterable of strings in
+        non-decreasing order. Duplicates and empty strings are ignored.
+
+        Raises:
+            ValueError: words are not sorted.
+        """
+        dawg = cls()
+        register = {}
+        unchecked = []  # (parent,char,child) on the latest word's path.
+        previous = ""
+
+        for word in words:
+            if word < previous:
+                raise ValueError(f"Words not sorted: {word!r} after "
+                                 f"{previous!r}")
+            if word == previous or len(word) == 0:
+                continue
+
+            common = 0
+            limit = min(len(word),len(previous))
+            while common < limit and word[common] == previous[common]:
+                common += 1
+
+            # The previous word's path below the shared prefix is final.
+
+            dawg._minimize(unchecked,register,common)
+
+            node = unchecked[-1][2] if unchecked else dawg.root
+            for char in word[common:]:
+                child = DAWGNode()
+                node.children[char] = child
+                unchecked.append((node,char,child))
+                node = child
+            node.EOW = True
+            dawg.size += 1
+            previous = word
+
+        dawg._minimize(unchecked,register,0)
+        return dawg
+
+    @staticmethod
+    def _minimize(unchecked,register,down_to):
+        """Replaces each unchecked node deeper than down_to with an
+        equivalent registered node if one exists, or registers it."""
+        while len(unchecked) > down_to:
+            parent, char, child = unchecked.pop()
+            key = child.signature()
+            if key in register:
+                parent.children[char] = register[key]
+            else:
+                register[key] = child
+
+    def in_trie(self,word):
+        """Return True iff a word is in the DAWG. Mirrors the Trie
+        method of the same name, including lower-casing the word."""
+        if len(word) < 1:
+            return False
+        node = self.root
+        for char in word.lower():
+            node = node.children.get(char)
+            if node is None:
+                return False
+        return node.EOW
+
+    def save(self,path):
+        """Writes the DAWG to path in the same format as Trie.save(). 
+        Shared nodes are written once."""
+        write_node_table(self.root,self.size,path)
+
+    def node_count(self):
+        """Returns the number of distinct nodes, including the root, in
+        O(N) time."""
+        seen = {id(self.root)}
+        stack = [self.root]
+        while stack:
+            for child in stack.pop().children.values():
+                if id(child) not in seen:
+                    seen.add(id(child))
+                    stack.append(child)
+        return len(seen)
\ No newline at end of file
@@ -1,5 +1,6 @@
+import heapq as hq
 from .heap import MyHeap
-from operator import le, ge
+from operator import attrgetter, le, ge
 
 # A special data structure I designed for c17p18. 
 
@@ -61,30 +62,42 @@ class DictHeap(MyHeap):
     
     Attributes:
         array: A list. array[0] represents the top of the heap, and for
-          any item at index i, its two children (if they exist) are at 
-          indices 2*i+1 (left) and 2*i+2 (right). 
+          any item at index i, its children (if they exist) are at 
+          indices arity*i+1 through arity*i+arity. 
         cmp: A comparator function. By the heap property, holds True 
-          for every parent with respect to both of its children. <= 
+          for every parent with respect to all of its children. <= 
           for a MinHeap, and >= for a MaxHeap.
+        arity: An int. The maximum number of children of any item.
         element_to_index: A dictionary that maps element objects as 
           keys to the index in array where that element can be found.
     """
     
-    def __init__(self,cmp):
+    def __init__(self,cmp,arity=2):
         """Inits an empty dictheap."""
-        self.array = []
-        self.cmp = cmp
+        super(DictHeap,self).__init__(cmp,arity)
         self.element_to_index = {}
     
     def __contains__(self,lookup):
         """Returns True iff an element is stored somewhere in array."""
         return lookup in self.element_to_index
     
+    @classmethod
+    def heapify(cls,pairs,arity=2):
+        """Builds and returns a dictheap in O(N) time from a dict, or 
+        from an iterable of (element, heap_key) pairs. If an element 
+        appears more than once, its last heap_key is kept."""
+        heap = cls(arity)
+        for element,heap_key in dict(pairs).items():
+            heap._reassign_item_at(len(heap.array),element,heap_key)
+        heap._build()
+        return heap
+    
     def push(self,element,heap_key):
         """If element is not in dictheap, inserts a new DictHeapItem.
         Otherwise, updates the heap_key to the element.""" 
         if element in self:
             self.replace_heap_key(element,heap_key)
+            return
         
         self._reassign_item_at(len(self.array),element,heap_key)
         self._send_up_end_val()
@@ -98,29 +111,52 @@ class DictHeap(MyHeap):
         if self.is_empty():
             raise IndexError("Cannot remove value from empty heap.")
         elif len(self) == 1:
-            del self.element_to_index[self.array[0]]
+            del self.element_to_index[self.array[0].element]
             return self.array.pop()
     
         return_item = self.array[0]
         del self.element_to_index[return_item.element]
-        self._reassign_item_at(0,self.array.pop())
+        last_item = self.array.pop()
+        self._reassign_item_at(0,last_item.element,last_item.heap_key)
         self._send_down_top_val()
                 
         return return_item
+        
+    def pushpop(self,element,heap_key):
+        """Pushes element with heap_key, and then pops and returns the 
+        top DictHeapItem, more efficiently than a push followed by a 
+        pop."""
+        if element in self:
+            self.replace_heap_key(element,heap_key)
+            return self.pop()
+        
+        new_item = DictHeapItem(element,heap_key)
+        if self.is_empty() or self.cmp(new_item,self.array[0]):
+            return new_item
+        return_item = self.array[0]
+        del self.element_to_index[return_item.element]
+        self._reassign_item_at(0,element,heap_key)
+        self._send_down_top_val()
+        return return_item
 
-    def replace(self,element,index):
+    def replace(self,element,heap_key):
         """Replaces the top DictHeapItem of the heap with a new one, 
         and swaps this new value down to ensure that the heap property
-        holds.
+        holds. If element is already below the top, the top is popped
+        and element is given heap_key instead.
         
         Raises:
             IndexError: heap is empty.
         """
         if self.is_empty():
-            raise Exception("Cannot remove tuple from empty heap.")     
+            raise IndexError("Cannot remove value from empty heap.")     
+        elif self.element_to_index.get(element,0) != 0:
+            self.pop()
+            self.replace_heap_key(element,heap_key)
+            return
     
         del self.element_to_index[self.array[0].element]
-        self._reassign_item_at(0,element,index)
+        self._reassign_item_at(0,element,heap_key)
         self._send_down_top_val()
      
     def replace_heap_key(self,element,heap_key):
@@ -132,15 +168,76 @@ class DictHeap(MyHeap):
             KeyError: element is not in dictheap.
         """
         index = self.element_to_index[element]
+        old_item = self.array[index]
+        new_item = DictHeapItem(element,heap_key)
+        self.array[index] = new_item
         
-        if heap_key < self.array[index].heap_key:
-            self.array[index] = DictHeapItem(element,heap_key)
+        if self.cmp(new_item,old_item):
             self._send_up_val(index)
-        
-        elif heap_key > self.array[index].heap_key:
-            self.array[index] = DictHeapItem(element,heap_key)
+        else:
             self._send_down_val(index)
             
+    def nsmallest(self,k):
+        """Returns a sorted list of the k DictHeapItems with the 
+        smallest heap_keys without changing the heap. See MyHeap."""
+        if self.cmp is le:
+            return self._first_k(k)
+        return hq.nsmallest(k,self.array,key=attrgetter("heap_key"))
+        
+    def nlargest(self,k):
+        """Returns a list of the k DictHeapItems with the largest 
+        heap_keys, in decreasing order, without changing the heap. See
+        MyHeap."""
+        if self.cmp is ge:
+            return self._first_k(k)
+        return hq.nlargest(k,self.array,key=attrgetter("heap_key"))
+        
+    def merge(self,*heaps):
+        """Adds every element from each of the dictheaps in heaps into 
+        this one, leaving the other heaps unchanged. An element already
+        here takes its heap_key from the last heap that holds it. Takes
+        O(MlogN) or O(N+M) time, like MyHeap.merge()."""
+        incoming = {item.element: item.heap_key 
+                    for heap in heaps for item in heap.array}
+        total = len(self) + len(incoming)
+        if len(incoming) * total.bit_length() < total:
+            for element,heap_key in incoming.items():
+                self.push(element,heap_key)
+            return
+        for element,heap_key in incoming.items():
+            index = self.element_to_index.get(element,len(self.array))
+            self._reassign_item_at(index,element,heap_key)
+        self._build()
+        
+    def update(self,index,value):
+        """Not supported, since a dictheap is updated by element rather
+        than by index. Use push() or replace_heap_key() instead.
+        
+        Raises:
+            TypeError: always.
+        """
+        raise TypeError("Update dictheaps by element with replace_heap_key().")
+        
+    def remove(self,index):
+        """Removes and returns the DictHeapItem at index in array in
+        O(logN) time. The index of an element is element_to_index[element].
+        
+        Raises:
+            IndexError: index is not in the heap.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"No value at index {index} in heap.")
+        return_item = self.array[index]
+        del self.element_to_index[return_item.element]
+        last_item = self.array.pop()
+        if index < len(self):
+            self._reassign_item_at(index,last_item.element,last_item.heap_key)
+            if self.cmp(last_item,return_item):
+                self._send_up_val(index)
+            else:
+                self._send_down_val(index)
+        return return_item
+            
     def _swap(self,i1,i2):
         """Swaps two elements' positions in array, and the resulting
         indices in the dictionary. Overwrites bass class _swap method.
@@ -176,13 +273,245 @@ class DictHeap(MyHeap):
 class MinDictHeap(DictHeap):
     """A min dictheap. See base class for details."""
     
-    def __init__(self):
+    def __init__(self,arity=2):
         """Inits an empty MinDictHeap."""
-        super(MinDictHeap,self).__init__(le) 
+        super(MinDictHeap,self).__init__(le,arity) 
         
 class MaxDictHeap(DictHeap):
     """A max dictheap. See base class for details."""
     
-    def __init__(self):
+    def __init__(self,arity=2):
         """Inits an empty MaxDictHeap."""
-        super(MaxDictHeap,self).__init__(ge) 
\ No newline at end of file
+        super(MaxDictHeap,self).__init__(ge,arity) 
+
+# The dictheap above is convenient, but it allocates a new DictHeapItem on 
+# every push, replace, and replace_heap_key, and every comparison in a sift 
+# goes through a method call on DictHeapItem and then through operator.le or 
+# operator.ge. In c17p18, replace_heap_key is called once per element of the
+# longer list, so those costs dominate on long streams of updates.
+
+# The indexed dictheap below stores the same information with no per-item 
+# objects at all: two parallel lists, heap_keys and elements, hold the heap,
+# and element_to_index still maps each element to its position. Updating a
+# heap_key overwrites one list entry in place. Sifts move a "hole" rather than
+# swapping pairs of items, so each level costs one write per list instead of
+# two, and the comparisons are written inline as < or >, which is why the 
+# min and max versions each have their own pair of sift methods.
+# Like MyHeap, it takes an arity. Since replace_heap_key often moves an item
+# many levels, a wider heap with fewer levels tends to pay off here.
+
+# Because there are no DictHeapItems, peek() and pop() return (element, 
+# heap_key) tuples, and peek_element() and peek_heap_key() read the top 
+# without allocating anything.
+
+class IndexedDictHeap:
+    """The superclass for MinIndexedDictHeap and MaxIndexedDictHeap. 
+    Subclasses provide _sift_up and _sift_down.
+    
+    Attributes:
+        heap_keys: A list. heap_keys[0] is the top of the heap, and for
+          any item at index i, its children (if they exist) are at
+          indices arity*i+1 through arity*i+arity.
+        elements: A list. elements[i] is the element whose heap_key is
+          heap_keys[i].
+        element_to_index: A dictionary that maps element objects as 
+          keys to their index in elements and heap_keys.
+        arity: An int. The maximum number of children of any item.
+    """
+    
+    __slots__ = ("heap_keys","elements","element_to_index","arity")
+    
+    def __init__(self,arity=2):
+        """Inits an empty indexed dictheap.
+        
+        Raises:
+            ValueError: arity is less than 2.
+        """
+        if arity < 2:
+            raise ValueError(f"Heap arity must be at least 2, not {arity}.")
+        self.heap_keys = []
+        self.elements = []
+        self.element_to_index = {}
+        self.arity = arity
+        
+    def __len__(self):
+        return len(self.elements)
+        
+    def __contains__(self,lookup):
+        """Returns True iff an element is stored in the heap."""
+        return lookup in self.element_to_index
+        
+    def is_empty(self):
+        """Returns a Boolean."""
+        return len(self.elements) == 0
+        
+    def peek(self):
+        """Returns the top (element,heap_key) pair, or None if empty."""
+        if self.is_empty():
+            return None
+        return self.elements[0], self.heap_keys[0]
+        
+    def peek_element(self):
+        """Returns the top element. 
+        
+        Raises:
+            IndexError: heap is empty.
+        """
+        return self.elements[0]
+        
+    def peek_heap_key(self):
+        """Returns the heap_key of the top element.
+        
+        Raises:
+            IndexError: heap is empty.
+        """
+        return self.heap_keys[0]
+        
+    def push(self,element,heap_key):
+        """If element is not in the heap, inserts it with heap_key. 
+        Otherwise, updates the heap_key of the element."""
+        if element in self.element_to_index:
+            self.replace_heap_key(element,heap_key)
+            return
+            
+        self.element_to_index[element] = len(self.elements)
+        self.elements.append(element)
+        self.heap_keys.append(heap_key)
+        self._sift_up(len(self.elements)-1)
+        
+    def pop(self):
+        """Removes and returns the top (element,heap_key) pair.
+        
+        Raises:
+            IndexError: heap is empty.
+        """
+        if self.is_empty():
+            raise IndexError("Cannot remove value from empty heap.")
+            
+        top = self.elements[0], self.heap_keys[0]
+        del self.element_to_index[top[0]]
+        
+        element, heap_key = self.elements.pop(), self.heap_keys.pop()
+        if len(self.elements) > 0:
+            self.elements[0], self.heap_keys[0] = element, heap_key
+            self._sift_down(0)
+        return top
+        
+    def replace(self,element,heap_key):
+        """Replaces the top element with a new element and heap_key, 
+        and returns the old top (element,heap_key) pair. Assumes that 
+        element is not already in the heap.
+        
+        Raises:
+            IndexError: heap is empty.
+        """
+        if self.is_empty():
+            raise IndexError("Cannot remove value from empty heap.")
+            
+        top = self.elements[0], self.heap_keys[0]
+        del self.element_to_index[top[0]]
+        self.elements[0], self.heap_keys[0] = element, heap_key
+        self._sift_down(0)
+        return top
+        
+    def replace_heap_key(self,element,heap_key):
+        """Given an element assumed to be in the heap, assigns it a new
+        heap_key in place and sifts it as far as is required.
+        
+        Raises:
+            KeyError: element is not in the heap.
+        """
+        index = self.element_to_index[element]
+        self.heap_keys[index] = heap_key
+        self._sift_up(index)
+        self._sift_down(self.element_to_index[element])
+        
+class MinIndexedDictHeap(IndexedDictHeap):
+    """A min indexed dictheap. See base class for details."""
+    
+    __slots__ = ()
+    
+    def _sift_up(self,i):
+        """Moves the item at index i up until its parent's heap_key is 
+        not greater than its own."""
+        keys, elements = self.heap_keys, self.elements
+        lookup = self.element_to_index
+        key, element = keys[i], elements[i]
+        arity = self.arity
+        while i > 0:
+            parent = (i-1) // arity
+            if not key < keys[parent]:
+                break
+            keys[i] = keys[parent]
+            elements[i] = elements[parent]
+            lookup[elements[i]] = i
+            i = parent
+        keys[i], elements[i] = key, element
+        lookup[element] = i
+        
+    def _sift_down(self,i):
+        """Moves the item at index i down until neither child's heap_key
+        is less than its own."""
+        keys, elements = self.heap_keys, self.elements
+        lookup = self.element_to_index
+        key, element = keys[i], elements[i]
+        n, arity = len(keys), self.arity
+        child = arity*i + 1
+        while child < n:
+            for other in range(child+1,min(child+arity,n)):
+                if keys[other] < keys[child]:
+                    child = other
+            if not keys[child] < key:
+                break
+            keys[i] = keys[child]
+            elements[i] = elements[child]
+            lookup[elements[i]] = i
+            i = child
+            child = arity*i + 1
+        keys[i], elements[i] = key, element
+        lookup[element] = i
+        
+class MaxIndexedDictHeap(IndexedDictHeap):
+    """A max indexed dictheap. See base class for details."""
+    
+    __slots__ = ()
+    
+    def _sift_up(self,i):
+        """Moves the item at index i up until its parent's heap_key is 
+        not less than its own."""
+        keys, elements = self.heap_keys, self.elements
+        lookup = self.element_to_index
+        key, element = keys[i], elements[i]
+        arity = self.arity
+        while i > 0:
+            parent = (i-1) // arity
+            if not key > keys[parent]:
+                break
+            keys[i] = keys[parent]
+            elements[i] = elements[parent]
+            lookup[elements[i]] = i
+            i = parent
+        keys[i], elements[i] = key, element
+        lookup[element] = i
+        
+    def _sift_down(self,i):
+        """Moves the item at index i down until neither child's heap_key
+        is greater than its own."""
+        keys, elements = self.heap_keys, self.elements
+        lookup = self.element_to_index
+        key, element = keys[i], elements[i]
+        n, arity = len(keys), self.arity
+        child = arity*i + 1
+        while child < n:
+            for other in range(child+1,min(child+arity,n)):
+                if keys[other] > keys[child]:
+                    child = other
+            if not keys[child] > key:
+                break
+            keys[i] = keys[child]
+            elements[i] = elements[child]
+            lookup[elements[i]] = i
+            i = child
+            child = arity*i + 1
+        keys[i], elements[i] = key, element
+        lookup[element] = i
\ No newline at end of file
@@ -1,3 +1,6 @@
+from array import array
+from .constants import NO_NODE
+
 class Doubly:
     """Doubly linked list class with O(1) access to both head and tail.
     
@@ -10,6 +13,8 @@ class Doubly:
     class Node:
         """Building block class for doubly linked list."""
         
+        __slots__ = ("val","next","prev")
+        
         def __init__(self,value=None,next=None,prev=None):
             """Inits Node with optional next, prev nodes and value."""
             self.val = value
@@ -113,4 +118,152 @@ class Doubly:
             node.prev = None      
             node.next = self.head
             node.next.prev = node
-            self.head = node
\ No newline at end of file
+            self.head = node
+
+# ArrayDoubly stores the same list in parallel columns, as ArraySingly does 
+# (see singly.py), with a prev column as well as next. Free slots are chained
+# through next. Nodes are int indices, so move_to_head() and remove() take 
+# the index that insert_head() or insert_tail() returned. A list given a 
+# capacity it never exceeds, as in an LRU cache, never allocates after it is
+# created.
+
+class ArrayDoubly:
+    """Doubly linked list class stored in parallel arrays, with O(1) 
+    access to both head and tail. Nodes are int indices.
+    
+    Attributes:
+        vals: A list. vals[i] is the value at slot i.
+        next: An array of ints. next[i] is the slot after slot i, or 
+          the next free slot if slot i is free, or NO_NODE.
+        prev: An array of ints. prev[i] is the slot before slot i, or 
+          NO_NODE.
+        head: An int. The head slot, or NO_NODE.
+        tail: An int. The tail slot, or NO_NODE.
+        free: An int. The first free slot, or NO_NODE.
+        size: An int. Number of nodes in the list.
+    """
+    
+    def __init__(self,values=None,capacity=16):
+        """Inits empty ArrayDoubly by default, or loads with values.
+        
+        Args:
+            values: A list of initial values, inserted such that the 
+              values' order is maintained.
+            capacity: An int. The number of slots to preallocate.
+        """
+        self.vals = []
+        self.next = array("i")
+        self.prev = array("i")
+        self.head = self.tail = self.free = NO_NODE
+        self.size = 0
+        self._grow(max(1,capacity))
+        if values is not None:
+            for value in values:
+                self.insert_tail(value)
+                
+    def is_empty(self):
+        """Returns a Boolean."""
+        return self.head == NO_NODE
+        
+    def display(self):
+        """Prints the values from head to tail in O(N) time."""
+        if self.head == NO_NODE:
+            print("List is empty.")
+        else:
+            n = self.head
+            while n != NO_NODE:
+                print(self.vals[n], '<->', end=' ')
+                n = self.next[n]
+            print('|| ({0} items)'.format(self.size))
+            
+    def insert_head(self,value):
+        """Inserts value at the head in amortized O(1) time.
+        
+        Returns:
+            The new head's int index.
+        """
+        slot = self._take_slot(value)
+        self.prev[slot] = NO_NODE
+        self.next[slot] = self.head
+        if self.head != NO_NODE:
+            self.prev[self.head] = slot
+        else:
+            self.tail = slot
+        self.head = slot
+        return slot
+        
+    def insert_tail(self,value):
+        """Inserts value at the tail in amortized O(1) time.
+        
+        Returns:
+            The new tail's int index.
+        """
+        slot = self._take_slot(value)
+        self.prev[slot] = self.tail
+        self.next[slot] = NO_NODE
+        if self.tail != NO_NODE:
+            self.next[self.tail] = slot
+        else:
+            self.head = slot
+        self.tail = slot
+        return slot
+        
+    def remove_tail(self):
+        """Removes the tail and returns the value there in O(1) time. If
+        list is empty, returns None."""
+        if self.tail == NO_NODE:
+            return None
+        return self.remove(self.tail)
+        
+    def remove(self,index):
+        """Removes the node at index and returns its value in O(1) time.
+        Assumes that index is in the list."""
+        self._unlink(index)
+        value = self.vals[index]
+        self.vals[index] = None
+        self.next[index] = self.free
+        self.free = index
+        self.size -= 1
+        return value
+        
+    def move_to_head(self,index):
+        """Moves the node at index to the head in O(1) time."""
+        if index == self.head:
+            return
+        self._unlink(index)
+        self.prev[index] = NO_NODE
+        self.next[index] = self.head
+        self.prev[self.head] = index
+        self.head = index
+        
+    def _unlink(self,index):
+        """Joins the neighbours of the node at index to each other."""
+        before, after = self.prev[index], self.next[index]
+        if before == NO_NODE:
+            self.head = after
+        else:
+            self.next[before] = after
+        if after == NO_NODE:
+            self.tail = before
+        else:
+            self.prev[after] = before
+            
+    def _take_slot(self,value):
+        """Takes a slot off the free list, growing if there is none, and
+        stores value there. Returns the slot."""
+        if self.free == NO_NODE:
+            self._grow(len(self.vals))
+        slot = self.free
+        self.free = self.next[slot]
+        self.vals[slot] = value
+        self.size += 1
+        return slot
+        
+    def _grow(self,extra):
+        """Adds extra free slots to the end of every column."""
+        start = len(self.vals)
+        self.vals.extend([None]*extra)
+        self.next.extend(range(start+1,start+extra+1))
+        self.next[-1] = self.free
+        self.prev.extend([NO_NODE]*extra)
+        self.free = start
@@ -1,4 +1,5 @@
 import heapq as hq
+from itertools import count
 from operator import le, ge
 
 # A heap can be implemented in Python using the heapq library, which can 
@@ -18,47 +19,141 @@ def heapq_examples():
 
 # I used the heapq library to implement a min-heap and max-heap class, making 
 # sure to include the replace method that performs the equivalent of a pop 
-# followed by a push, but more efficiently. To create a max-heap, I negate 
-# values before storing and returning them, which seems to be standard
-# practice given that the heapq library does not support the max-heap 
-# property. (Adapted from source: https://tinyurl.com/y9t8aqhu)
+# followed by a push, but more efficiently. (Adapted from source: 
+# https://tinyurl.com/y9t8aqhu)
+
+# A common way to get a max-heap out of heapq is to negate values before 
+# storing them and again when returning them. That only works for numbers and
+# allocates a new number on every push and pop, so MaxHeap instead uses the 
+# max-heap functions that heapq has always had for its own nlargest(). These
+# became public in Python 3.14 and are private before that, and heapq never 
+# had a private push, so I write one from its _siftdown_max helper.
+
+if hasattr(hq,"heappush_max"):
+    _heappush_max = hq.heappush_max
+    _heappop_max = hq.heappop_max
+    _heapreplace_max = hq.heapreplace_max
+    _heapify_max = hq.heapify_max
+else:
+    def _heappush_max(heap,item):
+        """Pushes item onto a max-heap list."""
+        heap.append(item)
+        hq._siftdown_max(heap,0,len(heap)-1)
+    _heappop_max = hq._heappop_max
+    _heapreplace_max = hq._heapreplace_max
+    _heapify_max = hq._heapify_max
+
+# Both classes take an optional key function, like sorted(). With a key, the
+# list holds (key(x), seq, x) entries, where seq comes from a counter, so x is
+# never compared and values with equal keys leave the heap in the order they
+# arrived. For the max-heap, seq counts down so that this order still holds.
+# Without a key, values are stored as they are, and can be anything orderable.
     
 class MinHeap:
-    def __init__(self): self.h = []
+    """A min-heap built on the heapq library.
+    
+    Attributes:
+        h: A list kept in heap order by heapq.
+        key: None, or a function of one argument that returns the 
+          value to order each item by.
+        counter: An iterator of ints used to break ties between keys.
+    """
+    
+    _push = staticmethod(hq.heappush)
+    _pop = staticmethod(hq.heappop)
+    _replace = staticmethod(hq.heapreplace)
+    _heapify = staticmethod(hq.heapify)
+    _step = 1
+    
+    def __init__(self,key=None):
+        """Inits an empty heap."""
+        self.h = []
+        self.key = key
+        self.counter = count(0,self._step)
+    
     def __len__(self): return len(self.h)
     def is_empty(self): return len(self) == 0
-    def peek(self): return self.h[0]
-    def push(self,x): hq.heappush(self.h,x)
-    def pop(self): return hq.heappop(self.h)
-    def replace(self,x): return hq.heapreplace(self.h,x)
+    def peek(self): return self._item(self.h[0])
+    def push(self,x): self._push(self.h,self._entry(x))
+    def pop(self): return self._item(self._pop(self.h))
+    def replace(self,x): return self._item(self._replace(self.h,self._entry(x)))
+    
+    def push_many(self,xs):
+        """Pushes every item in xs. Pushes items one at a time in 
+        O(MlogN) time when only a few are added, and otherwise rebuilds 
+        the whole heap in O(N+M) time."""
+        entries = [self._entry(x) for x in xs]
+        total = len(self.h) + len(entries)
+        if len(entries) * total.bit_length() < total:
+            for entry in entries:
+                self._push(self.h,entry)
+        else:
+            self.h.extend(entries)
+            self._heapify(self.h)
+    
+    def _entry(self,x):
+        """Returns what to store in h for item x."""
+        if self.key is None:
+            return x
+        return self.key(x), next(self.counter), x
+        
+    def _item(self,entry):
+        """Returns the item stored in an entry of h."""
+        return entry if self.key is None else entry[2]
 
 class MaxHeap(MinHeap):
-    @staticmethod
-    def neg(x): return -1*x
-    def peek(self): return self.neg(self.h[0])
-    def push(self,x): hq.heappush(self.h,self.neg(x))
-    def pop(self): return self.neg(hq.heappop(self.h))
-    def replace(self,x): return self.neg(hq.heapreplace(self.h,self.neg(x)))
+    """A max-heap built on the heapq library. See MinHeap for details."""
+    
+    _push = staticmethod(_heappush_max)
+    _pop = staticmethod(_heappop_max)
+    _replace = staticmethod(_heapreplace_max)
+    _heapify = staticmethod(_heapify_max)
+    _step = -1
     
 # I also implemented a heap without the heapq library using a Python list, 
 # making sure to implement not only push and pop, but replace as well.
 
+# Building a heap of N values with N calls to push() takes O(NlogN) time. A
+# faster way is to drop all N values into the array in any order and then 
+# call _send_down_val() on every index that has children, from the last such
+# index back to the root. Most values sit near the bottom of the heap, where 
+# they can only be sent down a level or two, so the total work is O(N). The
+# heapify() constructor and merge() both rely on this. 
+
+# The heap does not have to be binary. In a d-ary heap, every item has up to
+# d children, so the tree is only log_d(N) levels deep. Sending a value up 
+# costs one comparison per level and so gets cheaper as d grows, while sending
+# a value down costs d comparisons per level to find the strongest child. A
+# 4-ary heap is usually a good trade when values are pushed or moved up more
+# often than they are popped (as with decrease-key in shortest-path searches),
+# and its children sit next to each other in the array. The arity is a 
+# constructor argument, and 2 gives the usual binary heap.
+
 class MyHeap:
     """ The superclass for MyMinHeap and MyMaxHeap. 
     
     Attributes:
         array: A list. array[0] represents the top of the heap, and for
-          any item at index i, its two children (if they exist) are at 
-          indices 2*i+1 (left) and 2*i+2 (right). 
+          any item at index i, its children (if they exist) are at 
+          indices arity*i+1 through arity*i+arity. With the default 
+          arity of 2, these are 2*i+1 (left) and 2*i+2 (right).
         cmp: A comparator function. By the heap property, holds True 
-          for every parent with respect to both of its children. <= 
+          for every parent with respect to all of its children. <= 
           for a MinHeap, and >= for a MaxHeap.
+        arity: An int. The maximum number of children of any item.
     """
     
-    def __init__(self,cmp):
-        """Inits an empty heap."""
+    def __init__(self,cmp,arity=2):
+        """Inits an empty heap.
+        
+        Raises:
+            ValueError: arity is less than 2.
+        """
+        if arity < 2:
+            raise ValueError(f"Heap arity must be at least 2, not {arity}.")
         self.array = []
         self.cmp = cmp
+        self.arity = arity
     
     def __len__(self):
         return len(self.array)
@@ -104,6 +199,63 @@ class MyHeap:
         self._send_down_top_val()                
         return return_val
 
+    @classmethod
+    def heapify(cls,iterable,arity=2):
+        """Builds and returns a heap from the values in an iterable in 
+        O(N) time. Called on a subclass that takes only an arity, such
+        as MyMinHeap.heapify(values)."""
+        heap = cls(arity)
+        heap.array = list(iterable)
+        heap._build()
+        return heap
+        
+    def pushpop(self,value):
+        """Pushes value and then pops and returns the top value, more 
+        efficiently than a push followed by a pop."""
+        
+        # If value would end up on top, pushing and popping it is a 
+        # no-op. Otherwise, value takes the place of the top value.
+        
+        if self.is_empty() or self.cmp(value,self.array[0]):
+            return value
+        return_val = self.array[0]
+        self.array[0] = value
+        self._send_down_top_val()
+        return return_val
+        
+    def nsmallest(self,k):
+        """Returns a sorted list of the k smallest values (or all values
+        if there are fewer than k) without changing the heap. Takes 
+        O(klogk) time on a min-heap and O(Nlogk) time on a max-heap."""
+        if self.cmp is le:
+            return self._first_k(k)
+        return hq.nsmallest(k,self.array)
+        
+    def nlargest(self,k):
+        """Returns a list of the k largest values in decreasing order 
+        (or all values if there are fewer than k) without changing the 
+        heap. Takes O(klogk) time on a max-heap and O(Nlogk) time on a
+        min-heap."""
+        if self.cmp is ge:
+            return self._first_k(k)
+        return hq.nlargest(k,self.array)
+        
+    def merge(self,*heaps):
+        """Adds every value from each of heaps into this heap, leaving 
+        the other heaps unchanged. 
+        
+        Pushes values one at a time in O(MlogN) time when only a few 
+        are added, and otherwise rebuilds the whole heap in O(N+M) time.
+        """
+        incoming = [value for heap in heaps for value in heap.array]
+        total = len(self) + len(incoming)
+        if len(incoming) * total.bit_length() < total:
+            for value in incoming:
+                self.push(value)
+        else:
+            self.array.extend(incoming)
+            self._build()
+
     def replace(self,value):
         """Replaces the top value of the heap with value, and swaps 
         this new value down to ensure that the heap property holds.
@@ -118,13 +270,77 @@ class MyHeap:
         index = 0        
         self._send_down_top_val()
     
+    def update(self,index,value):
+        """Replaces the value at index in array with value in O(logN) 
+        time, moving it up (decrease-key on a min-heap) or down 
+        (increase-key) as far as is required.
+        
+        The heap does not track where values are, so the caller must 
+        know index, for example by searching array. To update values 
+        by key, see the DictHeaps in dictheap.py or the PairingHeaps in
+        pairingheap.py, which do track positions.
+        
+        Raises:
+            IndexError: index is not in the heap.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"No value at index {index} in heap.")
+        old_value = self.array[index]
+        self.array[index] = value
+        if self.cmp(value,old_value):
+            self._send_up_val(index)
+        else:
+            self._send_down_val(index)
+            
+    def remove(self,index):
+        """Removes and returns the value at index in array in O(logN)
+        time. See update().
+        
+        Raises:
+            IndexError: index is not in the heap.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"No value at index {index} in heap.")
+        return_val = self.array[index]
+        last_val = self.array.pop()
+        if index < len(self):
+            self.update(index,last_val)
+        return return_val
+        
+    def _build(self):
+        """Restores the heap property over the whole array in O(N) time
+        by sending down every value that has children, bottom-up."""
+        last_parent = self._get_parent(len(self.array)-1)
+        for index in range(last_parent,-1,-1):
+            self._send_down_val(index)
+            
+    def _first_k(self,k):
+        """Returns the first k values in heap order without changing the 
+        heap, in O(klogk) time.
+        
+        Only the root can be first, and the next value is always a child
+        of a value already taken, so a second heap holding the children
+        of taken values is enough to find each next value."""
+        output = []
+        if k < 1 or self.is_empty():
+            return output
+        frontier = MyHeap(self.cmp)
+        frontier.push((self.array[0],0))
+        while len(output) < k and not frontier.is_empty():
+            value, index = frontier.pop()
+            output.append(value)
+            for child_index in self._get_children(index):
+                if child_index < len(self):
+                    frontier.push((self.array[child_index],child_index))
+        return output
+    
     def _has_parent(self,index):
         """Returns True iff the item at index has a parent."""
         return index > 0
         
     def _get_parent(self,index):
         """Returns the index of the parent to the item at index.""" 
-        return (index+1)//2 - 1
+        return (index-1) // self.arity
         
     def _heap_property_holds(self,parent_index,child_index):
         """Returns a Boolean."""
@@ -135,32 +351,28 @@ class MyHeap:
         self.array[i1], self.array[i2] = self.array[i2], self.array[i1]
     
     def _has_left_child(self,index):
-        """Returns True iff index has a left child."""
-        return index*2+1 < len(self)
-     
-    def _has_right_child(self,index):
-        """Returns True iff index has a right child."""
-        return index*2+2 < len(self) 
+        """Returns True iff index has a left (first) child."""
+        return self._get_left_child(index) < len(self)
      
     def _get_left_child(self,index):
-        """Returns index where left child is expected."""
-        return index*2+1
+        """Returns index where left (first) child is expected."""
+        return index*self.arity + 1
         
     def _get_children(self,index):
-        """Returns indices where left and right children expected."""
+        """Returns a range of the indices where children are expected."""
         left_index = self._get_left_child(index)
-        right_index = left_index + 1
-        return left_index, right_index
+        return range(left_index,left_index+self.arity)
     
     def _get_contender(self,index):
         """Returns the index to the child that may legally become a 
-        parent to the other. Assumes that the item at index has both a
-        left and right child."""
-        left_index, right_index = self._get_children(index)
-        if self._heap_property_holds(left_index,right_index):
-            return left_index 
-        else:
-            return right_index
+        parent to all the others. Assumes that the item at index has at
+        least a left child."""
+        children = self._get_children(index)
+        contender_index = children[0]
+        for child_index in range(children[1],min(children[-1]+1,len(self))):
+            if not self._heap_property_holds(contender_index,child_index):
+                contender_index = child_index
+        return contender_index
     
     def _send_up_val(self,index):
         """Successively swaps the value at some index in heap to higher
@@ -187,10 +399,7 @@ class MyHeap:
             # Pick the "strongest" of available children to check that 
             # the heap property holds, and swap if necessary.
 
-            if self._has_right_child(index):                
-                contender_index = self._get_contender(index)
-            else:
-                contender_index = self._get_left_child(index)
+            contender_index = self._get_contender(index)
 
             if not self._heap_property_holds(index,contender_index):
                 self._swap(index,contender_index)
@@ -205,13 +414,13 @@ class MyHeap:
 class MyMinHeap(MyHeap):
     """A minheap from scratch. See base class for details."""
     
-    def __init__(self):
+    def __init__(self,arity=2):
         """Inits an empty MyMinHeap."""
-        super(MyMinHeap,self).__init__(le) 
+        super(MyMinHeap,self).__init__(le,arity) 
         
 class MyMaxHeap(MyHeap):
     """A maxheap from scratch. See base class for details."""
 
-    def __init__(self):
+    def __init__(self,arity=2):
         """Inits an empty MyMaxHeap."""
-        super(MyMaxHeap,self).__init__(ge)
\ No newline at end of file
+        super(MyMaxHeap,self).__init__(ge,arity)
\ No newline at end of file
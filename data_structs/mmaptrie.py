@@ -0,0 +1,182 @@
+from array import array
+import mmap
+import os
+import sys
+from .constants import EOW_FLAG, NO_NODE
+from .cursor import TrieCursor
+
+# Building a Trie from a large word list (see c17p15) takes seconds, and every
+# process that needs the trie has to pay that cost again. Instead, a trie can
+# be written to disk once as a flat table of unsigned 32-bit ints and then
+# memory-mapped by any number of processes. Lookups read the table directly
+# from the mapped buffer, so "loading" only costs an mmap call, and processes
+# that map the same file share one physical copy through the OS page cache.
+
+# The file layout, with every field a little-endian uint32:
+#
+#   header: MAGIC, VERSION, node_count, edge_count, word_count
+#   nodes:  node_count rows of (first_edge, num_edges, flags)
+#   edges:  edge_count rows of (label, child)
+#
+# Node 0 is the root. The edges of a node are stored contiguously starting at
+# row first_edge and are sorted by label (a character's code point), so a
+# child is found by binary search in O(logA) time for an alphabet of size A.
+# Because edges refer to children by index, the same format holds a DAWG, in
+# which several edges may lead to the same node.
+
+MAGIC = 0x45495254  # b"TRIE" when read as little-endian bytes.
+VERSION = 1
+HEADER_LEN = 5
+NODE_LEN = 3
+EDGE_LEN = 2
+
+def write_node_table(root,word_count,path):
+    """Writes the graph below root to path in the flat table format.
+
+    The file is written to a temporary path first and then moved into
+    place, so processes that have already mapped an older version of
+    the file keep a consistent view of it.
+
+    Args:
+        root: A node that supports the TrieNode walking protocol. Nodes
+          must be hashable, and equal iff they are the same node.
+        word_count: An int. The number of words below root.
+        path: A string path to the file to write.
+    """
+    nodes, edges = array("I"), array("I")
+    index = {root: 0}
+    order = [root]
+
+    # Visit nodes in breadth-first order, numbering each one the first
+    # time any edge leads to it.
+
+    i = 0
+    while i < len(order):
+        node = order[i]
+        i += 1
+        items = sorted(node.children.items())
+        flags = EOW_FLAG if node.is_end_of_word() else 0
+        nodes.extend((len(edges)//EDGE_LEN,len(items),flags))
+        for char,child in items:
+            if child not in index:
+                index[child] = len(order)
+                order.append(child)
+            edges.extend((ord(char),index[child]))
+
+    header = array("I",(MAGIC,VERSION,len(order),len(edges)//EDGE_LEN,
+                        word_count))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path,"wb") as f:
+        for table in (header,nodes,edges):
+            if sys.byteorder == "big":
+                table.byteswap()
+            table.tofile(f)
+    os.replace(tmp_path,path)
+
+class MappedTrie:
+    """A read-only trie (or DAWG) answered directly from a file written
+    by write_node_table(), without deserializing it. Treats as distinct
+    all Unicode characters and thus is caps sensitive.
+
+    Attributes:
+        table: A memoryview of uint32s over the mapped file.
+        node_base: An int. Offset in table of the first node row.
+        edge_base: An int. Offset in table of the first edge row.
+        size: An int. The number of words stored in the trie.
+    """
+
+    def __init__(self,path):
+        """Maps the file at path into memory.
+
+        Raises:
+            FileNotFoundError: path does not lead to a file.
+            ValueError: The file is not in the expected format, or the
+              host is big-endian.
+        """
+        if sys.byteorder == "big":
+            raise ValueError("Trie files can only be mapped on a "
+                             "little-endian host")
+        with open(path,"rb") as f:
+            self._mmap = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+        try:
+            self.table = memoryview(self._mmap).cast("I")
+        except TypeError:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a trie file")
+
+        if (len(self.table) < HEADER_LEN or self.table[0] != MAGIC or
+            self.table[1] != VERSION):
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} trie file")
+
+        node_count, edge_count, self.size = self.table[2:HEADER_LEN]
+        self.node_base = HEADER_LEN
+        self.edge_base = self.node_base + node_count*NODE_LEN
+
+        if len(self.table) != self.edge_base + edge_count*EDGE_LEN:
+            self.close()
+            raise ValueError(f"{path} is truncated")
+
+    def __len__(self):
+        return self.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc_info):
+        self.close()
+
+    def close(self):
+        """Releases the mapping. Cursors must not be used afterwards."""
+        self.table.release()
+        self._mmap.close()
+
+    @property
+    def root(self):
+        """Returns a TrieCursor to the root."""
+        return TrieCursor(self,0,0)
+
+    def in_trie(self,word):
+        """Return True iff a word is in the trie. Mirrors the Trie
+        method of the same name, including lower-casing the word."""
+        if len(word) < 1:
+            return False
+        node = 0
+        for char in word.lower():
+            node = self._find_child(node,ord(char))
+            if node == NO_NODE:
+                return False
+        return self._is_end_of_word(node)
+
+    def _edge_range(self,node):
+        """Returns the first edge row and number of edges of node."""
+        row = self.node_base + node*NODE_LEN
+        return self.table[row], self.table[row+1]
+
+    def _labels(self,node):
+        """Returns the code points of the children of node, in order."""
+        first, num = self._edge_range(node)
+        start = self.edge_base + first*EDGE_LEN
+        return self.table[start:start+num*EDGE_LEN:EDGE_LEN]
+
+    def _is_end_of_word(self,node):
+        """Returns a Boolean."""
+        return bool(self.table[self.node_base+node*NODE_LEN+2] & EOW_FLAG)
+
+    def _find_child(self,node,code):
+        """Binary searches the edges of node for label code. Returns
+        the child's row, or NO_NODE if there is no such child."""
+        table, edge_base = self.table, self.edge_base
+        lo, num = self._edge_range(node)
+        hi = lo + num
+        while lo < hi:
+            mid = (lo+hi) // 2
+            label = table[edge_base+mid*EDGE_LEN]
+            if label < code:
+                lo = mid + 1
+            elif label > code:
+                hi = mid
+            else:
+                return table[edge_base+mid*EDGE_LEN+1]
+        return NO_NODE
\ No newline at end of file
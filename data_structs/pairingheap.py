@@ -0,0 +1,199 @@
+from operator import le, ge
+
+# A pairing heap is a heap stored as a tree of nodes rather than in an array.
+# Each node keeps a list of its children (as a linked list of siblings), and
+# the only rule is that a parent is never "weaker" than any of its children.
+
+# Two heaps are "melded" in O(1) time by making the weaker root the first
+# child of the stronger one, and push() is just a meld with a one-node heap.
+# pop() removes the root and has to meld all of its children back into one
+# tree. Doing so in two passes, first melding the children in pairs from left
+# to right and then melding the pairs from right to left, keeps pop() at an
+# amortized O(logN) time. I do both passes with loops rather than recursion,
+# since a root can have O(N) children after a run of pushes.
+
+# What makes a pairing heap worth having is decrease-key. push() returns the
+# node that holds the value, and update() can later improve the value of that
+# node by cutting its subtree out of the tree and melding it with the root,
+# which takes O(1) time rather than the O(logN) sift of an array heap. This is
+# the operation that dominates shortest-path searches such as Dijkstra's.
+
+# To cut a node out in O(1) time, every node points to its previous sibling,
+# or to its parent if it is the first child.
+
+class PairingHeapNode:
+    """The individual node class for a pairing heap. Returned by push()
+    as a handle for update() and remove().
+
+    Attributes:
+        value: The stored value.
+        child: The first child PairingHeapNode, or None.
+        sibling: The next sibling PairingHeapNode, or None.
+        prev: The previous sibling PairingHeapNode, or the parent if
+          this is a first child, or None if this is a root.
+    """
+
+    __slots__ = ("value","child","sibling","prev")
+
+    def __init__(self,value):
+        """Inits a PairingHeapNode with no relatives."""
+        self.value = value
+        self.child = None
+        self.sibling = None
+        self.prev = None
+
+class PairingHeap:
+    """The superclass for MinPairingHeap and MaxPairingHeap. Supports
+    the same push, pop, replace, and peek as MyHeap.
+
+    Attributes:
+        root: The top PairingHeapNode, or None if empty.
+        size: An int. The number of values in the heap.
+        cmp: A comparator function. By the heap property, holds True
+          for every parent with respect to all of its children. <=
+          for a MinHeap, and >= for a MaxHeap.
+    """
+
+    def __init__(self,cmp):
+        """Inits an empty pairing heap."""
+        self.root = None
+        self.size = 0
+        self.cmp = cmp
+
+    def __len__(self):
+        return self.size
+
+    def is_empty(self):
+        """Returns a Boolean."""
+        return self.size == 0
+
+    def peek(self):
+        """Returns top value, or None if empty."""
+        if self.is_empty():
+            return None
+        return self.root.value
+
+    def push(self,value):
+        """Inserts a new value into the heap in O(1) time. Returns the
+        PairingHeapNode that holds it."""
+        node = PairingHeapNode(value)
+        self.root = node if self.root is None else self._meld(self.root,node)
+        self.size += 1
+        return node
+
+    def pop(self):
+        """Removes and returns the top value from the heap in amortized
+        O(logN) time.
+
+        Raises:
+            IndexError: heap is empty.
+        """
+        if self.is_empty():
+            raise IndexError("Cannot remove value from empty heap.")
+        top = self.root
+        self.root = self._combine(top.child)
+        top.child = None
+        self.size -= 1
+        return top.value
+
+    def replace(self,value):
+        """Pops the top value and pushes value. Returns the old top
+        value.
+
+        Raises:
+            IndexError: heap is empty.
+        """
+        return_val = self.pop()
+        self.push(value)
+        return return_val
+
+    def update(self,node,value):
+        """Assigns a new value to a node that is in the heap. Takes O(1)
+        time if the value does not get weaker (a decrease-key on a min
+        heap), and amortized O(logN) time otherwise."""
+        if self.cmp(value,node.value):
+            node.value = value
+            if node is not self.root:
+                self._cut(node)
+                self.root = self._meld(self.root,node)
+        else:
+            self._detach(node)
+            node.value = value
+            self.root = node if self.root is None else self._meld(self.root,node)
+
+    def remove(self,node):
+        """Removes a node that is in the heap and returns its value, in
+        amortized O(logN) time."""
+        self._detach(node)
+        self.size -= 1
+        return node.value
+
+    def _meld(self,a,b):
+        """Melds two root nodes with no siblings and returns the new
+        root."""
+        if self.cmp(a.value,b.value):
+            parent, child = a, b
+        else:
+            parent, child = b, a
+        child.sibling = parent.child
+        if child.sibling is not None:
+            child.sibling.prev = child
+        child.prev = parent
+        parent.child = child
+        return parent
+
+    def _combine(self,first):
+        """Melds a list of siblings starting at first into one tree with
+        the two-pass method, and returns its root (None if no siblings).
+        """
+        pairs = []
+        while first is not None:
+            a, b = first, first.sibling
+            a.prev = None
+            if b is None:
+                pairs.append(a)
+                break
+            first = b.sibling
+            a.sibling = b.sibling = b.prev = None
+            pairs.append(self._meld(a,b))
+
+        root = pairs.pop() if pairs else None
+        while pairs:
+            root = self._meld(pairs.pop(),root)
+        return root
+
+    def _cut(self,node):
+        """Cuts the subtree at a non-root node out of the tree."""
+        if node.prev.child is node:
+            node.prev.child = node.sibling
+        else:
+            node.prev.sibling = node.sibling
+        if node.sibling is not None:
+            node.sibling.prev = node.prev
+        node.prev = node.sibling = None
+
+    def _detach(self,node):
+        """Takes node alone out of the heap, melding its children back
+        in. Does not change size."""
+        if node is self.root:
+            self.root = self._combine(node.child)
+        else:
+            self._cut(node)
+            subtree = self._combine(node.child)
+            if subtree is not None:
+                self.root = self._meld(self.root,subtree)
+        node.child = None
+
+class MinPairingHeap(PairingHeap):
+    """A min pairing heap. See base class for details."""
+
+    def __init__(self):
+        """Inits an empty MinPairingHeap."""
+        super(MinPairingHeap,self).__init__(le)
+
+class MaxPairingHeap(PairingHeap):
+    """A max pairing heap. See base class for details."""
+
+    def __init__(self):
+        """Inits an empty MaxPairingHeap."""
+        super(MaxPairingHeap,self).__init__(ge)
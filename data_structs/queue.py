@@ -1,5 +1,7 @@
 from .doubly import Doubly
+import asyncio
 from collections import deque
+import threading
 
 class LinkedListQueue:
     """Queue implemented with my doubly linked list class.
@@ -80,4 +82,336 @@ class DequeQueue:
         
     def is_empty(self):
         """Returns a Boolean."""
-        return len(self.queue) == 0
\ No newline at end of file
+        return len(self.queue) == 0
+        
+# Both queues above grow without limit, and LinkedListQueue allocates a new
+# node on every add. When the most items that can ever be waiting is known 
+# ahead of time, as in a BFS where every edge adds at most one item, a ring 
+# buffer avoids both problems. RingQueue preallocates a list of capacity slots
+# and keeps the index of the oldest item (head) and the number of items. Items
+# are added at index (head+size) % capacity and removed from head, so both 
+# wrap around the end of the list, and no slots are ever allocated or freed.
+
+# When the queue is full, add() either raises an IndexError (the default) or,
+# with overwrite=True, drops the oldest item to make room, which suits a 
+# buffer of the most recent samples. add_many() and remove_many() copy items
+# in at most two slices, one on each side of the wrap-around point.
+
+class RingQueue:
+    """Bounded queue implemented with a preallocated Python list.
+    
+    Attributes:
+        buffer: A list of capacity slots. Empty slots hold None.
+        head: An int index in buffer of the least-recently added item.
+        size: An int. The number of items in the queue.
+        overwrite: A Boolean. If True, adding to a full queue drops the
+          least-recently added item. If False, raises an IndexError.
+    """
+    
+    def __init__(self,capacity,loads=None,overwrite=False):
+        """Inits an empty RingQueue. If loads is not None and non-empty,
+        loads items into queue such that the first item in loads is the
+        first that will be removed.
+        
+        Raises:
+            ValueError: capacity is less than 1.
+            IndexError: loads has more than capacity items and 
+              overwrite is False.
+        """
+        if capacity < 1:
+            raise ValueError(f"Capacity must be at least 1, not {capacity}.")
+        self.buffer = [None] * capacity
+        self.head = 0
+        self.size = 0
+        self.overwrite = overwrite
+        if loads is not None:
+            self.add_many(loads)
+            
+    def __len__(self):
+        return self.size
+        
+    @property
+    def capacity(self):
+        """Returns the maximum number of items as an int."""
+        return len(self.buffer)
+        
+    def add(self,item):
+        """Adds an item in O(1) time.
+        
+        Raises:
+            IndexError: queue is full and overwrite is False.
+        """
+        if self.size == len(self.buffer):
+            if not self.overwrite:
+                raise IndexError("Cannot add item to full queue.")
+            self.buffer[self.head] = item
+            self.head = (self.head+1) % len(self.buffer)
+            return
+        self.buffer[(self.head+self.size) % len(self.buffer)] = item
+        self.size += 1
+        
+    def remove(self):
+        """Removes and returns least-recently added item in O(1) time.
+        
+        Raises:
+            IndexError: queue is empty.
+        """
+        if self.size == 0:
+            raise IndexError("Cannot remove item from empty queue.")
+        item = self.buffer[self.head]
+        self.buffer[self.head] = None
+        self.head = (self.head+1) % len(self.buffer)
+        self.size -= 1
+        return item
+        
+    def peek(self):
+        """Returns least-recently added item in O(1) time.
+        
+        Raises:
+            IndexError: queue is empty.
+        """
+        if self.size == 0:
+            raise IndexError("Cannot peek into empty queue.")
+        return self.buffer[self.head]
+        
+    def is_empty(self):
+        """Returns a Boolean."""
+        return self.size == 0
+        
+    def add_many(self,items):
+        """Adds every item in items, in order, in O(M) time. Adds none 
+        of them if they do not all fit and overwrite is False.
+        
+        Raises:
+            IndexError: items do not fit and overwrite is False.
+        """
+        items = list(items)
+        capacity = len(self.buffer)
+        overflow = self.size + len(items) - capacity
+        if overflow > 0:
+            if not self.overwrite:
+                raise IndexError(f"Cannot add {len(items)} items to queue "
+                                 f"with {capacity-self.size} free slots.")
+                                 
+            # Only the newest capacity items survive. Dropping the 
+            # oldest items first leaves exactly enough free slots.
+            
+            if len(items) >= capacity:
+                self.clear()
+                items = items[-capacity:]
+            else:
+                self.remove_many(overflow)
+                
+        start = (self.head+self.size) % capacity
+        first = min(len(items),capacity-start)
+        self.buffer[start:start+first] = items[:first]
+        self.buffer[:len(items)-first] = items[first:]
+        self.size += len(items)
+        
+    def remove_many(self,k):
+        """Removes and returns a list of the k least-recently added 
+        items, oldest first, in O(k) time.
+        
+        Raises:
+            IndexError: queue has fewer than k items.
+        """
+        if k > self.size:
+            raise IndexError(f"Cannot remove {k} items from queue of "
+                             f"{self.size}.")
+        capacity = len(self.buffer)
+        first = min(k,capacity-self.head)
+        items = self.buffer[self.head:self.head+first]
+        items.extend(self.buffer[:k-first])
+        self.buffer[self.head:self.head+first] = [None] * first
+        self.buffer[:k-first] = [None] * (k-first)
+        self.head = (self.head+k) % capacity
+        self.size -= k
+        return items
+        
+    def clear(self):
+        """Removes all items in O(capacity) time."""
+        self.buffer[:] = [None] * len(self.buffer)
+        self.head = 0
+        self.size = 0
+
+# None of the queues above can be shared safely between threads, and a thread
+# that waits for an item by checking is_empty() in a loop burns CPU time the
+# way the first multithreaded FizzBuzz in c15p07 does. ConcurrentQueue guards
+# a deque with one lock and two condition variables on that lock: remove() 
+# sleeps on not_empty until some add() notifies it, and, when the queue has a
+# maxsize, add() sleeps on not_full until some remove() makes room. Both take
+# an optional timeout and raise TimeoutError if it runs out first.
+
+# AsyncQueue offers the same thing to coroutines on one asyncio event loop, 
+# with awaitable add() and remove(). A bounded AsyncQueue gives backpressure:
+# a producer that gets ahead of its consumers is suspended in add() until 
+# they catch up, rather than filling memory.
+
+# In both, peek(), is_empty(), and len() do not block, and their answers may
+# be out of date by the time the caller acts on them. The two share only the
+# deque and the conditions they wait for. AsyncQueue is not a subclass of 
+# ConcurrentQueue, because its add() and remove() return coroutines, so it 
+# cannot stand in for a ConcurrentQueue.
+
+class _WaitableDeque:
+    """The deque and wait conditions shared by ConcurrentQueue and 
+    AsyncQueue. Subclasses provide the lock and __len__.
+    
+    Attributes:
+        queue: A deque object. The least-recently added item is first.
+        maxsize: An int. The most items the queue holds, or 0 for no 
+          limit.
+    """
+    
+    def __init__(self,maxsize=0):
+        """Inits an empty deque."""
+        self.queue = deque()
+        self.maxsize = maxsize
+        
+    def is_empty(self):
+        """Returns a Boolean."""
+        return len(self) == 0
+        
+    def _has_items(self):
+        """Returns a Boolean. Assumes that lock is held."""
+        return len(self.queue) > 0
+        
+    def _has_room(self):
+        """Returns a Boolean. Assumes that lock is held."""
+        return self.maxsize <= 0 or len(self.queue) < self.maxsize
+
+class ConcurrentQueue(_WaitableDeque):
+    """Thread-safe queue implemented with a deque, a lock, and two 
+    condition variables.
+    
+    Attributes:
+        queue: A deque object. The least-recently added item is first.
+        maxsize: An int. The most items the queue holds, or 0 for no 
+          limit.
+        lock: A threading.Lock instance that guards queue.
+        not_empty, not_full: threading.Condition instances on lock.
+    """
+    
+    def __init__(self,maxsize=0):
+        """Inits an empty ConcurrentQueue."""
+        super(ConcurrentQueue,self).__init__(maxsize)
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        
+    def __len__(self):
+        with self.lock:
+            return len(self.queue)
+            
+    def add(self,item,timeout=None):
+        """Adds an item in O(1) time, first waiting up to timeout 
+        seconds (forever if None) for room if the queue is full.
+        
+        Raises:
+            TimeoutError: queue is still full after timeout seconds.
+        """
+        with self.not_full:
+            if not self.not_full.wait_for(self._has_room,timeout):
+                raise TimeoutError("Queue stayed full.")
+            self.queue.append(item)
+            self.not_empty.notify()
+            
+    def remove(self,timeout=None):
+        """Removes and returns least-recently added item in O(1) time, 
+        first waiting up to timeout seconds (forever if None) for an 
+        item if the queue is empty.
+        
+        Raises:
+            TimeoutError: queue is still empty after timeout seconds.
+        """
+        with self.not_empty:
+            if not self.not_empty.wait_for(self._has_items,timeout):
+                raise TimeoutError("Queue stayed empty.")
+            item = self.queue.popleft()
+            self.not_full.notify()
+            return item
+            
+    def peek(self):
+        """Returns least-recently added item in O(1) time.
+        
+        Raises:
+            IndexError: queue is empty.
+        """
+        with self.lock:
+            return self.queue[0]
+        
+class AsyncQueue(_WaitableDeque):
+    """Queue for coroutines on one asyncio event loop, implemented with
+    a deque, an asyncio lock, and two asyncio condition variables. See 
+    ConcurrentQueue for details.
+    
+    Attributes:
+        queue: A deque object. The least-recently added item is first.
+        maxsize: An int. The most items the queue holds, or 0 for no 
+          limit.
+        lock: An asyncio.Lock instance that guards queue.
+        not_empty, not_full: asyncio.Condition instances on lock.
+    """
+    
+    def __init__(self,maxsize=0):
+        """Inits an empty AsyncQueue."""
+        super(AsyncQueue,self).__init__(maxsize)
+        self.lock = asyncio.Lock()
+        self.not_empty = asyncio.Condition(self.lock)
+        self.not_full = asyncio.Condition(self.lock)
+        
+    def __len__(self):
+    
+        # Coroutines on the same loop never run at the same time, so 
+        # reading the deque needs no lock.
+        
+        return len(self.queue)
+        
+    async def add(self,item,timeout=None):
+        """Adds an item in O(1) time, first waiting up to timeout 
+        seconds (forever if None) for room if the queue is full.
+        
+        Raises:
+            TimeoutError: queue is still full after timeout seconds.
+        """
+        async with self.not_full:
+            await self._wait(self.not_full,self._has_room,timeout,
+                             "Queue stayed full.")
+            self.queue.append(item)
+            self.not_empty.notify()
+            
+    async def remove(self,timeout=None):
+        """Removes and returns least-recently added item in O(1) time, 
+        first waiting up to timeout seconds (forever if None) for an 
+        item if the queue is empty.
+        
+        Raises:
+            TimeoutError: queue is still empty after timeout seconds.
+        """
+        async with self.not_empty:
+            await self._wait(self.not_empty,self._has_items,timeout,
+                             "Queue stayed empty.")
+            item = self.queue.popleft()
+            self.not_full.notify()
+            return item
+            
+    def peek(self):
+        """Returns least-recently added item in O(1) time.
+        
+        Raises:
+            IndexError: queue is empty.
+        """
+        return self.queue[0]
+        
+    @staticmethod
+    async def _wait(condition,predicate,timeout,message):
+        """Waits on condition, whose lock is held, until predicate is 
+        true.
+        
+        Raises:
+            TimeoutError: predicate is still false after timeout seconds.
+        """
+        try:
+            await asyncio.wait_for(condition.wait_for(predicate),timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(message) from None
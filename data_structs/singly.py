@@ -1,3 +1,6 @@
+from array import array
+from .constants import NO_NODE
+
 class Singly:
     """Singly-linked list class with O(1) access to head.
     
@@ -9,6 +12,8 @@ class Singly:
     class Node:
         """Building block class for singly linked list."""
         
+        __slots__ = ("val","next")
+        
         def __init__(self,value=None,next=None):
             """Inits Node with optional next nodes and value."""
             self.val = value
@@ -112,4 +117,147 @@ class Singly:
                 self.size -= 1
                 return
             cur = cur.next
-        return
\ No newline at end of file
+        return
+
+# Every Node above is a separate Python object, which costs around 50 bytes
+# even with __slots__, and every insert and delete goes through the memory 
+# allocator. ArraySingly stores the same list in parallel columns instead: 
+# vals holds the values, and next holds, for each slot, the index of the next
+# slot in the list (or NO_NODE). Nodes are referred to by slot index rather 
+# than by object, at a cost of one list entry and one 4-byte int per value.
+
+# Slots that are not in use are chained together through the same next 
+# column, starting at free, so a deleted slot is reused by the next insert 
+# and nothing is allocated until every slot is full. Then all columns double 
+# in size. Keeping the tail's index also makes insert_tail O(1).
+
+class ArraySingly:
+    """Singly-linked list class stored in parallel arrays, with O(1) 
+    access to head and tail. Nodes are int indices.
+    
+    Attributes:
+        vals: A list. vals[i] is the value at slot i.
+        next: An array of ints. next[i] is the slot after slot i, or 
+          the next free slot if slot i is free, or NO_NODE.
+        head: An int. The head slot, or NO_NODE.
+        tail: An int. The tail slot, or NO_NODE.
+        free: An int. The first free slot, or NO_NODE.
+        size: An int. Number of nodes in the list.
+    """
+    
+    def __init__(self,values=None,capacity=16):
+        """Inits empty ArraySingly by default, or loads with values.
+        
+        Args:
+            values: A list of initial values, inserted such that the 
+              values' order is maintained.
+            capacity: An int. The number of slots to preallocate.
+        """
+        self.vals = []
+        self.next = array("i")
+        self.head = self.tail = self.free = NO_NODE
+        self.size = 0
+        self._grow(max(1,capacity))
+        if values is not None:
+            for value in values:
+                self.insert_tail(value)
+                
+    def display(self):
+        """Prints the values from head to tail in O(N) time."""
+        if self.head == NO_NODE:
+            print("List is empty.")
+        else:
+            n = self.head
+            while n != NO_NODE:
+                print(self.vals[n], '-->', end=' ')
+                n = self.next[n]
+            print('|| ({0} items)'.format(self.size))
+            
+    def is_empty(self):
+        """Returns a Boolean."""
+        return self.head == NO_NODE
+        
+    def insert_head(self,value):
+        """Inserts value at the head in amortized O(1) time.
+        
+        Returns:
+            The new head's int index.
+        """
+        slot = self._take_slot(value)
+        self.next[slot] = self.head
+        self.head = slot
+        if self.tail == NO_NODE:
+            self.tail = slot
+        return slot
+        
+    def insert_tail(self,value):
+        """Inserts value at the tail in amortized O(1) time.
+        
+        Returns:
+            The new tail's int index.
+        """
+        slot = self._take_slot(value)
+        self.next[slot] = NO_NODE
+        if self.tail == NO_NODE:
+            self.head = slot
+        else:
+            self.next[self.tail] = slot
+        self.tail = slot
+        return slot
+        
+    def remove_head(self):
+        """Removes the head and returns the value there in O(1) time. If
+        list is empty, returns None."""
+        if self.head == NO_NODE:
+            return None
+        slot = self.head
+        self.head = self.next[slot]
+        if self.head == NO_NODE:
+            self.tail = NO_NODE
+        return self._free_slot(slot)
+        
+    def delete_one(self,value):
+        """Deletes the node closest to the head of the list with a 
+        given value, and makes no change if no such node exists. Runs
+        in O(N) time worst case as it must traverse the entire list."""
+        prev, cur = NO_NODE, self.head
+        while cur != NO_NODE:
+            if self.vals[cur] == value:
+                after = self.next[cur]
+                if prev == NO_NODE:
+                    self.head = after
+                else:
+                    self.next[prev] = after
+                if cur == self.tail:
+                    self.tail = prev
+                self._free_slot(cur)
+                return
+            prev, cur = cur, self.next[cur]
+            
+    def _take_slot(self,value):
+        """Takes a slot off the free list, growing if there is none, and
+        stores value there. Returns the slot."""
+        if self.free == NO_NODE:
+            self._grow(len(self.vals))
+        slot = self.free
+        self.free = self.next[slot]
+        self.vals[slot] = value
+        self.size += 1
+        return slot
+        
+    def _free_slot(self,slot):
+        """Puts slot on the free list. Returns the value that was there."""
+        value = self.vals[slot]
+        self.vals[slot] = None
+        self.next[slot] = self.free
+        self.free = slot
+        self.size -= 1
+        return value
+        
+    def _grow(self,extra):
+        """Adds extra free slots to the end of every column."""
+        start = len(self.vals)
+        self.vals.extend([None]*extra)
+        self.next.extend(range(start+1,start+extra+1))
+        self.next[-1] = self.free
+        self.free = start
@@ -1,6 +1,17 @@
-# This trie implementation supports only word insertion and lookup. None of 
-# the algorithmic problems in which I used a trie required a deletion 
-# function, but there is no reason I cannot add to this in the future.
+from array import array
+from .constants import EOW_FLAG, NO_NODE
+from .cursor import TrieCursor
+from .heap import MinHeap
+from .dawg import DAWG
+from .mmaptrie import MappedTrie, write_node_table
+
+# This trie implementation began with only word insertion and lookup, as none
+# of the algorithmic problems in which I used a trie required a deletion 
+# function. A trie that serves a live dictionary, though, has to be able to 
+# retire words, or it grows without bound. Deleting a word unmarks its final
+# node and then follows the parent links back up, removing every node that no
+# longer leads to any word, so a deletion takes O(L) time and leaves the trie
+# exactly as if the word had never been inserted.
 
 # The below trie also supports any Unicode characters, as opposed to a smaller
 # set of characters such as lower-case letters, using a dictionary at each 
@@ -11,9 +22,26 @@
 
 # Unlike my binary tree implementation, the trie has a wrapper class with a  
 # root and size attribute. This really is not necessary, as I could have gone 
-# with only a node class that supports insert and lookup, but I chose to keep
-# only a top-level size attribute so that the trie would not store sizes for 
-# subtrees. (That could be useful in other situations.) 
+# with only a node class that supports insert and lookup, but I originally 
+# chose to keep only a top-level size attribute so that the trie would not 
+# store sizes for subtrees. 
+
+# Autocomplete-style queries turned out to be one of those "other situations"
+# where subtree sizes are useful. Every node now also stores the number of 
+# words in its subtree, so counting the words that start with a prefix takes 
+# O(P) time for a prefix of length P: walk to the prefix's node and read its
+# count. Keeping counts up to date costs one extra walk back up the parent 
+# links whenever a NEW word is inserted.
+
+# Words may also carry a numeric weight (0 by default), and each node stores 
+# the best weight anywhere in its subtree. top_k() then runs a best-first 
+# search from the prefix's node: a min-heap holds both whole words, keyed by 
+# their weights, and unexplored nodes, keyed by their subtree's best weight. 
+# A node's key is never better than the key of anything below it, so words 
+# come off the heap in order of decreasing weight, and subtrees whose best 
+# weight cannot make the top k are never visited. 
+
+NO_WEIGHT = float("-inf")
 
 class TrieNode:
     """The individual node class for the Trie.
@@ -26,14 +54,24 @@ class TrieNode:
         parent: A TrieNode instance, or None if root of trie.
         EOW: A Boolean. True iff the path from the Trie's root to 
           the current TrieNode represents a valid word.
+        count: An int. The number of words in the subtree rooted at 
+          the TrieNode, including the TrieNode itself.
+        weight: A number. The word's weight if EOW, otherwise unused.
+        best: A number. The greatest weight of any word in the subtree,
+          or NO_WEIGHT if there are no words in the subtree.
     """
 
+    __slots__ = ("children","depth","parent","EOW","count","weight","best")
+
     def __init__(self,depth,parent=None):
         """Inits TrieNode with no children at given depth."""
         self.children = {}
         self.depth = depth
         self.parent = parent
         self.EOW = False
+        self.count = 0
+        self.weight = 0
+        self.best = NO_WEIGHT
         
     def is_end_of_word(self):
         """Returns a Boolean."""
@@ -60,37 +98,465 @@ class Trie:
     def __len__(self):
         return self.size
         
-    def insert(self,word):
-        """Treats a non-empty string as a single word and adds it."""
-        self._insert_chars(self.root,word,0)
+    def insert(self,word,weight=None):
+        """Treats a non-empty string as a single word and adds it. 
         
-    def _insert_chars(self,node,word,i):
-        """Recursive helper. Inserts the ith character of a word."""
-        if i == len(word):
-            if node.is_end_of_word():
-                return 
-            else:
+        Args:
+            word: A string.
+            weight: An optional number used to rank the word in top_k().
+              A new word without a weight gets weight 0, and inserting
+              an existing word without a weight keeps its old weight.
+        """
+        node = self.root
+        for char in word:
+            child = node.children.get(char)
+            if child is None:
+                child = TrieNode(node.depth+1,node)
+                node.children[char] = child
+            node = child
+            
+        if not node.EOW:
+            node.EOW = True
+            self.size += 1
+            self._add_to_counts(node,1)
+            node.weight = NO_WEIGHT
+            self._set_weight(node,0 if weight is None else weight)
+        elif weight is not None:
+            self._set_weight(node,weight)
+            
+    def insert_many(self,words):
+        """Inserts every string in an iterable of words. Same as calling
+        insert() on each, minus the per-call overhead. 
+        
+        On a large build, most of the time goes to the cyclic garbage 
+        collector scanning the new nodes, so a caller that can pause it 
+        (gc.disable()) for the build will see it run about 3x faster."""
+        root = self.root
+        for word in words:
+            node = root
+            for char in word:
+                child = node.children.get(char)
+                if child is None:
+                    child = TrieNode(node.depth+1,node)
+                    node.children[char] = child
+                node = child
+            if not node.EOW:
+                node.EOW = True
                 self.size += 1
-                node.mark_as_end_of_word()
+                while node is not None:
+                    node.count += 1
+                    if node.best < 0:
+                        node.best = 0
+                    node = node.parent
+
+    def in_trie(self,word):
+        """Return True iff a word is in the trie. If the word is not in
+        the trie, returns False as early as possible."""
+        if len(word) < 1:
+            return False
+        return self._in_trie(word.lower())
+        
+    def contains_many(self,words):
+        """Returns a list of Booleans, one per string in an iterable of
+        words, each True iff in_trie() would return True on that word.
+        Walks each word inline, and lower-cases only words that are not
+        in lower case already."""
+        root = self.root
+        found = []
+        append = found.append
+        for word in words:
+            if not word.islower():
+                word = word.lower()
+            node = root
+            for char in word:
+                node = node.children.get(char)
+                if node is None:
+                    break
+            append(node is not None and node is not root and node.EOW)
+        return found
+        
+    def delete(self,word):
+        """Removes a word in O(L) time, along with every node that no
+        longer leads to any word. Caps sensitive, like insert().
+        
+        Raises:
+            KeyError: word is not in the trie.
+        """
+        node = self._find_node(word)
+        if node is None or not node.EOW:
+            raise KeyError(word)
+            
+        node.EOW = False
+        node.weight = 0
+        self.size -= 1
+        self._add_to_counts(node,-1)
+        
+        # Prune from the bottom up. Clearing the parent link breaks the 
+        # reference cycle so that pruned nodes are freed immediately.
+        
+        while node.parent is not None and node.count == 0:
+            parent = node.parent
+            del parent.children[word[node.depth-1]]
+            node.parent = None
+            node = parent
+        self._refresh_best(node)
+        
+    def discard_many(self,words):
+        """Removes every string in an iterable of words that is in the
+        trie, ignoring the rest. Returns the number of words removed."""
+        removed = 0
+        for word in words:
+            node = self._find_node(word)
+            if node is not None and node.EOW:
+                self.delete(word)
+                removed += 1
+        return removed
+        
+    def iter_prefix(self,prefix):
+        """Generator. Lazily yields, in sorted order, every word in the
+        trie that starts with prefix (including prefix itself)."""
+        node = self._find_node(prefix)
+        if node is not None:
+            yield from self._sorted_words(node,prefix)
+            
+    def count_prefix(self,prefix):
+        """Returns the number of words in the trie that start with 
+        prefix (including prefix itself) in O(P) time."""
+        node = self._find_node(prefix)
+        return 0 if node is None else node.count
+        
+    def top_k(self,prefix,k):
+        """Returns a list of up to k words that start with prefix, in
+        decreasing order by weight. Ties are broken in sorted order."""
+        node = self._find_node(prefix)
+        if node is None or node.count == 0 or k < 1:
+            return []
+            
+        # Entries are (-key,string,is_node,node). A word and a node can
+        # share a string, but is_node tells them apart, so the TrieNode
+        # itself is never compared.
+            
+        output = []
+        frontier = MinHeap()
+        frontier.push((-node.best,prefix,1,node))
+        while not frontier.is_empty() and len(output) < k:
+            _, string, is_node, node = frontier.pop()
+            if not is_node:
+                output.append(string)
+                continue
+            if node.EOW:
+                frontier.push((-node.weight,string,0,None))
+            for char,child in node.children.items():
+                if child.count > 0:
+                    frontier.push((-child.best,string+char,1,child))
+        return output
+        
+    def _find_node(self,prefix):
+        """Returns the TrieNode at the end of the path spelled out by 
+        prefix, or None if there is no such path."""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+        
+    def _add_to_counts(self,node,delta):
+        """Adds delta to the counts of node and all of its ancestors."""
+        while node is not None:
+            node.count += delta
+            node = node.parent
+            
+    def _set_weight(self,node,weight):
+        """Sets the weight of the word ending at node and updates best
+        weights up the trie as far as is required."""
+        old_weight, node.weight = node.weight, weight
+        
+        # A weight that grows can only raise best weights. A weight that
+        # shrinks might have been the best below some ancestors, so 
+        # those must check all of their children again.
+        
+        if weight >= old_weight:
+            while node is not None and node.best < weight:
+                node.best = weight
+                node = node.parent
         else:
-            if word[i] not in node.children:
-                node.children[word[i]] = TrieNode(node.depth+1,node)
-            self._insert_chars(node.children[word[i]],word,i+1)
+            self._refresh_best(node)
+            
+    def _refresh_best(self,node):
+        """Recomputes best weights from node up to the root, stopping 
+        early once a node's best weight is unchanged."""
+        while node is not None:
+            best = node.weight if node.EOW else NO_WEIGHT
+            for child in node.children.values():
+                if child.best > best:
+                    best = child.best
+            if best == node.best:
+                return
+            node.best = best
+            node = node.parent
+        
+    def save(self,path):
+        """Writes the trie to path as a flat node table that can be 
+        memory-mapped with load_mmap(). See mmaptrie.py."""
+        write_node_table(self.root,self.size,path)
+        
+    @staticmethod
+    def load_mmap(path):
+        """Returns a read-only MappedTrie over a file written by save().
+        
+        Raises:
+            FileNotFoundError: path does not lead to a file.
+            ValueError: The file is not in the expected format.
+        """
+        return MappedTrie(path)
+        
+    def freeze(self):
+        """Returns a read-only DAWG holding the same words, in which 
+        equivalent suffixes are shared. See dawg.py."""
+        return DAWG.from_sorted(self._sorted_words(self.root,""))
+        
+    def _sorted_words(self,node,prefix):
+        """Generator. Yields, in sorted order, prefix concatenated with 
+        every word stored in the subtree below node."""
+        stack = [(node,prefix)]
+        while stack:
+            node, prefix = stack.pop()
+            if node.is_end_of_word():
+                yield prefix
+            for char in sorted(node.children,reverse=True):
+                stack.append((node.children[char],prefix+char))
+        
+    def _in_trie(self,word):
+        """Iterative helper. Follows the characters of an already 
+        lower-cased word down from the root."""
+        node = self.root
+        for char in word:
+            node = node.children.get(char)
+            if node is None:
+                return False
+        return node.EOW
+
+# The Trie above allocates a full TrieNode object, with its own dictionary of
+# children, for every character it stores. That is convenient, but on a large 
+# dictionary such as the 236,736-word Unix corpus (see c17p15) the per-node 
+# overhead of hundreds of bytes adds up to far more memory than the words 
+# themselves.
 
+# CompactTrie stores the same tree as four parallel columns in the array
+# module, where node i is described by first_child[i], next_sibling[i], 
+# label[i], and flags[i]. A node's children form a linked list threaded 
+# through the next_sibling column, so each node costs 13 bytes no matter how 
+# many children it has. Finding a child means walking that list, which is 
+# O(A) in the alphabet size A instead of O(1) with a dictionary, but for 
+# natural language nodes rarely have more than a handful of children.
+
+# To let code written against the Trie (c17p13, c17p15, c17p17...) walk a 
+# CompactTrie unchanged, the root attribute hands out TrieCursor objects (see
+# cursor.py) that support the same protocol as a TrieNode.
+
+class CompactTrie:
+    """A trie class with the same insertion and lookup behavior as the
+    Trie, that stores its nodes in parallel typed arrays rather than as
+    one object per node. Treats as distinct all Unicode characters and 
+    thus is caps sensitive.
+    
+    Attributes:
+        first_child: An array of ints. Row of a node's first child, or 
+          NO_NODE if it has no children.
+        next_sibling: An array of ints. Row of a node's next sibling,
+          or NO_NODE if it is the last child of its parent.
+        label: An array of ints. The code point of the character that
+          leads to a node from its parent. Unused for the root.
+        flags: An array of bytes. EOW_FLAG is set iff the path from the
+          root to a node represents a valid word.
+        size: An int. The number of words stored in the trie.
+        free: An int. The first row on the free list, or NO_NODE. Free
+          rows are chained through the next_sibling column.
+        free_count: An int. The number of rows on the free list.
+    """
+    
+    def __init__(self):
+        """Inits an empty CompactTrie instance with only a root."""
+        self.first_child = array("i",[NO_NODE])
+        self.next_sibling = array("i",[NO_NODE])
+        self.label = array("I",[0])
+        self.flags = array("B",[0])
+        self.size = 0
+        self.free = NO_NODE
+        self.free_count = 0
+        
+    def __len__(self):
+        return self.size
+        
+    @property
+    def root(self):
+        """Returns a TrieCursor to the root."""
+        return TrieCursor(self,0,0)
+        
+    def node_count(self):
+        """Returns the number of nodes in use, including the root."""
+        return len(self.label) - self.free_count
+        
+    def insert(self,word):
+        """Treats a non-empty string as a single word and adds it."""
+        node = 0
+        for char in word:
+            code = ord(char)
+            child = self._find_child(node,code)
+            if child == NO_NODE:
+                child = self._add_child(node,code)
+            node = child
+            
+        if not self.flags[node] & EOW_FLAG:
+            self.flags[node] |= EOW_FLAG
+            self.size += 1
+            
     def in_trie(self,word):
         """Return True iff a word is in the trie. If the word is not in
         the trie, returns False as early as possible."""
         if len(word) < 1:
             return False
-        return self._in_trie(self.root,word.lower())
+        return self._in_trie(word.lower())
+        
+    def save(self,path):
+        """Writes the trie to path in the same format as Trie.save()."""
+        write_node_table(self.root,self.size,path)
+        
+    def insert_many(self,words):
+        """Inserts every string in an iterable of words."""
+        for word in words:
+            self.insert(word)
+            
+    def delete(self,word):
+        """Removes a word in O(L*A) time, returning the rows of nodes 
+        that no longer lead to any word to the free list, where later 
+        insertions reuse them. Caps sensitive, like insert().
+        
+        Raises:
+            KeyError: word is not in the trie.
+        """
+        path = [0]
+        for char in word:
+            child = self._find_child(path[-1],ord(char))
+            if child == NO_NODE:
+                raise KeyError(word)
+            path.append(child)
+        if not self.flags[path[-1]] & EOW_FLAG:
+            raise KeyError(word)
+            
+        self.flags[path[-1]] &= ~EOW_FLAG
+        self.size -= 1
         
-    def _in_trie(self,node,word):
-        """Recursive helper. Checks that the current, and if necessary
-        the child node, align with the progression of the word."""
-        if node.depth == len(word):
-            return node.is_end_of_word()
+        while len(path) > 1:
+            node = path.pop()
+            if self.flags[node] & EOW_FLAG or self.first_child[node] != NO_NODE:
+                break
+            self._unlink_child(path[-1],node)
+            self._free_row(node)
+            
+    def discard_many(self,words):
+        """Removes every string in an iterable of words that is in the
+        trie, ignoring the rest. Returns the number of words removed."""
+        removed = 0
+        for word in words:
+            try:
+                self.delete(word)
+            except KeyError:
+                continue
+            removed += 1
+        return removed
+            
+    def contains_many(self,words):
+        """Returns a list of Booleans, one per string in an iterable of
+        words, each True iff in_trie() would return True on that word.
+        Walks each word inline, like Trie.contains_many()."""
+        first_child, next_sibling = self.first_child, self.next_sibling
+        label, flags = self.label, self.flags
+        found = []
+        append = found.append
+        for word in words:
+            if not word.islower():
+                word = word.lower()
+            node = 0
+            for char in word:
+                code = ord(char)
+                node = first_child[node]
+                while node != NO_NODE and label[node] != code:
+                    node = next_sibling[node]
+                if node == NO_NODE:
+                    break
+            append(node > 0 and bool(flags[node] & EOW_FLAG))
+        return found
+            
+    def _in_trie(self,word):
+        """Iterative helper. Follows the characters of an already 
+        lower-cased word down from the root."""
+        first_child, next_sibling = self.first_child, self.next_sibling
+        label = self.label
+        node = 0
+        for char in word:
+            code = ord(char)
+            node = first_child[node]
+            while node != NO_NODE and label[node] != code:
+                node = next_sibling[node]
+            if node == NO_NODE:
+                return False
+        return bool(self.flags[node] & EOW_FLAG)
+        
+    def _is_end_of_word(self,node):
+        """Returns a Boolean."""
+        return bool(self.flags[node] & EOW_FLAG)
+        
+    def _labels(self,node):
+        """Yields the code points of the children of node."""
+        child = self.first_child[node]
+        while child != NO_NODE:
+            yield self.label[child]
+            child = self.next_sibling[child]
+        
+    def _find_child(self,node,code):
+        """Returns the row of the child of node labeled with code point
+        code, or NO_NODE if there is no such child."""
+        child = self.first_child[node]
+        while child != NO_NODE and self.label[child] != code:
+            child = self.next_sibling[child]
+        return child
+        
+    def _add_child(self,node,code):
+        """Makes a new row the first child of node and returns it. 
+        Reuses a row from the free list if possible, and otherwise 
+        appends one. Prepending to the sibling list makes this O(1)."""
+        if self.free != NO_NODE:
+            child = self.free
+            self.free = self.next_sibling[child]
+            self.free_count -= 1
+            self.next_sibling[child] = self.first_child[node]
+            self.label[child] = code
         else:
-            if word[node.depth]in node.children:
-                return self._in_trie(node.children[word[node.depth]],word)
-            else:
-                return False
\ No newline at end of file
+            child = len(self.label)
+            self.first_child.append(NO_NODE)
+            self.next_sibling.append(self.first_child[node])
+            self.label.append(code)
+            self.flags.append(0)
+        self.first_child[node] = child
+        return child
+        
+    def _unlink_child(self,node,child):
+        """Removes child from the sibling list of node."""
+        if self.first_child[node] == child:
+            self.first_child[node] = self.next_sibling[child]
+            return
+        prev = self.first_child[node]
+        while self.next_sibling[prev] != child:
+            prev = self.next_sibling[prev]
+        self.next_sibling[prev] = self.next_sibling[child]
+        
+    def _free_row(self,row):
+        """Clears a row with no children and pushes it onto the free 
+        list."""
+        self.flags[row] = 0
+        self.label[row] = 0
+        self.next_sibling[row] = self.free
+        self.free = row
+        self.free_count += 1
\ No newline at end of file
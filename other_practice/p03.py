@@ -1,7 +1,11 @@
 import sys
 sys.path.append('..')
 from data_structs import MaxHeap, MinHeap, MyMaxHeap, MyMinHeap
-from random import randint
+from data_structs import MaxPairingHeap, MinPairingHeap
+from data_structs import MinDictHeap, MaxDictHeap, MinIndexedDictHeap
+import heapq as hq
+from random import randint, randrange
+from time import time
 
 # p03
 
@@ -18,6 +22,22 @@ def test():
     test_heap(MinHeap,False)
     test_heap(MyMaxHeap,True)
     test_heap(MyMinHeap,False)
+    test_bulk(MyMaxHeap,True)
+    test_bulk(MyMinHeap,False)
+    test_dict_bulk(MaxDictHeap,True)
+    test_dict_bulk(MinDictHeap,False)
+    for arity in (3,4,8):
+        test_heap(lambda: MyMaxHeap(arity),True)
+        test_heap(lambda: MyMinHeap(arity),False)
+        test_bulk(MyMaxHeap,True,arity)
+        test_bulk(MyMinHeap,False,arity)
+        test_dict_bulk(MinDictHeap,False,arity)
+    test_key(MaxHeap,True)
+    test_key(MinHeap,False)
+    test_heap(MaxPairingHeap,True)
+    test_heap(MinPairingHeap,False)
+    test_update(MaxPairingHeap,True)
+    test_update(MinPairingHeap,False)
        
 def test_heap(heap_class,max_test):
     """Tests the push and pop methods for a single heap class.
@@ -39,4 +59,298 @@ def test_heap(heap_class,max_test):
     while not h.is_empty():
         my_sorted_vals.append(h.pop())
      
-    assert my_sorted_vals == sorted(vals,reverse=max_test)
\ No newline at end of file
+    assert my_sorted_vals == sorted(vals,reverse=max_test)
+
+# The bulk methods can be checked the same way, against sorted copies of the
+# values that went into the heap.
+
+def test_bulk(heap_class,max_test,arity=2):
+    """Tests heapify, pushpop, nsmallest, nlargest, merge, update, and 
+    remove for a single MyHeap subclass.
+    
+    Args:
+        heap_class: A MyHeap subclass that takes only an arity.
+        max_test: True if testing for max heap, False for min heap.
+        arity: An int. The arity of the heaps to test.
+    """
+    NVALS = 1000
+    MIN_VAL = 1
+    MAX_VAL = 1000
+    
+    vals = [randint(MIN_VAL,MAX_VAL) for _ in range(NVALS)]
+    h = heap_class.heapify(vals,arity)
+    assert len(h) == NVALS
+    
+    for k in (0,1,10,NVALS,NVALS+1):
+        assert h.nsmallest(k) == sorted(vals)[:k]
+        assert h.nlargest(k) == sorted(vals,reverse=True)[:k]
+    
+    for _ in range(NVALS):
+        val = randint(MIN_VAL-10,MAX_VAL+10)
+        vals.append(val)
+        vals.sort(reverse=max_test)
+        assert h.pushpop(val) == vals.pop(0)
+    
+    others = [heap_class.heapify((randint(MIN_VAL,MAX_VAL) 
+                                  for _ in range(n)),arity)
+              for n in (0,3,NVALS)]
+    for other in others:
+        vals.extend(other.array)
+        h.merge(other)
+    
+    my_sorted_vals = []
+    while not h.is_empty():
+        my_sorted_vals.append(h.pop())
+    
+    assert my_sorted_vals == sorted(vals,reverse=max_test)
+    
+    # update() and remove() take positions in the array, so they are 
+    # checked against a list of the same values, changed at random.
+    
+    h = heap_class.heapify(vals[:NVALS],arity)
+    vals = list(h.array)
+    for _ in range(NVALS):
+        index = randint(0,len(h)-1)
+        if randint(0,3):
+            val = randint(MIN_VAL-10,MAX_VAL+10)
+            vals.remove(h.array[index])
+            vals.append(val)
+            h.update(index,val)
+        else:
+            vals.remove(h.remove(index))
+    my_sorted_vals = []
+    while not h.is_empty():
+        my_sorted_vals.append(h.pop())
+    
+    assert my_sorted_vals == sorted(vals,reverse=max_test)
+
+def test_dict_bulk(heap_class,max_test,arity=2):
+    """Tests that heapify, pushpop, nsmallest, nlargest, merge, and 
+    remove keep a dictheap's element_to_index in step with its array.
+    
+    Args:
+        heap_class: A DictHeap subclass that takes only an arity.
+        max_test: True if testing for max heap, False for min heap.
+        arity: An int. The arity of the heaps to test.
+    """
+    NVALS = 1000
+    MIN_VAL = 1
+    MAX_VAL = 1000
+    
+    def check(h,keys):
+        assert len(h) == len(h.element_to_index) == len(keys)
+        for index,item in enumerate(h.array):
+            assert h.element_to_index[item.element] == index
+            assert keys[item.element] == item.heap_key
+            
+    def pop_all(h):
+        items = []
+        while not h.is_empty():
+            items.append(h.pop().heap_key)
+        assert not h.element_to_index
+        return items
+    
+    keys = {element: randint(MIN_VAL,MAX_VAL) for element in range(NVALS)}
+    h = heap_class.heapify(keys.items(),arity)
+    check(h,keys)
+    
+    for k in (0,1,10,NVALS,NVALS+1):
+        smallest = [item.heap_key for item in h.nsmallest(k)]
+        largest = [item.heap_key for item in h.nlargest(k)]
+        assert smallest == sorted(keys.values())[:k]
+        assert largest == sorted(keys.values(),reverse=True)[:k]
+    
+    for element in range(NVALS//2,NVALS+NVALS//2):
+        keys[element] = randint(MIN_VAL-10,MAX_VAL+10)
+        top = sorted(keys.items(),key=lambda pair: pair[1],reverse=max_test)[0]
+        item = h.pushpop(element,keys[element])
+        assert item.heap_key == top[1]
+        del keys[item.element]
+        check(h,keys)
+    
+    for n in (0,3,NVALS):
+        other_keys = {randint(0,3*NVALS): randint(MIN_VAL,MAX_VAL) 
+                      for _ in range(n)}
+        h.merge(heap_class.heapify(other_keys,arity))
+        keys.update(other_keys)
+        check(h,keys)
+    
+    for _ in range(NVALS//2):
+        item = h.remove(randint(0,len(h)-1))
+        del keys[item.element]
+        check(h,keys)
+    
+    assert pop_all(h) == sorted(keys.values(),reverse=max_test)
+    
+# With a key function, MinHeap and MaxHeap hold records that cannot be 
+# compared themselves, and should pop records with equal keys in the order 
+# they were pushed, just as a stable sort would order them.
+
+def test_key(heap_class,max_test):
+    """Tests the key function and tie-breaking for a heapq-based heap.
+    
+    Args:
+        heap_class: MinHeap or MaxHeap.
+        max_test: True if testing for max heap, False for min heap.
+    """
+    NVALS = 1000
+    MIN_VAL = 1
+    MAX_VAL = 50
+    
+    h = heap_class(key=lambda record: record["val"])
+    records = [{"val": randint(MIN_VAL,MAX_VAL), "id": i} 
+               for i in range(NVALS)]
+    for record in records:
+        h.push(record)
+        
+    my_sorted_records = []
+    while not h.is_empty():
+        my_sorted_records.append(h.pop())
+    
+    assert my_sorted_records == sorted(records,key=lambda record: 
+                                       record["val"],reverse=max_test)
+    
+    for record in records:
+        h.push(record)
+        top = h.peek()
+        assert h.replace(record) is top
+    
+    words = ["pear","apple","fig","kiwi","banana"]
+    h = heap_class()
+    for word in words:
+        h.push(word)
+    assert [h.pop() for _ in words] == sorted(words,reverse=max_test)
+    
+# The pairing heaps also support updating and removing any value through the
+# handle that push() returns, so these are checked against a plain list.
+
+def test_update(heap_class,max_test):
+    """Tests the update and remove methods for a pairing heap class.
+    
+    Args:
+        heap_class: A callable class that creates a pairing heap.
+        max_test: True if testing for max heap, False for min heap.
+    """
+    NVALS = 1000
+    MIN_VAL = 1
+    MAX_VAL = 1000
+    
+    h = heap_class()
+    handles = [h.push(randint(MIN_VAL,MAX_VAL)) for _ in range(NVALS)]
+    
+    for _ in range(NVALS):
+        i = randrange(len(handles))
+        if randint(0,3) == 0:
+            h.remove(handles.pop(i))
+        else:
+            h.update(handles[i],randint(MIN_VAL,MAX_VAL))
+        if randint(0,3) == 0 and not h.is_empty():
+            top = h.root
+            assert h.pop() == top.value
+            handles.remove(top)
+    
+    vals = [node.value for node in handles]
+    my_sorted_vals = []
+    while not h.is_empty():
+        my_sorted_vals.append(h.pop())
+    
+    assert my_sorted_vals == sorted(vals,reverse=max_test)
+
+# To compare the implementations, I time two workloads. The first pushes N
+# random values and then pops them all. The second mimics a shortest-path 
+# search: it pushes N values, improves random ones many times (decrease-key),
+# and then pops them all. heapq has no decrease-key, so it pushes a new entry
+# on every update and skips stale entries when popping ("lazy deletion"), 
+# which is how Dijkstra's algorithm is usually written with heapq. The array
+# heaps are timed with MinIndexedDictHeap, whose replace_heap_key is their 
+# decrease-key, and the pairing heap with update().
+
+def benchmark(n=100000,updates=300000):
+    """Prints the time taken by each heap on both workloads."""
+    vals = [randint(0,n) for _ in range(n)]
+    improvements = [(randrange(n),randint(-n,0)) for _ in range(updates)]
+    
+    print(f"push/pop, N={n}:")
+    for name,make in (("heapq",None),
+                      ("MinHeap",MinHeap),
+                      ("MyMinHeap, arity 2",lambda: MyMinHeap(2)),
+                      ("MyMinHeap, arity 4",lambda: MyMinHeap(4)),
+                      ("MinPairingHeap",MinPairingHeap)):
+        start = time()
+        if make is None:
+            h = []
+            for val in vals:
+                hq.heappush(h,val)
+            while h:
+                hq.heappop(h)
+        else:
+            h = make()
+            for val in vals:
+                h.push(val)
+            while not h.is_empty():
+                h.pop()
+        print(f"  {name:<26}{time()-start:.3f}s")
+        
+    print(f"decrease-key, N={n}, {updates} updates:")
+    for name,run in (("heapq (lazy deletion)",_heapq_updates),
+                     ("IndexedDictHeap, arity 2",
+                      lambda v,u: _dictheap_updates(v,u,2)),
+                     ("IndexedDictHeap, arity 4",
+                      lambda v,u: _dictheap_updates(v,u,4)),
+                     ("MinPairingHeap",_pairing_updates)):
+        start = time()
+        result = run(vals,improvements)
+        print(f"  {name:<26}{time()-start:.3f}s")
+        assert result == sorted(_apply_updates(vals,improvements))
+        
+def _apply_updates(vals,improvements):
+    """Returns the final values after every improvement is applied."""
+    vals = vals[:]
+    for i,val in improvements:
+        vals[i] = min(vals[i],val)
+    return vals
+    
+def _heapq_updates(vals,improvements):
+    """Runs the decrease-key workload on heapq. Returns popped values."""
+    current = vals[:]
+    h = [(val,i) for i,val in enumerate(vals)]
+    hq.heapify(h)
+    for i,val in improvements:
+        if val < current[i]:
+            current[i] = val
+            hq.heappush(h,(val,i))
+    output = []
+    while h:
+        val, i = hq.heappop(h)
+        if val == current[i]:
+            output.append(val)
+            current[i] = None
+    return output
+
+def _dictheap_updates(vals,improvements,arity):
+    """Runs the decrease-key workload on a MinIndexedDictHeap. Returns
+    popped values."""
+    h = MinIndexedDictHeap(arity)
+    for i,val in enumerate(vals):
+        h.push(i,val)
+    keys = h.heap_keys
+    for i,val in improvements:
+        if val < keys[h.element_to_index[i]]:
+            h.replace_heap_key(i,val)
+    output = []
+    while not h.is_empty():
+        output.append(h.pop()[1])
+    return output
+    
+def _pairing_updates(vals,improvements):
+    """Runs the decrease-key workload on a MinPairingHeap. Returns
+    popped values."""
+    h = MinPairingHeap()
+    handles = [h.push(val) for val in vals]
+    for i,val in improvements:
+        if val < handles[i].value:
+            h.update(handles[i],val)
+    output = []
+    while not h.is_empty():
+        output.append(h.pop())
+    return output
@@ -1,6 +1,6 @@
 import sys
 sys.path.append('..')
-from data_structs import Stack, DequeQueue, Graph
+from data_structs import Stack, DequeQueue, RingQueue, Graph
 
 # p04
 
@@ -55,19 +55,23 @@ def bfs(graph,ROOT_INDEX=0):
         return
     
     output = []
-    seen_nodes = set() 
     
-    # This approach uses a queue of node indices.
+    # This approach uses a queue of node indices. A node is marked as 
+    # seen when it is queued rather than when it is visited, so it is 
+    # queued at most once, and the queue never holds more than one index
+    # per node. Nodes still come off the queue in the same order.
     
-    search_queue = DequeQueue()
+    search_queue = RingQueue(len(graph.nodes))
     search_queue.add(ROOT_INDEX)
+    seen_nodes = {graph[ROOT_INDEX]}
     
     while not search_queue.is_empty():
         cur_node = graph[search_queue.remove()]
-        if cur_node not in seen_nodes:
-            output.append(cur_node.data)
-            seen_nodes.add(cur_node)
-            for child_index in cur_node.children:
+        output.append(cur_node.data)
+        for child_index in cur_node.children:
+            child = graph[child_index]
+            if child not in seen_nodes:
+                seen_nodes.add(child)
                 search_queue.add(child_index)
                 
     return output 
@@ -163,6 +167,10 @@ class Searcher:
         self.seen_indices = set()
         self.backtracer = None
     
+        # Unlike bfs(), this does not use a RingQueue, as sizing one 
+        # requires counting every edge in the graph, while a 
+        # bidirectional search is meant to touch only a small part of it.
+    
         self.search_queue = DequeQueue()
         self.add_node(i,None)  # Origin has no backpointer.
         self.add_divider()
@@ -0,0 +1,230 @@
+import sys
+sys.path.append('..')
+from data_structs import Trie, CompactTrie
+from random import choice, randint
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# p06
+
+# Trie Tests: Some tests on the trie implementations.
+
+##############################################################################
+
+# One way to test a trie is to insert random words into it and confirm that
+# it agrees with a Python set of the same words on every lookup. Words over a
+# small alphabet share many prefixes, and a word that is a prefix of another
+# (including the empty string, a prefix of every word) checks that the end of
+# word flag, and not the mere presence of a node, decides membership.
+
+# in_trie() lower-cases the word it is given while insert() does not, so the
+# random words are all lower-case. The empty string can be inserted and is 
+# counted by len(), but in_trie() never reports it.
+
+def random_words(count,alphabet="abc",max_length=6):
+    """Returns a list of count random strings over alphabet, of lengths
+    0 through max_length."""
+    return ["".join(choice(alphabet) for _ in range(randint(0,max_length)))
+            for _ in range(count)]
+            
+def test():
+    """Tests the trie classes against sets of random words."""
+    for _ in range(200):
+        test_trie(Trie)
+        test_trie(CompactTrie)
+        test_freeze()
+        test_top_k()
+        test_delete()
+    test_mmap()
+        
+def test_trie(trie_class):
+    """Tests insert, in_trie, contains_many, and len for a single trie
+    class against a set."""
+    words = random_words(randint(0,40))
+    others = random_words(40)
+    trie, expected = trie_class(), set()
+    for word in words:
+        trie.insert(word)
+        expected.add(word)
+        assert len(trie) == len(expected)
+        
+    for word in words + others:
+        assert trie.in_trie(word) == (word in expected and word != "")
+    assert trie.contains_many(words + others) == \
+           [trie.in_trie(word) for word in words + others]
+           
+    bulk = trie_class()
+    bulk.insert_many(words)
+    assert len(bulk) == len(expected)
+    assert bulk.contains_many(others) == trie.contains_many(others)
+
+# A DAWG made by Trie.freeze() must agree with the trie on every lookup, and 
+# merging equivalent suffixes must never leave it with more nodes than the 
+# trie. Words that share long suffixes but not prefixes make it strictly 
+# smaller. DAWG.from_sorted() skips the empty string, so the DAWG holds one
+# word fewer when the trie holds it.
+
+SUFFIX_WORDS = ["hoping","hopping","moping","mopping","shopping","sloping",
+                "topping","walking","talking","stalking","hopeless","topless"]
+
+def count_nodes(node):
+    """Returns the number of distinct nodes reachable from node, itself
+    included."""
+    seen = {id(node)}
+    stack = [node]
+    while stack:
+        for child in stack.pop().children.values():
+            if id(child) not in seen:
+                seen.add(id(child))
+                stack.append(child)
+    return len(seen)
+    
+def test_freeze():
+    """Tests that a frozen Trie gives the same answers as the Trie, and
+    is no larger."""
+    for words in (random_words(randint(0,40)),SUFFIX_WORDS):
+        trie = Trie()
+        trie.insert_many(words)
+        dawg = trie.freeze()
+        
+        assert len(dawg) == len(set(words) - {""})
+        for word in words + random_words(40):
+            assert dawg.in_trie(word) == trie.in_trie(word)
+        assert dawg.node_count() <= count_nodes(trie.root)
+        
+    assert dawg.node_count() < count_nodes(trie.root)
+
+# A trie written with save() and mapped back with Trie.load_mmap() must hold 
+# exactly the words that were saved, including when there are none. Walking
+# the mapped trie with the TrieNode protocol checks the node and edge tables
+# themselves, and not only the lookups that in_trie() happens to make.
+
+def walk_words(node,prefix=""):
+    """Returns a sorted list of the words below node, using only the
+    children / is_end_of_word() walking protocol."""
+    output = [prefix] if node.is_end_of_word() else []
+    for char in sorted(node.children):
+        output.extend(walk_words(node.children[char],prefix+char))
+    return output
+    
+def test_mmap(trials=100):
+    """Tests that every trie class round-trips through save() and 
+    Trie.load_mmap(), and that a file of the wrong format is refused."""
+    with TemporaryDirectory() as tmp_dir:
+        path = str(Path(tmp_dir,"trie.bin"))
+        for trial in range(trials):
+            words = random_words(0 if trial == 0 else randint(1,40))
+            trie, compact = Trie(), CompactTrie()
+            trie.insert_many(words)
+            compact.insert_many(words)
+            
+            for source in (trie,compact,trie.freeze()):
+                source.save(path)
+                with Trie.load_mmap(path) as mapped:
+                    assert len(mapped) == len(source)
+                    assert walk_words(mapped.root) == walk_words(source.root)
+                    for word in words + random_words(20):
+                        assert mapped.in_trie(word) == source.in_trie(word)
+                        
+        Path(path).write_bytes(b"not a trie")
+        try:
+            Trie.load_mmap(path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Loaded a file that is not a trie.")
+
+# Trie keeps a count and a best weight at every node and updates them on each
+# insertion, so prefix queries are checked against a brute-force scan of a 
+# dictionary of words to weights, both as words are added and after their 
+# weights are overwritten, which may lower a best weight as well as raise it.
+
+def test_top_k(prefixes=("","a","ab","b","cc","abc","x")):
+    """Tests iter_prefix, count_prefix, and top_k against a dictionary
+    of words to weights."""
+    trie, weights = Trie(), {}
+    
+    def check():
+        for prefix in prefixes:
+            matches = sorted(word for word in weights 
+                             if word.startswith(prefix))
+            assert list(trie.iter_prefix(prefix)) == matches
+            assert trie.count_prefix(prefix) == len(matches)
+            ranked = sorted(matches,key=lambda word: (-weights[word],word))
+            for k in (0,1,3,len(ranked)+1):
+                assert trie.top_k(prefix,k) == ranked[:k]
+                
+    for word in random_words(randint(0,30)):
+        if randint(0,1):
+            weight = randint(-5,5)
+            trie.insert(word,weight)
+            weights[word] = weight
+        else:
+            trie.insert(word)
+            weights.setdefault(word,0)
+    check()
+    
+    for word in list(weights):
+        if randint(0,1):
+            weight = randint(-5,5)
+            trie.insert(word,weight)
+            weights[word] = weight
+    check()
+    
+    new_words = random_words(10)
+    trie.insert_many(new_words)
+    for word in new_words:
+        weights.setdefault(word,0)
+    check()
+
+# Deleting a word prunes the nodes that no longer lead to any word, and must
+# leave counts and best weights as if the word had never been inserted. 
+# CompactTrie puts the rows of pruned nodes on a free list, so inserting the
+# deleted words again must reuse them rather than add rows.
+
+def test_delete(prefixes=("","a","ab","b","cc")):
+    """Tests delete and discard_many on both trie classes, then checks
+    that re-inserting the deleted words grows neither trie."""
+    words = sorted(set(random_words(randint(1,40))))
+    weights = {word: randint(-5,5) for word in words}
+    trie, compact = Trie(), CompactTrie()
+    for word in words:
+        trie.insert(word,weights[word])
+        compact.insert(word)
+    nodes, rows = count_nodes(trie.root), len(compact.label)
+    
+    deleted = set(word for word in words if randint(0,1))
+    kept = [word for word in words if word not in deleted]
+    for i,word in enumerate(deleted):
+        if i % 2:
+            trie.delete(word)
+            compact.delete(word)
+        else:
+            assert trie.discard_many([word,word]) == 1
+            assert compact.discard_many([word,word]) == 1
+    for bad_word in random_words(5):
+        if bad_word not in kept:
+            for t in (trie,compact):
+                try:
+                    t.delete(bad_word)
+                except KeyError:
+                    pass
+                else:
+                    raise AssertionError("Deleted a missing word.")
+                    
+    assert len(trie) == len(compact) == len(kept)
+    for word in words:
+        expected = word in kept and word != ""
+        assert trie.in_trie(word) == compact.in_trie(word) == expected
+    assert count_nodes(trie.root) == compact.node_count()
+    for prefix in prefixes:
+        matches = [word for word in kept if word.startswith(prefix)]
+        assert trie.count_prefix(prefix) == len(matches)
+        matches.sort(key=lambda word: (-weights[word],word))
+        assert trie.top_k(prefix,3) == matches[:3]
+        
+    for word in deleted:
+        trie.insert(word,weights[word])
+        compact.insert(word)
+    assert count_nodes(trie.root) == nodes
+    assert compact.node_count() == nodes and len(compact.label) == rows
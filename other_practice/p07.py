@@ -0,0 +1,119 @@
+import sys
+sys.path.append('..')
+from data_structs import ConcurrentQueue, AsyncQueue
+import asyncio
+import threading
+
+# p07
+
+# Queue Tests: Some tests on the thread-safe and asyncio queues.
+
+##############################################################################
+
+# A blocking queue is tested with producers and consumers that run at the 
+# same time. Each producer adds its own range of ints, and the consumers 
+# between them must remove every int exactly once, with each producer's ints
+# in the order they were added. A small maxsize makes producers wait for 
+# room as well as consumers wait for items. An empty queue that is never 
+# filled, or a full one that is never emptied, must raise TimeoutError.
+
+PRODUCERS = 4
+CONSUMERS = 3
+ITEMS = 2000
+MAXSIZE = 8
+
+def test():
+    """Tests both queue classes."""
+    test_concurrent()
+    test_async()
+    
+def check_consumed(consumed):
+    """Checks that lists of removed items, one per consumer, hold every 
+    item exactly once, with each producer's items in order."""
+    everything = sorted(item for items in consumed for item in items)
+    assert everything == list(range(PRODUCERS*ITEMS))
+    for items in consumed:
+        for producer in range(PRODUCERS):
+            mine = [item for item in items if item // ITEMS == producer]
+            assert mine == sorted(mine)
+            
+def test_concurrent():
+    """Tests a ConcurrentQueue with producer and consumer threads."""
+    q = ConcurrentQueue(MAXSIZE)
+    consumed = [[] for _ in range(CONSUMERS)]
+    
+    def produce(producer):
+        for item in range(producer*ITEMS,(producer+1)*ITEMS):
+            q.add(item)
+            
+    def consume(items):
+        while True:
+            item = q.remove()
+            if item is None:
+                return
+            items.append(item)
+            
+    producers = [threading.Thread(target=produce,args=(i,)) 
+                 for i in range(PRODUCERS)]
+    consumers = [threading.Thread(target=consume,args=(items,)) 
+                 for items in consumed]
+    for thread in producers + consumers:
+        thread.start()
+    for thread in producers:
+        thread.join()
+    for _ in consumers:
+        q.add(None)  # One stop signal per consumer.
+    for thread in consumers:
+        thread.join()
+        
+    check_consumed(consumed)
+    assert q.is_empty()
+    
+    for _ in range(MAXSIZE):
+        q.add(0,timeout=0.01)
+    for method,args in ((q.add,(0,)),(ConcurrentQueue().remove,())):
+        try:
+            method(*args,timeout=0.01)
+        except TimeoutError:
+            pass
+        else:
+            raise AssertionError("Did not time out.")
+            
+def test_async():
+    """Tests an AsyncQueue with producer and consumer coroutines."""
+    async def run():
+        q = AsyncQueue(MAXSIZE)
+        consumed = [[] for _ in range(CONSUMERS)]
+        
+        async def produce(producer):
+            for item in range(producer*ITEMS,(producer+1)*ITEMS):
+                await q.add(item)
+                
+        async def consume(items):
+            while True:
+                item = await q.remove()
+                if item is None:
+                    return
+                items.append(item)
+                
+        consumers = [asyncio.ensure_future(consume(items)) 
+                     for items in consumed]
+        await asyncio.gather(*(produce(i) for i in range(PRODUCERS)))
+        for _ in consumers:
+            await q.add(None)
+        await asyncio.gather(*consumers)
+        
+        check_consumed(consumed)
+        assert q.is_empty()
+        
+        for _ in range(MAXSIZE):
+            await q.add(0,timeout=0.01)
+        for method,args in ((q.add,(0,)),(AsyncQueue().remove,())):
+            try:
+                await method(*args,timeout=0.01)
+            except TimeoutError:
+                pass
+            else:
+                raise AssertionError("Did not time out.")
+                
+    asyncio.run(run())
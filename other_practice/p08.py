@@ -0,0 +1,123 @@
+import sys
+sys.path.append('..')
+from data_structs import ArraySingly, ArrayDoubly, NO_NODE
+from random import randint
+
+# p08
+
+# Linked List Tests: Some tests on the array-backed linked lists.
+
+##############################################################################
+
+# ArraySingly and ArrayDoubly are tested by making random changes to them 
+# and to a Python list of the same values, and checking after each change 
+# that walking the list from head to tail (and, for ArrayDoubly, from tail to
+# head) gives the Python list. The lists start with one slot so that they 
+# grow many times. Once they are as long as they will get, removing values 
+# and inserting as many again must reuse the freed slots, and not grow.
+
+def test():
+    """Tests both array-backed list classes."""
+    for _ in range(100):
+        test_singly()
+        test_doubly()
+        
+def forward(lst):
+    """Returns a list of the values in an array-backed list, from head 
+    to tail."""
+    output, slot = [], lst.head
+    while slot != NO_NODE:
+        output.append(lst.vals[slot])
+        slot = lst.next[slot]
+    return output
+    
+def backward(lst):
+    """Returns a list of the values in an ArrayDoubly, from tail to 
+    head."""
+    output, slot = [], lst.tail
+    while slot != NO_NODE:
+        output.append(lst.vals[slot])
+        slot = lst.prev[slot]
+    return output
+    
+def check(lst,expected):
+    """Checks that an array-backed list holds the values in expected."""
+    assert forward(lst) == expected
+    assert lst.size == len(expected) and lst.is_empty() == (not expected)
+    if lst.tail != NO_NODE:
+        assert lst.vals[lst.tail] == expected[-1]
+    if isinstance(lst,ArrayDoubly):
+        assert backward(lst) == expected[::-1]
+        
+def test_singly(ops=200):
+    """Tests insert_head, insert_tail, remove_head, and delete_one."""
+    lst, expected = ArraySingly(capacity=1), []
+    for _ in range(ops):
+        value, choice = randint(0,9), randint(0,3)
+        if choice == 0:
+            lst.insert_head(value)
+            expected.insert(0,value)
+        elif choice == 1:
+            lst.insert_tail(value)
+            expected.append(value)
+        elif choice == 2:
+            assert lst.remove_head() == (expected.pop(0) if expected 
+                                         else None)
+        else:
+            lst.delete_one(value)
+            if value in expected:
+                expected.remove(value)
+        check(lst,expected)
+    check_reuse(lst,expected)
+    
+def test_doubly(ops=200):
+    """Tests insert_head, insert_tail, remove_tail, remove, and 
+    move_to_head."""
+    lst, expected, slots = ArrayDoubly(capacity=1), [], []
+    for _ in range(ops):
+        value, choice = randint(0,99), randint(0,4)
+        if choice == 0:
+            slots.insert(0,lst.insert_head(value))
+            expected.insert(0,value)
+        elif choice == 1:
+            slots.append(lst.insert_tail(value))
+            expected.append(value)
+        elif choice == 2:
+            assert lst.remove_tail() == (expected.pop() if expected 
+                                         else None)
+            if slots:
+                slots.pop()
+        elif expected:
+            i = randint(0,len(expected)-1)
+            if choice == 3:
+                assert lst.remove(slots.pop(i)) == expected.pop(i)
+            else:
+                lst.move_to_head(slots[i])
+                slots.insert(0,slots.pop(i))
+                expected.insert(0,expected.pop(i))
+        check(lst,expected)
+    check_reuse(lst,expected)
+    
+def check_reuse(lst,expected):
+    """Grows lst, removes half its values (from the head of an 
+    ArraySingly and the tail of an ArrayDoubly), and checks that 
+    inserting as many again reuses the freed slots without growing the
+    columns."""
+    for value in range(lst.size,64):
+        lst.insert_tail(value)
+        expected.append(value)
+    slot_count = len(lst.vals)
+    freed = set()
+    for _ in range(len(expected)//2):
+        if isinstance(lst,ArrayDoubly):
+            freed.add(lst.tail)
+            assert lst.remove_tail() == expected.pop()
+        else:
+            freed.add(lst.head)
+            assert lst.remove_head() == expected.pop(0)
+    check(lst,expected)
+    
+    reused = set(lst.insert_tail(value) for value in range(len(freed)))
+    expected.extend(range(len(freed)))
+    check(lst,expected)
+    assert reused == freed and len(lst.vals) == slot_count